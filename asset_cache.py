@@ -0,0 +1,138 @@
+"""
+Content-addressed local cache for Drive visuals
+Files are stored under their Drive file ID and md5Checksum, so unchanged slides are never downloaded twice
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from collections import Counter
+
+log = logging.getLogger(__name__)
+
+
+def file_md5(path):
+    """md5 of a file, read in 1 MiB blocks"""
+    digest = hashlib.md5()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AssetCache:
+    def __init__(self, transfer, directory="/tmp/lincon_assets", max_bytes=500 * 1024 * 1024):
+        """
+        Args:
+            transfer: DriveTransfer used for metadata lookups and downloads
+            directory: where cached files live
+            max_bytes: total size cap; least recently used files are evicted beyond it
+        """
+        self.transfer = transfer
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._pinned = Counter()   # path -> number of callers still using the file
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, file_id, version):
+        return os.path.join(self.directory, f"{file_id}-{version}.png")
+
+    def _drop_old_versions(self, file_id, keep_path):
+        prefix = f"{file_id}-"
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(prefix) and path != keep_path and path not in self._pinned:
+                os.remove(path)
+
+    def _evict(self):
+        """Remove least recently used files until the cache fits under max_bytes"""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.part') or path in self._pinned or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def _verify(self, path, md5):
+        return md5 is None or file_md5(path) == md5
+
+    def release(self, paths):
+        """Unpin paths returned by fetch / fetch_many once the caller is done with the files"""
+        for path in paths:
+            if path and self._pinned[path] > 1:
+                self._pinned[path] -= 1
+            else:
+                self._pinned.pop(path, None)
+
+    async def fetch(self, file_id):
+        """
+        Return a local path for a Drive file, downloading only if it changed
+
+        The file stays pinned (never evicted) until the caller passes the path to release().
+
+        Returns:
+            str path, or None if the file could not be fetched or failed verification
+        """
+        try:
+            meta = await self.transfer.metadata(file_id)
+        except Exception as e:
+            log.warning("Drive metadata lookup failed for %s: %s", file_id, e)
+            return None
+
+        # Native Google files have no md5Checksum; fall back to modifiedTime as the version
+        md5 = meta.get('md5Checksum')
+        version = md5 or hashlib.md5(meta.get('modifiedTime', '').encode()).hexdigest()
+        path = self._path(file_id, version)
+
+        # Pinned files are never evicted while the carousel they belong to is being assembled
+        self._pinned[path] += 1
+        try:
+            found = await self._fetch_version(file_id, path, md5)
+        except BaseException:
+            self.release([path])
+            raise
+        if found is None:
+            self.release([path])
+        return found
+
+    async def _fetch_version(self, file_id, path, md5):
+        if os.path.exists(path):
+            if await asyncio.to_thread(self._verify, path, md5):
+                os.utime(path)  # mark as recently used
+                self.hits += 1
+                return path
+            log.warning("Cached asset %s failed integrity check, re-downloading", file_id)
+            os.remove(path)
+
+        self.misses += 1
+        if not await self.transfer.download(file_id, path):
+            return None
+
+        if not await asyncio.to_thread(self._verify, path, md5):
+            log.error("Downloaded asset %s does not match its md5Checksum", file_id)
+            os.remove(path)
+            return None
+
+        self._drop_old_versions(file_id, path)
+        self._evict()
+        return path
+
+    async def fetch_many(self, file_ids):
+        """Fetch several files in parallel; returns paths (or None) in the same order, pinned until released"""
+        results = await asyncio.gather(*(self.fetch(file_id) for file_id in file_ids), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            self.release([result for result in results if isinstance(result, str)])
+            raise errors[0]
+        return results
@@ -0,0 +1 @@
+"""Benchmarks against in-process fakes; see benchmarks/run.py"""
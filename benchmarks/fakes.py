@@ -0,0 +1,411 @@
+"""
+In-process stand-ins for Google Sheets, Google Drive and Gemini
+Every call sleeps for a seeded, configurable latency, can fail with a quota error, and is recorded
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+
+from drive_transfer import DriveTransfer
+
+A1_PATTERN = re.compile(r"^(?:'[^']*'!)?([A-Z]+)(\d*)(?::([A-Z]+)(\d*))?$")
+
+
+class QuotaError(Exception):
+    """Raised by a fake the way the real API answers 429 RESOURCE_EXHAUSTED"""
+
+    code = 429
+
+
+class Recorder:
+    """Per-operation latencies and error counts, shared by all fakes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latencies = defaultdict(list)
+            self.errors = defaultdict(int)
+            self.quota_errors = defaultdict(int)
+
+    def record(self, op, seconds, error=None):
+        with self._lock:
+            self.latencies[op].append(seconds)
+            if error is not None:
+                self.errors[op] += 1
+                if isinstance(error, QuotaError):
+                    self.quota_errors[op] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                op: {
+                    'calls': len(samples),
+                    'errors': self.errors[op],
+                    'quota_errors': self.quota_errors[op],
+                    'latencies': list(samples)
+                }
+                for op, samples in self.latencies.items()
+            }
+
+
+class Service:
+    """Latency and quota-error model for one backend"""
+
+    def __init__(self, name, recorder, latency=0.05, jitter=0.2, quota_rate=0.0, seed=0):
+        """
+        Args:
+            latency: mean seconds per call
+            jitter: +/- fraction of latency drawn uniformly per call
+            quota_rate: probability that a call fails with QuotaError
+            seed: makes the latency and error sequence reproducible
+        """
+        self.name = name
+        self.recorder = recorder
+        self.latency = latency
+        self.jitter = jitter
+        self.quota_rate = quota_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self, scale=1.0):
+        with self._lock:
+            delay = self.latency * scale * (1 + self._rng.uniform(-self.jitter, self.jitter))
+            fails = self._rng.random() < self.quota_rate
+        return max(delay, 0.0), fails
+
+    def call(self, op, func, scale=1.0):
+        """Run a blocking fake call (Sheets, Drive run on worker threads)"""
+        delay, fails = self._draw(scale)
+        started = time.perf_counter()
+        time.sleep(delay)
+        error = QuotaError(f"{self.name} quota exceeded") if fails else None
+        self.recorder.record(f"{self.name}.{op}", time.perf_counter() - started, error)
+        if error:
+            raise error
+        return func()
+
+    async def acall(self, op, func, scale=1.0):
+        """Run an async fake call (Gemini is awaited on the loop)"""
+        delay, fails = self._draw(scale)
+        started = time.perf_counter()
+        await asyncio.sleep(delay)
+        error = QuotaError(f"{self.name} quota exceeded") if fails else None
+        self.recorder.record(f"{self.name}.{op}", time.perf_counter() - started, error)
+        if error:
+            raise error
+        return func()
+
+
+# ---- SHEETS ----
+
+def column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+class FakeWorksheet:
+    """The gspread Worksheet methods SheetGateway calls, backed by a list of rows"""
+
+    _ids = iter(range(1, 1000000))
+
+    def __init__(self, title, rows, service):
+        self.id = next(self._ids)
+        self.title = title
+        self.rows = [list(row) for row in rows]
+        self.service = service
+        self._lock = threading.Lock()
+
+    def _parse(self, a1_range):
+        match = A1_PATTERN.match(a1_range)
+        if not match:
+            raise ValueError(f"Bad range {a1_range}")
+        first_col, first_row, last_col, last_row = match.groups()
+        first_row = int(first_row) if first_row else 1
+        last_col = last_col or first_col
+        if last_row:
+            last_row = int(last_row)
+        elif match.group(3):
+            last_row = len(self.rows)   # open-ended range such as A12:G
+        else:
+            last_row = first_row
+        return column_index(first_col), first_row, column_index(last_col), last_row
+
+    def _read(self, a1_range):
+        first_col, first_row, last_col, last_row = self._parse(a1_range)
+        with self._lock:
+            block = [row[first_col:last_col + 1] for row in self.rows[first_row - 1:last_row]]
+        # Sheets drops trailing empty cells and rows
+        block = [row[:max((i + 1 for i, v in enumerate(row) if v != ''), default=0)] for row in block]
+        while block and not block[-1]:
+            block.pop()
+        return block
+
+    def _write(self, a1_range, values):
+        first_col, first_row, _, _ = self._parse(a1_range)
+        with self._lock:
+            for r, row_values in enumerate(values):
+                row_num = first_row + r
+                while len(self.rows) < row_num:
+                    self.rows.append([])
+                row = self.rows[row_num - 1]
+                for c, value in enumerate(row_values):
+                    while len(row) <= first_col + c:
+                        row.append('')
+                    row[first_col + c] = value
+
+    def get_all_values(self):
+        def read():
+            with self._lock:
+                return [list(row) for row in self.rows]
+        # Full reads cost more the bigger the sheet is
+        return self.service.call('get_all_values', read, scale=1 + len(self.rows) / 5000)
+
+    def get(self, range_name):
+        return self.service.call('get', lambda: self._read(range_name))
+
+    def append_row(self, values, **kwargs):
+        def append():
+            with self._lock:
+                self.rows.append(list(values))
+                row_num = len(self.rows)
+            last = column_letter(max(len(values) - 1, 0))
+            return {'updates': {'updatedRange': f"'{self.title}'!A{row_num}:{last}{row_num}"}}
+        return self.service.call('append_row', append)
+
+    def update(self, values=None, range_name=None, **kwargs):
+        return self.service.call('update', lambda: self._write(range_name, values))
+
+    def batch_update(self, data, **kwargs):
+        def write():
+            for entry in data:
+                self._write(entry['range'], entry['values'])
+            return {'totalUpdatedCells': sum(len(row) for e in data for row in e['values'])}
+        return self.service.call('batch_update', write, scale=1 + len(data) / 500)
+
+
+# ---- DRIVE ----
+
+class _HttpResponse(dict):
+    def __init__(self, status, headers):
+        super().__init__(headers)
+        self.status = status
+
+
+class _FakeMediaHttp:
+    """Answers MediaIoBaseDownload's ranged GETs from the fake file store"""
+
+    def __init__(self, files):
+        self.files = files
+
+    def request(self, uri, method="GET", headers=None, **kwargs):
+        data = self.files.blobs[uri.rsplit('/', 1)[1]]
+        start, end = (int(part) for part in headers['range'].split('=')[1].split('-'))
+        chunk = self.files.service.call('get_media_chunk', lambda: data[start:end + 1])
+        return _HttpResponse(206, {
+            'content-range': f"bytes {start}-{start + len(chunk) - 1}/{len(data)}"
+        }), chunk
+
+
+class _Request:
+    def __init__(self, execute):
+        self._execute = execute
+
+    def execute(self, **kwargs):
+        return self._execute()
+
+
+class _MediaRequest:
+    def __init__(self, files, file_id):
+        self.uri = f"fake://drive/{file_id}"
+        self.headers = {}
+        self.http = _FakeMediaHttp(files)
+
+
+class _UploadRequest:
+    def __init__(self, files, body, media_body):
+        self.files = files
+        self.body = body
+        self.media = media_body
+        self.progress = 0
+        self.data = b''
+
+    def next_chunk(self, **kwargs):
+        size = self.media.size()
+        length = min(self.media.chunksize(), size - self.progress)
+        self.data += self.files.service.call(
+            'upload_chunk', lambda: self.media.getbytes(self.progress, length)
+        )
+        self.progress += length
+        if self.progress < size:
+            return None, None
+        return None, {'id': self.files.store(self.body.get('name', 'upload'), self.data)}
+
+
+class FakeDriveFiles:
+    """The files() resource: create, get, get_media"""
+
+    def __init__(self, service):
+        self.service = service
+        self.blobs = {}
+        self.meta = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def store(self, name, data):
+        with self._lock:
+            self._next_id += 1
+            file_id = f"fake{self._next_id:06d}"
+        self.blobs[file_id] = data
+        self.meta[file_id] = {
+            'id': file_id,
+            'name': name,
+            'size': str(len(data)),
+            'md5Checksum': hashlib.md5(data).hexdigest(),
+            'modifiedTime': '2026-01-01T00:00:00.000Z'
+        }
+        return file_id
+
+    def create(self, body=None, media_body=None, fields=None):
+        return _UploadRequest(self, body or {}, media_body)
+
+    def get(self, fileId=None, fields=None):
+        return _Request(lambda: self.service.call('get_metadata', lambda: dict(self.meta[fileId])))
+
+    def get_media(self, fileId=None):
+        return _MediaRequest(self, fileId)
+
+
+class FakeDriveService:
+    def __init__(self, files):
+        self._files = files
+
+    def files(self):
+        return self._files
+
+
+class FakeDriveTransfer(DriveTransfer):
+    """DriveTransfer with its Drive service swapped for the fake; threads, chunking and caching are real"""
+
+    def __init__(self, files, **kwargs):
+        super().__init__(credentials=None, **kwargs)
+        self.fake_service = FakeDriveService(files)
+
+    def _service(self):
+        return self.fake_service
+
+
+# ---- GEMINI ----
+
+class _Text:
+    def __init__(self, text):
+        self.text = text
+
+
+class _Embedding:
+    def __init__(self, values):
+        self.values = values
+
+
+class _Embeddings:
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+
+CATEGORIES = ['work_log', 'insight', 'failure', 'idea', 'misc']
+
+
+def stable_choice(text, options):
+    """Same input, same pick, across runs and processes"""
+    digest = hashlib.md5(text.encode('utf-8')).digest()
+    return options[digest[0] % len(options)]
+
+
+class FakeModels:
+    """The async client.aio.models surface: generate_content, generate_content_stream, embed_content"""
+
+    def __init__(self, service, tokens_per_second=200, chunk_tokens=12):
+        self.service = service
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = chunk_tokens
+
+    def _answer(self, prompt):
+        # Classification prompts carry their inputs as JSON; answer one result per id
+        if 'Inputs (JSON):' in prompt:
+            inputs = json.loads(prompt.split('Inputs (JSON):', 1)[1].split('Respond with', 1)[0])
+            return json.dumps([
+                {
+                    'id': item['id'],
+                    'category': stable_choice(item['text'], CATEGORIES),
+                    'context': stable_choice(item['text'][::-1], ['YES', 'NO'])
+                }
+                for item in inputs
+            ])
+        if 'carousel' in prompt.lower().split('\n', 1)[0]:
+            return "\n".join(
+                f"SLIDE {i}: Benchmark slide {i} sentence about the work that was done this week."
+                for i in range(1, 8)
+            )
+        return "\n".join(f"Line {i} of a benchmark text post about shipping work." for i in range(1, 9))
+
+    async def generate_content(self, model=None, contents=None, config=None):
+        answer = self._answer(contents)
+        generation = len(answer) / 4 / self.tokens_per_second
+        return await self.service.acall(
+            'generate_content', lambda: _Text(answer),
+            scale=1 + generation / max(self.service.latency, 1e-6)
+        )
+
+    async def generate_content_stream(self, model=None, contents=None, config=None):
+        answer = self._answer(contents)
+        # First token after the base latency, then chunks at the generation rate
+        await self.service.acall('generate_content_stream', lambda: None)
+        chunk_chars = self.chunk_tokens * 4
+
+        async def chunks():
+            for start in range(0, len(answer), chunk_chars):
+                await asyncio.sleep(self.chunk_tokens / self.tokens_per_second)
+                yield _Text(answer[start:start + chunk_chars])
+        return chunks()
+
+    async def embed_content(self, model=None, contents=None, config=None):
+        dim = (config or {}).get('output_dimensionality', 768)
+
+        def embed():
+            vectors = []
+            for text in contents:
+                rng = random.Random(hashlib.md5(text.encode('utf-8')).hexdigest())
+                vectors.append(_Embedding([rng.gauss(0, 1) for _ in range(dim)]))
+            return _Embeddings(vectors)
+        return await self.service.acall('embed_content', embed)
+
+
+class _Aio:
+    def __init__(self, models):
+        self.models = models
+
+
+class FakeGeminiClient:
+    """Stands in for genai.Client; only the async surface the bot uses"""
+
+    def __init__(self, service, **kwargs):
+        self.aio = _Aio(FakeModels(service, **kwargs))
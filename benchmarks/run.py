@@ -0,0 +1,458 @@
+"""
+Benchmark harness
+Runs the bot's real handlers (classify_memories, the nightly incremental run, /draft, /status, download_visuals, post_carousel)
+against the in-process fakes and writes a JSON report that can be compared across commits
+
+    python -m benchmarks.run --memories 10000 --content-rows 500 --output bench.json
+    python -m benchmarks.run --compare bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from benchmarks.fakes import (  # noqa: E402
+    FakeDriveFiles, FakeDriveTransfer, FakeGeminiClient, FakeWorksheet, Recorder, Service, CATEGORIES
+)
+
+COMPOSER_HTML = os.path.join(REPO, 'benchmarks', 'linkedin_composer.html')
+
+SCENARIOS = ['classify', 'nightly', 'status', 'draft', 'visuals', 'post']
+
+SUBJECTS = ['Fixed', 'Debugged', 'Shipped', 'Refactored', 'Benchmarked', 'Reviewed', 'Planned', 'Broke']
+OBJECTS = [
+    'the deploy pipeline', 'the Sheets sync', 'a Gemini prompt', 'the carousel renderer',
+    'LinkedIn session handling', 'the job queue', 'an onboarding flow', 'the billing webhook'
+]
+DETAILS = [
+    'after a timeout in production', 'with a smaller batch size', 'because retries piled up',
+    'and cut latency in half', 'but the cache key was wrong', 'for the Friday release'
+]
+
+BRAIN_HEADER = ['Timestamp', 'Source', 'Content', 'Memory Type', 'Context', 'Used', 'Notes']
+CONTENT_HEADER = [
+    'Timestamp', 'Post Type', 'Content/Hook', 'Slide 2', 'Slide 3',
+    'Slide 4', 'Slide 5', 'Slide 6', 'Slide 7', 'Status', 'Source Rows',
+    'State', 'Design Intent', 'Required Assets', 'Asset Links',
+    'Visual Links', 'Scheduled Time', 'Posted Time', 'Posting Status', 'Error Log'
+]
+
+
+# ---- DATA ----
+
+def make_brain_rows(count, unclassified, rng, now):
+    rows = [BRAIN_HEADER]
+    for i in range(count):
+        timestamp = now - timedelta(minutes=rng.randrange(60 * 24 * 60))
+        text = f"{rng.choice(SUBJECTS)} {rng.choice(OBJECTS)} {rng.choice(DETAILS)} (#{i})"
+        if rng.random() < unclassified:
+            rows.append([timestamp.isoformat(), 'Discord DM', text, '', '', 'NO', ''])
+        else:
+            rows.append([
+                timestamp.isoformat(), 'Discord DM', text,
+                rng.choice(CATEGORIES), 'YES', rng.choice(['YES', 'NO']), ''
+            ])
+    return rows
+
+
+def make_content_rows(count, files, slide_bytes, rng, now):
+    states = ['CONTENT_READY', 'ASSETS_REQUIRED', 'VISUALS_READY', 'SCHEDULED', 'POSTED', 'FAILED']
+    rows = [CONTENT_HEADER]
+    for i in range(count):
+        state = rng.choice(states)
+        visual_links = ''
+        if state in ('VISUALS_READY', 'SCHEDULED', 'POSTED'):
+            file_ids = [files.store(f"row{i}-slide{n}.png", rng.randbytes(slide_bytes)) for n in range(7)]
+            visual_links = ', '.join(f"https://drive.google.com/file/d/{f}/view" for f in file_ids)
+        scheduled = (now + timedelta(days=rng.randrange(1, 30))).isoformat() if state == 'SCHEDULED' else ''
+        rows.append([
+            (now - timedelta(days=rng.randrange(90))).isoformat(), 'carousel',
+            f"Hook for benchmark post {i}", 'Slide 2', 'Slide 3', 'Slide 4', 'Slide 5', 'Slide 6', 'Slide 7',
+            'APPROVED', '2,3,4', state, '', '', '', visual_links, scheduled, '', '', ''
+        ])
+    return rows
+
+
+# ---- DISCORD STAND-INS ----
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+        self.sent_at = time.perf_counter()
+        self.edited_at = []
+
+    async def edit(self, content):
+        self.content = content
+        self.edited_at.append(time.perf_counter())
+
+
+class FakeContext:
+    """Enough of a commands.Context for the DM commands"""
+
+    def __init__(self, discord_module):
+        self.author = SimpleNamespace(id=1)
+        # Commands only check isinstance(ctx.channel, discord.DMChannel)
+        self.channel = discord_module.DMChannel.__new__(discord_module.DMChannel)
+        self.sent = []
+
+    async def send(self, content):
+        message = FakeMessage(content)
+        self.sent.append(message)
+        return message
+
+
+# ---- REPORTING ----
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples):
+    return {
+        'count': len(samples),
+        'p50': percentile(samples, 50),
+        'p95': percentile(samples, 95),
+        'max': max(samples) if samples else None,
+        'mean': statistics.fmean(samples) if samples else None
+    }
+
+
+def summarize_ops(snapshot):
+    return {
+        op: dict(summarize(data['latencies']), errors=data['errors'], quota_errors=data['quota_errors'],
+                 total_seconds=sum(data['latencies']))
+        for op, data in sorted(snapshot.items())
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+# ---- SCENARIOS ----
+
+class Bench:
+    def __init__(self, args, workdir):
+        self.args = args
+        self.workdir = workdir
+        self.rng = random.Random(args.seed)
+        self.recorder = Recorder()
+        self.sheets_service = Service('sheets', self.recorder, args.sheets_latency,
+                                      quota_rate=args.quota_rate, seed=args.seed)
+        self.drive_service = Service('drive', self.recorder, args.drive_latency,
+                                     quota_rate=args.quota_rate, seed=args.seed + 1)
+        self.gemini_service = Service('gemini', self.recorder, args.gemini_latency,
+                                      quota_rate=args.quota_rate, seed=args.seed + 2)
+        self.linkedin_service = Service('linkedin', self.recorder, args.linkedin_latency,
+                                        quota_rate=0.0, seed=args.seed + 3)
+        self.files = FakeDriveFiles(self.drive_service)
+        self.main = None
+
+    @contextmanager
+    def without_quota_errors(self):
+        """Startup is not what --quota-rate measures; one 429 there would abort every scenario"""
+        services = (self.sheets_service, self.drive_service, self.gemini_service)
+        rates = [service.quota_rate for service in services]
+        for service in services:
+            service.quota_rate = 0.0
+        try:
+            yield
+        finally:
+            for service, rate in zip(services, rates):
+                service.quota_rate = rate
+
+    async def setup(self):
+        now = datetime.now(timezone.utc)
+        brain = self.brain = FakeWorksheet('LinCon_Brain', make_brain_rows(
+            self.args.memories, self.args.unclassified, self.rng, now), self.sheets_service)
+        content = FakeWorksheet('LinCon_Content', make_content_rows(
+            self.args.content_rows, self.files, self.args.slide_kb * 1024, self.rng, now), self.sheets_service)
+
+        os.environ.setdefault("MEMORY_EMBEDDINGS", "hashing")
+        import main  # state files (caches, queues, index) land in the temp working directory
+        self.main = main
+
+        async def fake_creds():
+            return None
+
+        async def fake_gemini():
+            main.client_gemini = FakeGeminiClient(self.gemini_service)
+            main.memory_classifier.client = main.client_gemini
+            return main.client_gemini
+
+        async def fake_drive():
+            from asset_cache import AssetCache
+            main.drive_transfer = FakeDriveTransfer(self.files, workers=7, metrics=main.metrics)
+            main.asset_cache = AssetCache(main.drive_transfer, os.path.join(self.workdir, 'assets'))
+            return main.drive_transfer
+
+        main.open_worksheets = lambda: (brain, content)
+        main.startup.add('google_creds', fake_creds)
+        main.startup.add('gemini', fake_gemini)
+        main.startup.add('drive', fake_drive)
+
+        started = time.perf_counter()
+        with self.without_quota_errors():
+            main.startup.start()
+            await main.startup.wait(*main.startup.components)
+        return {
+            'wall_seconds': time.perf_counter() - started,
+            'components': {name: seconds for name, (_, seconds, _) in main.startup.report().items()}
+        }
+
+    async def classify(self):
+        started = time.perf_counter()
+        classified = await self.main.classify_memories(fresh=True)
+        wall = time.perf_counter() - started
+        return {'wall_seconds': wall, 'items': classified, 'items_per_second': classified / wall if wall else None}
+
+    async def nightly(self):
+        """A day's new DMs on top of an already classified sheet; should read only the new rows"""
+        main = self.main
+        if not main.classification_cursor.row:
+            await main.classify_memories(fresh=True)
+            self.recorder.reset()
+
+        new_rows = make_brain_rows(self.args.new_memories, 1.0, self.rng, datetime.now(timezone.utc))[1:]
+        self.brain.rows.extend(new_rows)
+
+        started = time.perf_counter()
+        classified = await main.classify_memories(fresh=True)
+        wall = time.perf_counter() - started
+        return {'wall_seconds': wall, 'items': classified, 'items_per_second': classified / wall if wall else None}
+
+    async def status(self):
+        main = self.main
+        cold, warm = [], []
+        for run in range(self.args.runs):
+            ctx = FakeContext(main.discord)
+            if run % 5 == 0:
+                # Every fifth run forces both mirrors to reload from the sheet
+                main.brain_cache.full_loaded_at = main.content_cache.full_loaded_at = float('-inf')
+            started = time.perf_counter()
+            await main.status.callback(ctx)
+            (cold if run % 5 == 0 else warm).append(time.perf_counter() - started)
+        return {'cold': summarize(cold), 'warm': summarize(warm)}
+
+    async def draft(self):
+        main = self.main
+        totals, first_token = [], []
+        for run in range(self.args.runs):
+            ctx = FakeContext(main.discord)
+            started = time.perf_counter()
+            await main.draft.callback(ctx, 'carousel' if run % 2 else 'text', 'fresh')
+            totals.append(time.perf_counter() - started)
+            live = ctx.sent[0]
+            if live.edited_at:
+                first_token.append(live.edited_at[0] - started)
+        return {'total': summarize(totals), 'time_to_first_edit': summarize(first_token)}
+
+    async def visuals(self):
+        main = self.main
+        await main.content_cache.ensure_fresh()
+        rows = [row for _, row in main.content_cache.rows_where(11, 'VISUALS_READY')][:self.args.runs]
+        cold, warm = [], []
+        failures = 0
+        for row in rows:
+            links = [link.strip() for link in row[15].split(',') if link.strip()]
+            for samples in (cold, warm):
+                started = time.perf_counter()
+                try:
+                    paths = await main.download_visuals(links)
+                except RuntimeError as e:
+                    failures += 1
+                    print(f"visuals: {e}")
+                    continue
+                samples.append(time.perf_counter() - started)
+                main.asset_cache.release(paths)
+        return {
+            'cold': summarize(cold), 'warm': summarize(warm), 'failures': failures,
+            'cache_hits': main.asset_cache.hits, 'cache_misses': main.asset_cache.misses
+        }
+
+    async def post(self):
+        try:
+            from linkedin_poster import LinkedInPoster
+            poster = LinkedInPoster(accounts={'bench': os.path.join(self.workdir, 'bench_session.json')},
+                                    pages_per_account=1)
+            await poster.init_browser()
+        except Exception as e:
+            return {'skipped': f"Playwright unavailable: {str(e).splitlines()[0]}"}
+
+        with open(COMPOSER_HTML) as fh:
+            composer = fh.read()
+
+        async def serve(route):
+            if '/dms-uploads/' in route.request.url:
+                await self.linkedin_service.acall('upload', lambda: None)
+                await route.fulfill(status=201, body='')
+            else:
+                await route.fulfill(status=200, content_type='text/html', body=composer)
+
+        try:
+            slot = poster._slot('bench')
+            context = await poster._ensure_context(slot)
+            # Registered after the poster's blocking route, so it answers linkedin.com first
+            await context.route('https://www.linkedin.com/**', serve)
+
+            image_paths = []
+            for n in range(7):
+                path = os.path.join(self.workdir, f"slide{n}.png")
+                with open(path, 'wb') as fh:
+                    fh.write(self.rng.randbytes(self.args.slide_kb * 1024))
+                image_paths.append(path)
+
+            totals, failures, steps = [], 0, {}
+            for _ in range(self.args.runs):
+                started = time.perf_counter()
+                result = await poster.post_carousel("Benchmark caption", image_paths, account='bench')
+                totals.append(time.perf_counter() - started)
+                failures += not result['success']
+                for timing in result['timings']:
+                    steps.setdefault(timing['step'], []).append(timing['seconds'])
+            return {
+                'total': summarize(totals),
+                'failures': failures,
+                'steps': {step: summarize(samples) for step, samples in steps.items()}
+            }
+        finally:
+            if poster.browser:
+                await poster.browser.close()
+            if poster.playwright:
+                await poster.playwright.stop()
+
+
+async def run(args):
+    workdir = tempfile.mkdtemp(prefix='lincon_bench_')
+    os.chdir(workdir)
+    bench = Bench(args, workdir)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'started': datetime.now(timezone.utc).isoformat(),
+            'args': vars(args)
+        },
+        'startup': await bench.setup(),
+        'scenarios': {}
+    }
+
+    for name in args.scenarios:
+        bench.recorder.reset()
+        print(f"Running {name}...")
+        try:
+            result = await getattr(bench, name)()
+        except Exception as e:
+            # Injected quota errors can fail a scenario; report it and keep running the rest
+            result = {'error': f"{e.__class__.__name__}: {e}"}
+        result['ops'] = summarize_ops(bench.recorder.snapshot())
+        report['scenarios'][name] = result
+
+    bench.main.sheets.close()
+    return report
+
+
+# ---- OUTPUT ----
+
+def fmt(seconds):
+    return '-' if seconds is None else f"{seconds * 1000:.1f}ms"
+
+
+def headline(result):
+    """The one latency that best describes a scenario"""
+    for key in ('total', 'cold'):
+        if key in result:
+            return result[key]['p95']
+    return result.get('wall_seconds')
+
+
+def print_report(report, baseline=None):
+    print(f"\nCommit {report['meta']['commit']}  startup {fmt(report['startup']['wall_seconds'])}")
+    for name, result in report['scenarios'].items():
+        if 'skipped' in result:
+            print(f"\n{name}: skipped ({result['skipped']})")
+            continue
+
+        if 'error' in result:
+            line = f"\n{name}: failed ({result['error']})"
+        else:
+            line = f"\n{name}: {fmt(headline(result))}"
+        if result.get('failures'):
+            line += f"  ({result['failures']} failed)"
+        if 'items_per_second' in result and result['items_per_second']:
+            line += f"  ({result['items']} items, {result['items_per_second']:.1f}/s)"
+        previous = baseline['scenarios'].get(name, {}) if baseline else {}
+        if headline(result) and 'skipped' not in previous and 'error' not in previous:
+            before = headline(previous) if previous else None
+            if before:
+                line += f"  [{(headline(result) - before) / before * 100:+.1f}% vs {baseline['meta']['commit']}]"
+        print(line)
+
+        for op, stats in result['ops'].items():
+            errors = f"  errors {stats['errors']} (quota {stats['quota_errors']})" if stats['errors'] else ""
+            print(f"  {op:<34} {stats['count']:>6} calls  p50 {fmt(stats['p50']):>9}  "
+                  f"p95 {fmt(stats['p95']):>9}  total {stats['total_seconds']:.2f}s{errors}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--memories', type=int, default=10000)
+    parser.add_argument('--unclassified', type=float, default=0.3, help="fraction of memories without a type")
+    parser.add_argument('--new-memories', type=int, default=50, help="rows added before the nightly run")
+    parser.add_argument('--content-rows', type=int, default=500)
+    parser.add_argument('--slide-kb', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=10, help="repetitions for the per-command scenarios")
+    parser.add_argument('--sheets-latency', type=float, default=0.15)
+    parser.add_argument('--drive-latency', type=float, default=0.08)
+    parser.add_argument('--gemini-latency', type=float, default=0.6)
+    parser.add_argument('--linkedin-latency', type=float, default=0.3)
+    parser.add_argument('--quota-rate', type=float, default=0.0, help="probability any fake call fails with 429")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--scenarios', type=lambda s: s.split(','), default=SCENARIOS)
+    parser.add_argument('--output', help="write the JSON report here")
+    parser.add_argument('--compare', help="earlier JSON report to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+
+    report = asyncio.run(run(args))
+    print_report(report, baseline)
+
+    if output:
+        with open(output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nReport written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Batched memory classification with Gemini
+Packs many memories into one structured JSON prompt and runs several prompts concurrently
+"""
+
+import asyncio
+import json
+import logging
+
+from metrics import timer
+
+log = logging.getLogger(__name__)
+
+VALID_CATEGORIES = ['work_log', 'insight', 'failure', 'idea', 'misc']
+
+# Cache entries are stored per memory so unchanged rows hit regardless of how they were batched;
+# bump the version when BATCH_PROMPT changes meaning
+CACHE_CONFIG = {'task': 'classify', 'version': 1}
+
+BATCH_PROMPT = """Classify each user input below into EXACTLY ONE category.
+
+Categories:
+- work_log: Specific work tasks, what they built, code they wrote, meetings attended
+- insight: Learning, realization, understanding something new
+- failure: Mistakes, bugs, things that didn't work, lessons from failure
+- idea: Future plans, feature ideas, thoughts to explore
+- misc: Everything else
+
+Also determine for each input:
+- Does it have enough context to understand later? (YES/NO)
+- Context is missing if it references "this" "that" "the bug" without explaining what
+
+Rules:
+1. Do NOT rewrite the content
+2. Pick the MOST specific category that fits
+3. Return one result for every id, nothing else
+
+Inputs (JSON):
+{inputs}
+
+Respond with a JSON array only:
+[{{"id": <id>, "category": "<category>", "context": "YES" or "NO"}}]"""
+
+
+class MemoryClassifier:
+    def __init__(self, client, model='gemini-2.5-flash', batch_size=25, concurrency=4, cache=None,
+                 metrics=None):
+        self.client = client
+        self.model = model
+        self.cache = cache
+        self.metrics = metrics
+        self.batch_size = batch_size
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    def _parse(self, text, ids):
+        """Map a JSON response back to {id: (category, context)}, ignoring unknown ids"""
+        results = {}
+        for item in json.loads(text):
+            try:
+                row_id = int(item['id'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if row_id not in ids:
+                continue
+
+            category = str(item.get('category', '')).strip().lower()
+            if category not in VALID_CATEGORIES:
+                category = 'misc'
+
+            context = str(item.get('context', '')).strip().upper()
+            if context not in ['YES', 'NO']:
+                context = 'NO'
+
+            results[row_id] = (category, context)
+        return results
+
+    async def _classify_batch(self, batch):
+        inputs = json.dumps(
+            [{'id': m['row_num'], 'text': m['content']} for m in batch],
+            ensure_ascii=False
+        )
+        async with self.semaphore:
+            with timer(self.metrics, 'gemini.generate_content'):
+                response = await self.client.aio.models.generate_content(
+                    model=self.model,
+                    contents=BATCH_PROMPT.format(inputs=inputs),
+                    config={'response_mime_type': 'application/json'}
+                )
+        results = self._parse(response.text, {m['row_num'] for m in batch})
+
+        if self.cache:
+            await asyncio.to_thread(self.cache.put_many, self.model, {
+                memory['content']: json.dumps(results[memory['row_num']])
+                for memory in batch if memory['row_num'] in results
+            }, CACHE_CONFIG)
+        return results
+
+    async def _run_batch(self, batch):
+        """Classify one batch, reporting its size alongside the results"""
+        try:
+            return len(batch), await self._classify_batch(batch)
+        except Exception as e:
+            log.warning("Classification batch of %d failed: %s", len(batch), e)
+            return len(batch), {}
+
+    async def _cached(self, memories):
+        """{content: (category, context)} for memories with a cached result, in one lookup"""
+        if not self.cache or not memories:
+            return {}
+        cached = await asyncio.to_thread(
+            self.cache.get_many, self.model, [m['content'] for m in memories], CACHE_CONFIG
+        )
+        return {content: tuple(json.loads(value)) for content, value in cached.items()}
+
+    async def classify(self, memories, on_progress=None, bypass_cache=False):
+        """
+        Classify memories in concurrent batches
+
+        Args:
+            memories: list of {'row_num': int, 'content': str}
+            on_progress: optional coroutine called as on_progress(processed, total)
+                after each batch finishes
+            bypass_cache: re-ask the model even for memories with a cached result
+
+        Returns:
+            dict: {row_num: (category, context)}; rows from failed batches are left out
+                so the next run picks them up again
+        """
+        results = {}
+        pending = []
+        cached = {} if bypass_cache else await self._cached(memories)
+        for memory in memories:
+            if memory['content'] in cached:
+                results[memory['row_num']] = cached[memory['content']]
+            else:
+                pending.append(memory)
+
+        batches = [
+            pending[i:i + self.batch_size]
+            for i in range(0, len(pending), self.batch_size)
+        ]
+        processed = len(results)
+
+        for finished in asyncio.as_completed([self._run_batch(b) for b in batches]):
+            size, batch_results = await finished
+            results.update(batch_results)
+            processed += size
+            if on_progress:
+                # A failed progress edit (deleted message, rate limit) must not lose finished batches
+                try:
+                    await on_progress(processed, len(memories))
+                except Exception as e:
+                    log.warning("Classification progress callback failed: %s", e)
+
+        return results
@@ -0,0 +1,58 @@
+"""
+Persisted high-water mark for nightly classification
+Remembers how far down LinCon_Brain has been classified, plus rows that still need another pass,
+so each run only reads the rows added since the last one
+"""
+
+import json
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+
+class ClassificationCursor:
+    def __init__(self, path="classify_cursor.json"):
+        """
+        Args:
+            path: JSON file holding the cursor between restarts
+        """
+        self.path = path
+        self.row = 0            # last sheet row examined; 0 means nothing has been scanned yet
+        self.timestamp = None   # column A of that row, used to notice rows deleted above it
+        self.dirty = set()      # rows at or above the cursor that still need classifying
+
+    def load(self):
+        """Load the cursor from disk; a missing or unreadable file starts from a full scan"""
+        try:
+            with open(self.path) as fh:
+                state = json.load(fh)
+            self.row = int(state['row'])
+            self.timestamp = state.get('timestamp')
+            self.dirty = set(state.get('dirty', []))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.info("Classification cursor not loaded (%s), next run scans the whole sheet", e)
+            self.reset()
+            return False
+        return True
+
+    def save(self):
+        # Write a side file and swap it in, so a crash never leaves a half-written cursor
+        with open(f"{self.path}.tmp", 'w') as fh:
+            json.dump({'row': self.row, 'timestamp': self.timestamp, 'dirty': sorted(self.dirty)}, fh)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def reset(self):
+        self.row = 0
+        self.timestamp = None
+        self.dirty = set()
+
+    def advance(self, row_num, timestamp):
+        """Move the high-water mark to row_num, never backwards"""
+        if row_num >= self.row:
+            self.row = row_num
+            self.timestamp = timestamp
+
+    def matches(self, row):
+        """True when the row now at the cursor is the one recorded there"""
+        return bool(row) and row[0] == self.timestamp
@@ -0,0 +1,113 @@
+"""
+Prompt context builder for /draft
+Scores memories by recency, type and relevance, then packs the best into a fixed token budget
+"""
+
+import math
+import re
+from datetime import datetime, timezone
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+DEFAULT_TYPE_WEIGHTS = {'failure': 1.2, 'insight': 1.0, 'idea': 0.8}
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English)"""
+    return max(1, math.ceil(len(text) / 4))
+
+
+def word_overlap(a, b):
+    """Jaccard similarity of the word sets of two texts"""
+    words_a = set(WORD_PATTERN.findall(a.lower()))
+    words_b = set(WORD_PATTERN.findall(b.lower()))
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+class ContextBuilder:
+    def __init__(self, budget=1500, half_life_days=3, type_weights=None,
+                 relevance_weight=1.0, redundancy_threshold=0.6, similarity=None):
+        """
+        Args:
+            budget: max tokens of memory text put in the prompt
+            half_life_days: age at which a memory's recency score halves
+            type_weights: multiplier per memory type
+            relevance_weight: how much similarity to the topic adds to the score
+            redundancy_threshold: memories this similar to one already picked are dropped
+            similarity: function(text_a, text_b) -> 0..1; defaults to word overlap
+        """
+        self.budget = budget
+        self.half_life_days = half_life_days
+        self.type_weights = type_weights or DEFAULT_TYPE_WEIGHTS
+        self.relevance_weight = relevance_weight
+        self.redundancy_threshold = redundancy_threshold
+        self.similarity = similarity or word_overlap
+
+    @staticmethod
+    def format(memory):
+        return f"[{memory['type'].upper()}] {memory['content']}"
+
+    def score(self, memory, topic=None, now=None):
+        """Recency decay x type weight, plus relevance to the topic when there is one"""
+        now = now or datetime.now(timezone.utc)
+        age_days = max((now - memory['timestamp']).total_seconds() / 86400, 0)
+        recency = 0.5 ** (age_days / self.half_life_days)
+
+        score = recency * self.type_weights.get(memory['type'], 1.0)
+
+        # A precomputed relevance (e.g. embedding similarity from the memory index) wins
+        relevance = memory.get('relevance')
+        if relevance is None and topic:
+            relevance = self.similarity(topic, memory['content'])
+        if relevance:
+            score += self.relevance_weight * relevance
+        return score
+
+    def build(self, memories, topic=None, now=None):
+        """
+        Pick memories for the prompt
+
+        Args:
+            memories: dicts with row_num, type, content and timestamp (aware datetime)
+
+        Returns:
+            dict with text, selected (memories in prompt order), dropped, tokens, budget
+        """
+        ranked = sorted(memories, key=lambda m: self.score(m, topic, now), reverse=True)
+
+        selected = []
+        dropped = []
+        tokens = 0
+        for memory in ranked:
+            cost = estimate_tokens(self.format(memory)) + 1  # +1 for the separator
+            if tokens + cost > self.budget:
+                dropped.append(memory)
+                continue
+            if any(self.similarity(memory['content'], kept['content']) >= self.redundancy_threshold
+                   for kept in selected):
+                dropped.append(memory)
+                continue
+            selected.append(memory)
+            tokens += cost
+
+        if not selected and ranked:
+            # Nothing fit whole: keep the best memory cut to the budget rather than draft from nothing
+            best = ranked[0]
+            room = (self.budget - 1) * 4 - len(self.format({**best, 'content': ''}))
+            best = {**best, 'content': best['content'][:max(room, 0)]}
+            dropped.remove(ranked[0])
+            selected.append(best)
+            tokens = estimate_tokens(self.format(best)) + 1
+
+        # Oldest first, so the prompt reads as a timeline
+        selected.sort(key=lambda m: m['timestamp'])
+
+        return {
+            'text': "\n\n".join(self.format(m) for m in selected),
+            'selected': selected,
+            'dropped': dropped,
+            'tokens': tokens,
+            'budget': self.budget
+        }
@@ -0,0 +1,149 @@
+"""
+Async Google Drive transfer engine
+Runs resumable uploads and chunked downloads on a worker pool so carousel slides move in parallel
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+from googleapiclient.discovery import build
+from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
+
+from metrics import timer
+
+log = logging.getLogger(__name__)
+
+
+class DriveTransfer:
+    def __init__(self, credentials, workers=4, chunk_size=4 * 1024 * 1024, stream_chunk_size=256 * 1024,
+                 metrics=None):
+        """
+        Args:
+            credentials: google-auth credentials with a Drive scope
+            workers: number of files transferred at the same time
+            chunk_size: bytes per resumable upload / download request
+                (Drive requires a multiple of 256 KiB)
+            stream_chunk_size: bytes read at a time when spooling a Discord attachment to disk
+            metrics: optional Metrics registry; every transfer is timed as drive.<operation>
+        """
+        self.credentials = credentials
+        self.chunk_size = chunk_size
+        self.stream_chunk_size = stream_chunk_size
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="drive")
+        self._local = threading.local()
+        self._http = None
+        self.metrics = metrics
+
+    def _service(self):
+        """googleapiclient services are not thread-safe, so each worker builds its own"""
+        if not hasattr(self._local, 'service'):
+            self._local.service = build('drive', 'v3', credentials=self.credentials, cache_discovery=False)
+        return self._local.service
+
+    async def _run(self, op, func, *args):
+        loop = asyncio.get_running_loop()
+        with timer(self.metrics, f"drive.{op}"):
+            return await loop.run_in_executor(self.executor, func, *args)
+
+    # ---- BLOCKING WORKERS ----
+
+    def _upload_file(self, path, filename, mimetype):
+        media = MediaFileUpload(path, mimetype=mimetype, chunksize=self.chunk_size, resumable=True)
+        request = self._service().files().create(
+            body={'name': filename},
+            media_body=media,
+            fields='id'
+        )
+
+        response = None
+        while response is None:
+            _, response = request.next_chunk()
+        return response.get('id')
+
+    def _download_file(self, file_id, local_path):
+        # Write to a side file so a failed download never leaves a truncated image behind
+        partial_path = f"{local_path}.part"
+        request = self._service().files().get_media(fileId=file_id)
+
+        try:
+            with open(partial_path, 'wb') as fh:
+                downloader = MediaIoBaseDownload(fh, request, chunksize=self.chunk_size)
+                done = False
+                while not done:
+                    _, done = downloader.next_chunk()
+        except Exception:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+
+        os.replace(partial_path, local_path)
+
+    def _metadata(self, file_id):
+        return self._service().files().get(
+            fileId=file_id,
+            fields='id,name,size,md5Checksum,modifiedTime'
+        ).execute()
+
+    # ---- UPLOADS ----
+
+    async def _spool_attachment(self, attachment):
+        """Stream a Discord attachment to a temp file without reading it fully into memory"""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession()
+
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(attachment.filename)[1])
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                async with self._http.get(attachment.url) as resp:
+                    resp.raise_for_status()
+                    async for chunk in resp.content.iter_chunked(self.stream_chunk_size):
+                        fh.write(chunk)
+        except Exception:
+            os.remove(path)
+            raise
+        return path
+
+    async def upload_attachment(self, attachment):
+        """Upload one Discord attachment and return its Drive file ID (None on failure)"""
+        path = None
+        try:
+            path = await self._spool_attachment(attachment)
+            return await self._run(
+                'upload', self._upload_file, path, attachment.filename,
+                attachment.content_type or 'image/png'
+            )
+        except Exception as e:
+            log.warning("Drive upload failed for %s: %s", attachment.filename, e)
+            return None
+        finally:
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    async def upload_attachments(self, attachments):
+        """Upload several attachments in parallel, keeping their order"""
+        return await asyncio.gather(*(self.upload_attachment(a) for a in attachments))
+
+    # ---- DOWNLOADS ----
+
+    async def metadata(self, file_id):
+        """Fetch size, md5Checksum and modifiedTime for a Drive file"""
+        return await self._run('metadata', self._metadata, file_id)
+
+    async def download(self, file_id, local_path):
+        """Download a Drive file straight to disk; returns True on success"""
+        try:
+            await self._run('download', self._download_file, file_id, local_path)
+            return True
+        except Exception as e:
+            log.warning("Drive download failed for %s: %s", file_id, e)
+            return False
+
+    async def close(self):
+        if self._http and not self._http.closed:
+            await self._http.close()
+        self.executor.shutdown(wait=False)
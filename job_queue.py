@@ -0,0 +1,274 @@
+"""
+Durable job queue backed by SQLite
+Jobs survive crashes and redeploys, retry with exponential backoff, and land in a dead-letter list
+"""
+
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import time
+from contextvars import ContextVar
+
+from log_config import correlation
+
+log = logging.getLogger(__name__)
+
+# Job states share their names with PostState so a job and its content row read the same
+PENDING = "READY_TO_POST"
+RUNNING = "RUNNING"
+DEAD = "FAILED"
+
+# The job whose handler is running in this task, for checkpoint()
+current_job = ContextVar('current_job', default=None)
+
+
+class NoRetry(RuntimeError):
+    """Raised by a handler when another attempt could repeat an irreversible step; the job is dead-lettered at once"""
+
+
+class JobQueue:
+    def __init__(self, path="jobs.sqlite", base_delay=30, max_delay=3600, poll_interval=1.0, metrics=None):
+        """
+        Args:
+            path: SQLite file holding the queue
+            base_delay: seconds before the first retry; doubles on every further attempt
+            max_delay: cap on the retry delay
+            poll_interval: how often idle workers look for due jobs
+            metrics: optional Metrics registry; outcomes are counted as jobs.finished,
+                jobs.retried and jobs.dead_lettered
+        """
+        self.path = path
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.metrics = metrics
+        self.handlers = {}
+        self.on_dead = None
+        self.workers = []
+        self._wakeup = asyncio.Event()
+        self._db = sqlite3.connect(path)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "key TEXT UNIQUE, kind TEXT, payload TEXT, state TEXT, "
+            "attempts INTEGER DEFAULT 0, max_attempts INTEGER, run_at REAL, "
+            "last_error TEXT, created_at REAL, updated_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_due ON jobs(state, run_at)")
+        self._db.commit()
+
+    def register(self, kind, handler):
+        """
+        Register the coroutine that runs jobs of this kind
+
+        The handler is called as handler(payload) and returns the job's final state
+        (e.g. PostState.SCHEDULED). Raising an exception schedules a retry, except NoRetry.
+        Handlers with side effects that must not repeat record them with checkpoint().
+        """
+        self.handlers[kind] = handler
+
+    # ---- ENQUEUE ----
+
+    def enqueue(self, kind, payload, key, run_at=None, max_attempts=5):
+        """
+        Add a job unless one with the same idempotency key is already queued or done
+
+        A dead-lettered job with the same key is reset and queued again.
+
+        Returns:
+            (job_id, created): created is False when an existing job was kept
+        """
+        now = time.time()
+        existing = self._db.execute("SELECT id, state FROM jobs WHERE key = ?", (key,)).fetchone()
+
+        if existing and existing['state'] != DEAD:
+            return existing['id'], False
+
+        if existing:
+            self._db.execute(
+                "UPDATE jobs SET kind = ?, payload = ?, state = ?, attempts = 0, max_attempts = ?, "
+                "run_at = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                (kind, json.dumps(payload), PENDING, max_attempts, run_at or now, now, existing['id'])
+            )
+            job_id = existing['id']
+        else:
+            job_id = self._db.execute(
+                "INSERT INTO jobs (key, kind, payload, state, max_attempts, run_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(payload), PENDING, max_attempts, run_at or now, now, now)
+            ).lastrowid
+        self._db.commit()
+        self._wakeup.set()
+        return job_id, True
+
+    def retry(self, job_id):
+        """Move a dead-lettered job back into the queue; someone decided to, so its checkpoints are cleared"""
+        row = self._db.execute("SELECT payload FROM jobs WHERE id = ? AND state = ?", (job_id, DEAD)).fetchone()
+        if row is None:
+            return False
+        payload = json.loads(row['payload'])
+        payload.pop('checkpoints', None)
+        updated = self._db.execute(
+            "UPDATE jobs SET state = ?, payload = ?, attempts = 0, run_at = ?, updated_at = ? WHERE id = ? AND state = ?",
+            (PENDING, json.dumps(payload), time.time(), time.time(), job_id, DEAD)
+        ).rowcount
+        self._db.commit()
+        self._wakeup.set()
+        return updated == 1
+
+    # ---- INSPECTION ----
+
+    def counts(self):
+        """{state: job count}"""
+        rows = self._db.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state").fetchall()
+        return {row['state']: row['n'] for row in rows}
+
+    def dead_letters(self, limit=20):
+        """Most recent jobs that ran out of attempts"""
+        rows = self._db.execute(
+            "SELECT id, key, kind, attempts, last_error, updated_at FROM jobs "
+            "WHERE state = ? ORDER BY updated_at DESC LIMIT ?",
+            (DEAD, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, job_id):
+        row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def checkpoint(self, **fields):
+        """
+        Record progress of the running job in its payload and commit right away
+
+        Fields are merged into payload['checkpoints']. A retry of the job is handed the
+        updated payload, so a handler can record an irreversible step (e.g. the post
+        went out) and skip it next time.
+        """
+        job = current_job.get()
+        if job is None:
+            raise RuntimeError("checkpoint() called outside a job handler")
+        payload = json.loads(job['payload'])
+        payload['checkpoints'] = {**payload.get('checkpoints', {}), **fields}
+        job['payload'] = json.dumps(payload)
+        self._db.execute(
+            "UPDATE jobs SET payload = ?, updated_at = ? WHERE id = ?",
+            (job['payload'], time.time(), job['id'])
+        )
+        self._db.commit()
+
+    # ---- WORKERS ----
+
+    def _claim(self):
+        """Atomically take the oldest due job; sqlite3 calls on one thread cannot interleave"""
+        now = time.time()
+        row = self._db.execute(
+            "SELECT * FROM jobs WHERE state = ? AND run_at <= ? ORDER BY run_at LIMIT 1",
+            (PENDING, now)
+        ).fetchone()
+        if row is None:
+            return None
+        self._db.execute(
+            "UPDATE jobs SET state = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+            (RUNNING, now, row['id'])
+        )
+        self._db.commit()
+        job = dict(row)
+        job['attempts'] += 1
+        return job
+
+    def _finish(self, job, state):
+        self._db.execute(
+            "UPDATE jobs SET state = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+            (state, time.time(), job['id'])
+        )
+        self._db.commit()
+
+    def _fail(self, job, error, retry=True):
+        """Schedule a retry with exponential backoff, or dead-letter the job"""
+        now = time.time()
+        if not retry or job['attempts'] >= job['max_attempts']:
+            self._db.execute(
+                "UPDATE jobs SET state = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                (DEAD, error, now, job['id'])
+            )
+            self._db.commit()
+            return False
+
+        delay = min(self.base_delay * 2 ** (job['attempts'] - 1), self.max_delay)
+        delay *= random.uniform(0.8, 1.2)  # jitter so retries don't line up
+        self._db.execute(
+            "UPDATE jobs SET state = ?, run_at = ?, last_error = ?, updated_at = ? WHERE id = ?",
+            (PENDING, now + delay, error, now, job['id'])
+        )
+        self._db.commit()
+        return True
+
+    def _count(self, name):
+        if self.metrics:
+            self.metrics.count(name)
+
+    async def _run(self, job):
+        # Everything the handler logs, down to Sheets and LinkedIn calls, carries the job's ID
+        token = current_job.set(job)
+        try:
+            with correlation(f"job-{job['id']}"):
+                await self._run_handler(job)
+        finally:
+            current_job.reset(token)
+
+    async def _run_handler(self, job):
+        handler = self.handlers.get(job['kind'])
+        try:
+            if handler is None:
+                raise RuntimeError(f"No handler registered for {job['kind']}")
+            state = await handler(json.loads(job['payload']))
+            self._finish(job, state)
+            self._count('jobs.finished')
+            log.info("Job %s (%s) finished: %s", job['id'], job['key'], state)
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            if self._fail(job, error, retry=not isinstance(e, NoRetry)):
+                self._count('jobs.retried')
+                log.warning("Job %s (%s) attempt %s failed, retrying: %s", job['id'], job['key'], job['attempts'], error)
+            else:
+                self._count('jobs.dead_lettered')
+                log.error("Job %s (%s) dead-lettered: %s", job['id'], job['key'], error)
+                if self.on_dead:
+                    try:
+                        await self.on_dead(job, error)
+                    except Exception as notify_error:
+                        log.error("Dead-letter callback failed: %s", notify_error)
+
+    async def _worker(self):
+        while True:
+            job = self._claim()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    def start(self, workers=1):
+        """Recover jobs interrupted by a crash and start worker coroutines"""
+        if self.workers:
+            return
+        recovered = self._db.execute(
+            "UPDATE jobs SET state = ?, updated_at = ? WHERE state = ?",
+            (PENDING, time.time(), RUNNING)
+        ).rowcount
+        self._db.commit()
+        if recovered:
+            log.info("Recovered %d interrupted job(s)", recovered)
+        self.workers = [asyncio.ensure_future(self._worker()) for _ in range(workers)]
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
@@ -4,20 +4,109 @@ Uses Playwright to control real LinkedIn session
 """
 
 from playwright.async_api import async_playwright
+from contextlib import asynccontextmanager
 import asyncio
+import logging
 import os
+import time
 from datetime import datetime
+from urllib.parse import urlparse
+
+from metrics import timer
+
+log = logging.getLogger(__name__)
+
+DEFAULT_ACCOUNT = 'default'
+
+# Per-step timeouts for post_carousel, in seconds
+STEP_TIMEOUTS = {
+    'open_feed': 30,
+    'open_composer': 10,
+    'open_media_picker': 10,
+    'upload_images': 60,
+    'fill_caption': 10,
+    'open_scheduler': 10,
+    'set_schedule': 10,
+    'publish': 10,
+    'confirm_closed': 30,
+}
+
+# Signals used to tell when image uploads have finished
+UPLOAD_URL_PATTERN = '/dms-uploads/'
+MEDIA_PREVIEW_SELECTOR = 'div[role="dialog"] img[src^="blob:"], div[role="dialog"] img[src*="media"]'
+UPLOAD_PROGRESS_SELECTOR = 'div[role="dialog"] [role="progressbar"], div[role="dialog"] .artdeco-loader'
+
+# Lightweight authenticated endpoint used to test a session without loading the feed
+SESSION_PROBE_URL = 'https://www.linkedin.com/voyager/api/me'
+SESSION_CACHE_SECONDS = 300
+
+# The feed is ready for us as soon as this is on screen; no need to wait for networkidle
+START_POST_SELECTOR = 'button:has-text("Start a post"), button[aria-label*="Start a post"]'
+
+# Requests the automation never needs: page weight, not functionality
+DEFAULT_BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font'}
+DEFAULT_BLOCKED_DOMAINS = {
+    'doubleclick.net',
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googlesyndication.com',
+    'ads.linkedin.com',
+    'px.ads.linkedin.com',
+    'snap.licdn.com',
+    'bat.bing.com',
+    'connect.facebook.net',
+}
+
+class AccountSlot:
+    """One browser context (one LinkedIn login) and the pages leased from it"""
+    
+    def __init__(self, name, session_file, max_pages):
+        self.name = name
+        self.session_file = session_file
+        self.context = None
+        self.idle_pages = []
+        self.page_uses = {}
+        self.semaphore = asyncio.Semaphore(max_pages)
+        self.init_lock = asyncio.Lock()
+        self.session_valid = None
+        self.session_checked_at = 0
+
 
 class LinkedInPoster:
-    def __init__(self):
+    def __init__(self, accounts=None, pages_per_account=2, max_page_uses=20,
+                 blocked_resource_types=None, blocked_domains=None, metrics=None):
+        """
+        Args:
+            accounts: {account_name: session_file}; defaults to a single
+                'default' account stored in linkedin_session.json
+            pages_per_account: how many jobs may drive one account at the same time
+            max_page_uses: a page is closed and replaced after this many leases,
+                which keeps Chromium's per-page memory growth in check
+            blocked_resource_types: Playwright resource types to abort
+                (defaults to images, media and fonts; pass an empty set to load everything)
+            blocked_domains: hosts (and their subdomains) whose requests are aborted,
+                defaults to common ad and analytics trackers
+            metrics: optional Metrics registry; posting steps are timed as linkedin.<step>
+        """
         self.browser = None
-        self.context = None
-        self.page = None
-        self.session_file = "linkedin_session.json"
         self.playwright = None
+        self.accounts = {
+            name: AccountSlot(name, session_file, pages_per_account)
+            for name, session_file in (accounts or {DEFAULT_ACCOUNT: "linkedin_session.json"}).items()
+        }
+        self.max_page_uses = max_page_uses
+        self.blocked_resource_types = (
+            DEFAULT_BLOCKED_RESOURCE_TYPES if blocked_resource_types is None else set(blocked_resource_types)
+        )
+        self.blocked_domains = (
+            DEFAULT_BLOCKED_DOMAINS if blocked_domains is None else set(blocked_domains)
+        )
+        self.blocked_requests = 0
+        self.last_timings = []
+        self.metrics = metrics
     
     async def init_browser(self):
-        """Initialize browser with persistent session"""
+        """Launch the shared browser; account contexts are created on first use"""
         self.playwright = await async_playwright().start()
         
         # Launch browser (headless=False for first setup, True for production)
@@ -25,183 +114,404 @@ class LinkedInPoster:
             headless=True,  # Set to False if you need to see browser
             args=['--disable-blink-features=AutomationControlled']
         )
+        log.info("Browser initialized")
+    
+    def _is_blocked(self, request):
+        if request.resource_type in self.blocked_resource_types:
+            return True
+        host = urlparse(request.url).hostname or ''
+        return any(host == domain or host.endswith('.' + domain) for domain in self.blocked_domains)
+    
+    async def _route(self, route):
+        """Abort heavy or third-party requests before they leave the browser"""
+        if self._is_blocked(route.request):
+            self.blocked_requests += 1
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    def _slot(self, account):
+        if account not in self.accounts:
+            raise ValueError(f"Unknown LinkedIn account: {account}")
+        return self.accounts[account]
+    
+    async def _ensure_context(self, slot):
+        """Create the account's context from its saved storage state, once"""
+        async with slot.init_lock:
+            if slot.context is None:
+                slot.context = await self.browser.new_context(
+                    storage_state=slot.session_file if os.path.exists(slot.session_file) else None,
+                    viewport={'width': 1920, 'height': 1080},
+                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+                )
+                if self.blocked_resource_types or self.blocked_domains:
+                    await slot.context.route('**/*', self._route)
+                log.info("Browser context ready for account '%s'", slot.name)
+        return slot.context
+    
+    @asynccontextmanager
+    async def lease(self, account=DEFAULT_ACCOUNT):
+        """
+        Lease a page for one job
         
-        # Create persistent context to save login session
-        self.context = await self.browser.new_context(
-            storage_state=self.session_file if os.path.exists(self.session_file) else None,
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
-        
-        self.page = await self.context.new_page()
-        print("Browser initialized")
+        Jobs on different accounts run concurrently; jobs on the same account share
+        up to pages_per_account pages. Pages are reused and recycled after
+        max_page_uses leases.
+        """
+        slot = self._slot(account)
+        async with slot.semaphore:
+            context = await self._ensure_context(slot)
+            page = None
+            while slot.idle_pages and page is None:
+                candidate = slot.idle_pages.pop()
+                if not candidate.is_closed():
+                    page = candidate
+            if page is None:
+                page = await context.new_page()
+                slot.page_uses[page] = 0
+            
+            try:
+                yield page
+            finally:
+                slot.page_uses[page] = slot.page_uses.get(page, 0) + 1
+                if page.is_closed():
+                    slot.page_uses.pop(page, None)
+                elif slot.page_uses[page] >= self.max_page_uses:
+                    slot.page_uses.pop(page, None)
+                    await page.close()
+                else:
+                    slot.idle_pages.append(page)
     
-    async def login(self, email, password):
+    async def login(self, email, password, account=DEFAULT_ACCOUNT):
         """Login to LinkedIn (only needed first time)"""
-        await self.page.goto('https://www.linkedin.com/login')
-        await self.page.wait_for_load_state('networkidle')
+        slot = self._slot(account)
+        async with self.lease(account) as page:
+            await page.goto('https://www.linkedin.com/login', wait_until='domcontentloaded')
+            await page.wait_for_selector('input[name="session_key"]', state='visible')
+            
+            # Fill login form
+            await page.fill('input[name="session_key"]', email)
+            await page.fill('input[name="session_password"]', password)
+            await page.click('button[type="submit"]')
+            
+            # Wait for redirect to feed (or 2FA page)
+            try:
+                await page.wait_for_url('**/feed/**', timeout=30000)
+            except:
+                # Might be on 2FA or verification page
+                current_url = page.url
+                if 'checkpoint' in current_url or 'challenge' in current_url:
+                    log.warning("2FA or verification required - waiting 60 seconds for manual completion")
+                    await asyncio.sleep(60)
+                    
+                    # Check if we made it to feed
+                    if 'feed' not in page.url:
+                        raise Exception("Login incomplete - please check 2FA/verification")
+            
+            # Save session
+            await slot.context.storage_state(path=slot.session_file)
+            slot.session_valid = True
+            slot.session_checked_at = time.monotonic()
+            log.info("Logged in and session saved for account '%s'", account)
+    
+    async def probe_session(self, account=DEFAULT_ACCOUNT):
+        """
+        Cheap session check without loading the feed
+        
+        Returns:
+            True or False when the cookies or a single API call settle it,
+            None when the answer is inconclusive
+        """
+        slot = self._slot(account)
+        context = await self._ensure_context(slot)
+        cookies = {c['name']: c for c in await context.cookies('https://www.linkedin.com')}
+        
+        # li_at is the auth cookie; without it (or once it expires) the session is gone
+        li_at = cookies.get('li_at')
+        if not li_at:
+            return False
+        if li_at.get('expires', -1) > 0 and li_at['expires'] < time.time():
+            return False
         
-        # Fill login form
-        await self.page.fill('input[name="session_key"]', email)
-        await self.page.fill('input[name="session_password"]', password)
-        await self.page.click('button[type="submit"]')
+        jsessionid = cookies.get('JSESSIONID')
+        if not jsessionid:
+            return None
         
-        # Wait for redirect to feed (or 2FA page)
         try:
-            await self.page.wait_for_url('**/feed/**', timeout=30000)
-        except:
-            # Might be on 2FA or verification page
-            current_url = self.page.url
-            if 'checkpoint' in current_url or 'challenge' in current_url:
-                print("2FA or verification required - waiting 60 seconds for manual completion")
-                await asyncio.sleep(60)
-                
-                # Check if we made it to feed
-                if 'feed' not in self.page.url:
-                    raise Exception("Login incomplete - please check 2FA/verification")
+            with timer(self.metrics, 'linkedin.session_probe'):
+                response = await context.request.get(
+                    SESSION_PROBE_URL,
+                    headers={
+                        'csrf-token': jsessionid['value'].strip('"'),
+                        'accept': 'application/json'
+                    },
+                    max_redirects=0,
+                    timeout=10000
+                )
+        except Exception as e:
+            log.warning("Session probe request failed: %s", e)
+            return None
         
-        # Save session
-        await self.context.storage_state(path=self.session_file)
-        print("Logged in and session saved")
+        if response.status == 200:
+            return True
+        if response.status in (401, 403) or 'login' in response.headers.get('location', ''):
+            return False
+        return None
     
-    async def check_session(self):
-        """Check if session is still valid"""
-        try:
-            await self.page.goto('https://www.linkedin.com/feed/', timeout=15000)
-            await self.page.wait_for_load_state('networkidle')
+    async def _navigation_check(self, account):
+        """Load the feed and see whether it redirects to login"""
+        async with self.lease(account) as page:
+            await page.goto('https://www.linkedin.com/feed/', wait_until='domcontentloaded', timeout=15000)
             
             # If redirected to login page, session expired
-            if 'login' in self.page.url or 'authwall' in self.page.url:
+            if 'login' in page.url or 'authwall' in page.url:
                 return False
+            
+            # Otherwise the composer button proves the feed rendered for a signed-in user
+            await page.wait_for_selector(START_POST_SELECTOR, state='visible', timeout=15000)
             return True
+    
+    async def check_session(self, account=DEFAULT_ACCOUNT, force=False):
+        """
+        Check if session is still valid
+        
+        Tries the cookie + API probe first and only loads the feed when that is
+        inconclusive. Results are reused for SESSION_CACHE_SECONDS unless force=True.
+        """
+        try:
+            slot = self._slot(account)
+            if (not force and slot.session_valid is not None
+                    and time.monotonic() - slot.session_checked_at < SESSION_CACHE_SECONDS):
+                return slot.session_valid
+            
+            is_valid = await self.probe_session(account)
+            if is_valid is None:
+                is_valid = await self._navigation_check(account)
+            
+            slot.session_valid = is_valid
+            slot.session_checked_at = time.monotonic()
+            return is_valid
         except Exception as e:
-            print(f"Session check failed: {e}")
+            log.warning("Session check failed: %s", e)
             return False
     
-    async def post_carousel(self, caption, image_paths, scheduled_time=None):
+    @asynccontextmanager
+    async def _step(self, timings, name):
+        """Time one posting step and record it in timings"""
+        started = time.monotonic()
+        error = None
+        try:
+            yield STEP_TIMEOUTS[name] * 1000
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            ok = error is None
+            timings.append({'step': name, 'seconds': round(elapsed, 3), 'ok': ok})
+            if self.metrics:
+                self.metrics.observe(f"linkedin.{name}", elapsed, error)
+            log.info("[post_carousel] %s: %.2fs%s", name, elapsed, '' if ok else ' (failed)',
+                     extra={'step': name, 'seconds': round(elapsed, 3), 'ok': ok})
+    
+    async def _wait_for_uploads(self, page, upload_responses, expected, timeout):
+        """
+        Wait until every image is uploaded
+        
+        Either signal is enough: one successful upload response per image, or one
+        rendered preview per image. After that, no upload progress indicator may remain.
+        """
+        async def network_done():
+            while len(upload_responses) < expected:
+                await asyncio.sleep(0.1)
+        
+        previews_done = page.wait_for_function(
+            "([sel, expected]) => document.querySelectorAll(sel).length >= expected",
+            arg=[MEDIA_PREVIEW_SELECTOR, expected],
+            timeout=timeout
+        )
+        
+        waiters = [asyncio.ensure_future(network_done()), asyncio.ensure_future(previews_done)]
+        try:
+            done, _ = await asyncio.wait(
+                waiters, timeout=timeout / 1000, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        
+        if not done:
+            raise TimeoutError(
+                f"Uploads not finished: {len(upload_responses)}/{expected} acknowledged"
+            )
+        for waiter in done:
+            waiter.result()  # surface a failed preview wait
+        
+        await page.wait_for_selector(UPLOAD_PROGRESS_SELECTOR, state='detached', timeout=timeout)
+    
+    async def post_carousel(self, caption, image_paths, scheduled_time=None, account=DEFAULT_ACCOUNT,
+                            on_publish=None):
         """
         Post carousel to LinkedIn
         
+        Each step waits on a concrete page or network signal rather than a fixed
+        sleep, with its own timeout. Step timings are kept in self.last_timings.
+        
         Args:
             caption: Post caption text
             image_paths: List of local image file paths
             scheduled_time: datetime object (if None, posts immediately)
+            account: which configured LinkedIn account (or company page) posts it
+            on_publish: called right after the Post (or Schedule) click, before LinkedIn confirms it
         
         Returns:
-            dict: {'success': bool, 'post_url': str or None, 'error': str or None}
+            dict: {'success': bool, 'published': bool, 'post_url': str or None, 'error': str or None,
+                   'timings': list of {'step', 'seconds', 'ok'}}
+            published is True once the click went through: a failure after that may
+            have left the post live, so the caller must not simply try again.
         """
+        timings = []
+        try:
+            async with self.lease(account) as page:
+                return await self._post_carousel(page, timings, caption, image_paths, scheduled_time, on_publish)
+        except Exception as e:
+            # Only reached when no page could be leased; posting errors are handled below
+            log.error("Failed to post carousel: %s", e)
+            return {'success': False, 'published': False, 'post_url': None, 'error': str(e), 'timings': timings}
+        finally:
+            self.last_timings = timings
+    
+    async def _post_carousel(self, page, timings, caption, image_paths, scheduled_time, on_publish):
+        """Drive the composer on a leased page"""
+        upload_responses = []
+        published = False
+        
+        def track_upload(response):
+            if UPLOAD_URL_PATTERN in response.url and response.request.method in ('PUT', 'POST') and response.ok:
+                upload_responses.append(response.url)
+        
+        page.on('response', track_upload)
+        
         try:
             # Go to feed
-            await self.page.goto('https://www.linkedin.com/feed/')
-            await self.page.wait_for_load_state('networkidle')
-            await asyncio.sleep(2)
+            async with self._step(timings, 'open_feed') as timeout:
+                await page.goto('https://www.linkedin.com/feed/', wait_until='domcontentloaded', timeout=timeout)
+                await page.wait_for_selector(START_POST_SELECTOR, state='visible', timeout=timeout)
             
-            # Click "Start a post" button
-            try:
-                await self.page.click('button:has-text("Start a post")', timeout=5000)
-            except:
-                # Try alternative selector
-                await self.page.click('button[aria-label*="Start a post"]', timeout=5000)
-            
-            await asyncio.sleep(3)
-            
-            # Wait for post modal
-            await self.page.wait_for_selector('div[role="dialog"]', timeout=10000)
+            # Click "Start a post" button and wait for the post modal
+            async with self._step(timings, 'open_composer') as timeout:
+                start_button = page.locator(START_POST_SELECTOR).first
+                await start_button.click(timeout=timeout)
+                await page.wait_for_selector('div[role="dialog"]', state='visible', timeout=timeout)
             
             # Upload images
-            # First, click the image upload button
-            try:
-                await self.page.click('button[aria-label*="Add a photo"]', timeout=5000)
-            except:
-                # Try alternative - click any image upload trigger
-                await self.page.click('button:has-text("Media")', timeout=5000)
+            # First, click the image upload button, then wait for its file input
+            async with self._step(timings, 'open_media_picker') as timeout:
+                media_button = page.locator(
+                    'button[aria-label*="Add a photo"], button:has-text("Media")'
+                ).first
+                await media_button.click(timeout=timeout)
+                file_input = await page.wait_for_selector(
+                    'input[type="file"]', state='attached', timeout=timeout
+                )
             
-            await asyncio.sleep(2)
-            
-            # Find file input and upload
-            file_input = await self.page.wait_for_selector('input[type="file"]', timeout=10000)
-            await file_input.set_input_files(image_paths)
-            
-            # Wait for images to upload and process
-            await asyncio.sleep(8)
+            async with self._step(timings, 'upload_images') as timeout:
+                await file_input.set_input_files(image_paths)
+                await self._wait_for_uploads(page, upload_responses, len(image_paths), timeout)
             
             # Add caption
             # Find the text editor (LinkedIn uses contenteditable div)
-            caption_field = await self.page.wait_for_selector('div[contenteditable="true"]', timeout=10000)
-            await caption_field.click()
-            await asyncio.sleep(1)
-            await caption_field.fill(caption)
-            await asyncio.sleep(2)
+            async with self._step(timings, 'fill_caption') as timeout:
+                caption_field = await page.wait_for_selector(
+                    'div[contenteditable="true"]', state='visible', timeout=timeout
+                )
+                await caption_field.click()
+                await caption_field.fill(caption)
+                await page.wait_for_function(
+                    "([el, text]) => el.innerText.trim().startsWith(text)",
+                    arg=[caption_field, caption.strip()[:40]],
+                    timeout=timeout
+                )
             
             if scheduled_time:
-                # Click schedule button
-                try:
-                    await self.page.click('button:has-text("Schedule")', timeout=5000)
-                except:
-                    # Try finding clock icon or schedule option
-                    await self.page.click('button[aria-label*="Schedule"]', timeout=5000)
-                
-                await asyncio.sleep(3)
+                # Click schedule button and wait for the date picker
+                async with self._step(timings, 'open_scheduler') as timeout:
+                    schedule_button = page.locator(
+                        'button:has-text("Schedule"), button[aria-label*="Schedule"]'
+                    ).first
+                    await schedule_button.click(timeout=timeout)
+                    date_input = await page.wait_for_selector(
+                        'input[type="date"]', state='visible', timeout=timeout
+                    )
                 
                 # Set date and time
-                # LinkedIn's scheduler UI - this may need adjustment based on their current UI
-                try:
-                    # Find date input
-                    date_input = await self.page.wait_for_selector('input[type="date"]', timeout=5000)
+                # LinkedIn's scheduler UI - this may need adjustment based on their current UI.
+                # A failure here fails the whole call; never fall back to posting immediately.
+                async with self._step(timings, 'set_schedule') as timeout:
                     await date_input.fill(scheduled_time.strftime('%Y-%m-%d'))
                     
-                    # Find time input
-                    time_input = await self.page.wait_for_selector('input[type="time"]', timeout=5000)
+                    time_input = await page.wait_for_selector(
+                        'input[type="time"]', state='visible', timeout=timeout
+                    )
                     await time_input.fill(scheduled_time.strftime('%H:%M'))
                     
-                    await asyncio.sleep(2)
-                    
-                    # Click "Schedule" button in modal
-                    await self.page.click('button:has-text("Schedule")', timeout=5000)
-                except Exception as e:
-                    print(f"Scheduling UI error: {e}")
-                    # If scheduling fails, try to post immediately instead
-                    await self.page.click('button:has-text("Post")', timeout=5000)
+                    # Click "Schedule" button in modal once it accepts the date
+                    confirm = page.locator('button:has-text("Schedule"):enabled').last
+                    await confirm.click(timeout=timeout)
             else:
                 # Click "Post" button for immediate posting
-                await self.page.click('button:has-text("Post")', timeout=5000)
+                async with self._step(timings, 'publish') as timeout:
+                    await page.click('button:has-text("Post")', timeout=timeout)
+            
+            published = True
+            if on_publish:
+                on_publish()
             
-            await asyncio.sleep(5)
+            # The composer closes once LinkedIn has accepted the post
+            async with self._step(timings, 'confirm_closed') as timeout:
+                await page.wait_for_selector('div[role="dialog"]', state='detached', timeout=timeout)
             
             # Get post URL (if available)
             post_url = None
             if not scheduled_time:
                 # After posting, LinkedIn may redirect to the post
-                post_url = self.page.url if 'feed/update' in self.page.url else None
+                post_url = page.url if 'feed/update' in page.url else None
             
             return {
                 'success': True,
+                'published': True,
                 'post_url': post_url,
-                'error': None
+                'error': None,
+                'timings': timings
             }
             
         except Exception as e:
             error_msg = str(e)
-            print(f"Failed to post carousel: {error_msg}")
+            log.error("Failed to post carousel: %s", error_msg)
             
             # Take screenshot for debugging
             try:
-                await self.page.screenshot(path=f"/tmp/linkedin_error_{datetime.now().timestamp()}.png")
+                await page.screenshot(path=f"/tmp/linkedin_error_{datetime.now().timestamp()}.png")
             except:
                 pass
             
             return {
                 'success': False,
+                'published': published,
                 'post_url': None,
-                'error': error_msg
+                'error': error_msg,
+                'timings': timings
             }
+        finally:
+            page.remove_listener('response', track_upload)
     
     async def close(self):
         """Close browser"""
-        if self.context:
-            await self.context.close()
+        for slot in self.accounts.values():
+            if slot.context:
+                await slot.context.close()
         if self.browser:
             await self.browser.close()
         if self.playwright:
             await self.playwright.stop()
-        print("Browser closed")
+        log.info("Browser closed")
@@ -0,0 +1,46 @@
+"""
+Discord message edited in place as a long-running result comes in
+Edits are rate-limited so streaming output and progress counters stay under Discord's edit limits
+"""
+
+import asyncio
+
+DISCORD_MESSAGE_LIMIT = 2000
+
+
+class LiveMessage:
+    def __init__(self, message, min_interval=1.0):
+        """
+        Args:
+            message: discord.Message sent by the bot
+            min_interval: minimum seconds between edits
+        """
+        self.message = message
+        self.min_interval = min_interval
+        self.edits = 0
+        self._shown = message.content
+        self._last_edit = 0.0
+
+    @classmethod
+    async def send(cls, channel, content, min_interval=1.0):
+        return cls(await channel.send(content), min_interval=min_interval)
+
+    async def _edit(self, content):
+        if len(content) > DISCORD_MESSAGE_LIMIT:
+            content = content[:DISCORD_MESSAGE_LIMIT - 1] + "…"
+        if content == self._shown:
+            return
+        self._last_edit = asyncio.get_running_loop().time()
+        self._shown = content
+        self.edits += 1
+        await self.message.edit(content=content)
+
+    async def update(self, content):
+        """Show content unless the last edit was too recent; skipped updates are superseded by later ones"""
+        if asyncio.get_running_loop().time() - self._last_edit < self.min_interval:
+            return
+        await self._edit(content)
+
+    async def finish(self, content):
+        """Always show the final content"""
+        await self._edit(content)
@@ -0,0 +1,124 @@
+"""
+Persistent cache for LLM responses
+SQLite-backed, keyed by model + prompt hash + generation config, with TTL and LRU eviction
+
+The methods block on SQLite; async callers run them with asyncio.to_thread.
+Reads never commit: access times are kept in memory and written with the next put.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+class LLMCache:
+    def __init__(self, path="llm_cache.sqlite", ttl=7 * 24 * 3600, max_entries=5000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}   # key -> last access time, not yet written
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT, response TEXT, created REAL, accessed REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(model, prompt, config=None):
+        """Hash of everything that changes the model's output"""
+        payload = json.dumps(
+            {'model': model, 'prompt': prompt, 'config': config or {}},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, model, prompt, config=None):
+        """Return the cached response text, or None on a miss or expired entry"""
+        return self.get_many(model, [prompt], config).get(prompt)
+
+    def get_many(self, model, prompts, config=None):
+        """{prompt: response} for every prompt with a live entry, in one query per 500 prompts"""
+        keys = {self.make_key(model, prompt, config): prompt for prompt in prompts}
+        now = time.time()
+        found = {}
+
+        with self._lock:
+            key_list = list(keys)
+            for start in range(0, len(key_list), 500):
+                chunk = key_list[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT key, response, created FROM responses WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, response, created in rows:
+                    # Expired rows count as misses; the next put replaces or evicts them
+                    if now - created <= self.ttl:
+                        found[keys[key]] = response
+                        self._touched[key] = now
+            self.hits += len(found)
+            self.misses += len(set(prompts)) - len(found)
+        return found
+
+    def put(self, model, prompt, response, config=None):
+        """Store a response and evict the least recently used entries over the cap"""
+        self.put_many(model, {prompt: response}, config)
+
+    def put_many(self, model, responses, config=None):
+        """Store {prompt: response} with a single commit"""
+        if not responses:
+            return
+        now = time.time()
+        rows = [(self.make_key(model, prompt, config), model, response, now, now)
+                for prompt, response in responses.items()]
+
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO responses (key, model, response, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            # Access times from reads since the last write, so eviction stays least-recently-used
+            touched, self._touched = self._touched, {}
+            self._db.executemany(
+                "UPDATE responses SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in touched.items()]
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._db.commit()
+
+    def delete(self, model, prompt, config=None):
+        """Drop one entry, e.g. after the user rejects the output it produced"""
+        key = self.make_key(model, prompt, config)
+        with self._lock:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+
+    def size(self):
+        """Number of stored responses"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self):
+        """Hit/miss counters for /status"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': self.size()
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,175 @@
+"""
+Structured logging
+JSON records go through a queue to a background thread that writes stdout and a rotating file,
+tagged with the correlation ID of the command, DM or job that produced them
+"""
+
+import atexit
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+# Set per command / DM / job; asyncio copies it into every task and to_thread call they start
+correlation_id = ContextVar('correlation_id', default=None)
+
+# LogRecord attributes that are not user-supplied extra= fields
+STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'correlation_id'}
+
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+
+def new_correlation_id(prefix):
+    return f"{prefix}-{uuid.uuid4().hex[:8]}"
+
+
+@contextmanager
+def correlation(cid):
+    token = correlation_id.set(cid)
+    try:
+        yield cid
+    finally:
+        correlation_id.reset(token)
+
+
+def correlated(prefix):
+    """Decorator: every run of a coroutine function gets a fresh correlation ID"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with correlation(new_correlation_id(prefix)):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class CorrelationFilter(logging.Filter):
+    """Stamp the record in the caller's context, before it crosses to the listener thread"""
+
+    def filter(self, record):
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        cid = getattr(record, 'correlation_id', None)
+        if cid:
+            entry['correlation_id'] = cid
+        for key, value in vars(record).items():
+            if key not in STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable console lines for local runs (LOG_FORMAT=text)"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(correlation_id)s] %(message)s")
+
+    def format(self, record):
+        if getattr(record, 'correlation_id', None) is None:
+            record.correlation_id = '-'
+        return super().format(record)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # The queue never leaves the process, so keep exc_info and extra fields for the JSON formatter;
+        # only the message is rendered now, while its args still hold the values being logged
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_listener = None
+
+
+def setup_logging(level="INFO", path="logs/lincon.log", max_bytes=5 * 1024 * 1024, backups=5,
+                  console_format="json", levels=None):
+    """
+    Route every logger through a non-blocking queue; call once at startup
+
+    Args:
+        level: root level
+        path: rotating JSON log file (None disables the file)
+        max_bytes: size at which the file rotates
+        backups: rotated files kept
+        console_format: 'json' or 'text' for stdout
+        levels: {logger_name: level} overrides, e.g. {'linkedin_poster': 'DEBUG'}
+    """
+    global _listener
+    if _listener:
+        return _listener
+
+    handlers = []
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(TextFormatter() if console_format == "text" else JsonFormatter())
+    handlers.append(console)
+
+    if path:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        rotating = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+        )
+        rotating.setFormatter(JsonFormatter())
+        handlers.append(rotating)
+
+    records = queue.SimpleQueue()
+    queue_handler = _QueueHandler(records)
+    queue_handler.addFilter(CorrelationFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+    for name, name_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(name_level)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
+
+
+def parse_levels(spec):
+    """'linkedin_poster=DEBUG,discord=WARNING' -> {'linkedin_poster': 'DEBUG', 'discord': 'WARNING'}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, level = item.partition("=")
+        if level.strip().upper() in LEVELS:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def set_level(name, level):
+    """Change one subsystem's level at runtime; returns False for an unknown level"""
+    level = level.upper()
+    if level not in LEVELS:
+        return False
+    logging.getLogger(name if name != 'root' else None).setLevel(level)
+    return True
+
+
+def current_levels():
+    """{logger_name: level} for the root logger and every logger with its own level"""
+    levels = {'root': logging.getLevelName(logging.getLogger().level)}
+    for name, logger in sorted(logging.root.manager.loggerDict.items()):
+        if isinstance(logger, logging.Logger) and logger.level != logging.NOTSET:
+            levels[name] = logging.getLevelName(logger.level)
+    return levels
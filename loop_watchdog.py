@@ -0,0 +1,246 @@
+"""
+Event loop stall detector and sampling profiler
+A watchdog thread notices when the loop stops ticking, grabs the loop thread's stack
+and blames the command or job whose task was running
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import Counter, deque
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+
+def frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def is_loop_entry(frame):
+    """asyncio's Handle._run: frames above it are loop plumbing shared by every sample"""
+    return frame.f_code.co_name == '_run' and frame.f_code.co_filename.endswith(os.path.join('asyncio', 'events.py'))
+
+
+def is_idle(frame):
+    """True when the loop is parked in the selector, i.e. waiting on I/O rather than running code"""
+    return frame.f_code.co_name in ('select', 'poll') and frame.f_code.co_filename.endswith('selectors.py')
+
+
+class LoopWatchdog:
+    def __init__(self, threshold=0.5, interval=0.1, stack_limit=25, history=20, metrics=None):
+        """
+        Args:
+            threshold: seconds the loop may go without ticking before it counts as a stall
+            interval: seconds between heartbeats (and between watchdog checks)
+            stack_limit: innermost frames kept per captured stack
+            history: recent stalls kept for /metrics
+            metrics: optional Metrics registry; stalls are recorded as event_loop.stall
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.stack_limit = stack_limit
+        self.metrics = metrics
+        self.stalls = deque(maxlen=history)
+        self.labels = weakref.WeakKeyDictionary()   # task -> command / job name
+        self.loop = None
+        self.thread_id = None
+        self._last_beat = time.monotonic()
+        self._pending = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._parent_factory = None
+
+    # ---- ATTRIBUTION ----
+
+    def label(self, name, task=None):
+        """Attribute the current task (and the tasks it spawns) to name; None clears it"""
+        task = task or asyncio.current_task()
+        if task is None:
+            return
+        if name is None:
+            self.labels.pop(task, None)
+        else:
+            self.labels[task] = name
+
+    @contextmanager
+    def activity(self, name):
+        task = asyncio.current_task()
+        previous = self.labels.get(task) if task else None
+        self.label(name, task)
+        try:
+            yield
+        finally:
+            self.label(previous, task)
+
+    def track(self, name):
+        """Decorator for coroutine functions run by the scheduler or the job queue"""
+        def decorator(func):
+            async def wrapper(*args, **kwargs):
+                with self.activity(name):
+                    return await func(*args, **kwargs)
+            wrapper.__name__ = func.__name__
+            wrapper.__doc__ = func.__doc__
+            return wrapper
+        return decorator
+
+    def _task_factory(self, loop, coro, **kwargs):
+        # gather() and create_task() inside a command inherit the command's label
+        if self._parent_factory:
+            task = self._parent_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        parent = asyncio.current_task(loop)
+        if parent is not None and parent in self.labels:
+            self.labels[task] = self.labels[parent]
+        return task
+
+    def describe(self, task):
+        if task is None:
+            return "loop callback"
+        label = self.labels.get(task)
+        if label:
+            return label
+        coro = task.get_coro()
+        return f"{task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+
+    # ---- WATCHDOG ----
+
+    def start(self):
+        """Start heartbeats and the watchdog thread; call from the loop thread"""
+        self.loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+        self._parent_factory = self.loop.get_task_factory()
+        self.loop.set_task_factory(self._task_factory)
+        self._last_beat = time.monotonic()
+        self.loop.call_later(self.interval, self._beat)
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _beat(self):
+        now = time.monotonic()
+        with self._lock:
+            stall, self._pending = self._pending, None
+            last_beat, self._last_beat = self._last_beat, now
+        if stall:
+            self._finish(stall, now - last_beat - self.interval)
+        if not self._stop.is_set():
+            self.loop.call_later(self.interval, self._beat)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                lag = time.monotonic() - self._last_beat - self.interval
+                if lag < self.threshold or self._pending:
+                    continue
+                # The loop thread is still stuck in whatever blocked it; one capture per stall
+                frame = sys._current_frames().get(self.thread_id)
+                self._pending = {
+                    'at': time.time() - lag,
+                    'activity': self.describe(asyncio.current_task(self.loop)),
+                    'stack': traceback.format_list(traceback.extract_stack(frame, limit=self.stack_limit))
+                    if frame else [],
+                }
+
+    def _finish(self, stall, seconds):
+        stall['seconds'] = seconds
+        self.stalls.append(stall)
+        if self.metrics:
+            self.metrics.observe('event_loop.stall', seconds)
+        where = stall['stack'][-1].strip().splitlines()[0] if stall['stack'] else "unknown frame"
+        log.warning("Event loop stalled %.2fs in %s at %s", seconds, stall['activity'], where,
+                    extra={'stall_seconds': round(seconds, 3), 'activity': stall['activity'],
+                           'stack': "".join(stall['stack'])})
+
+
+class SamplingProfiler:
+    def __init__(self, thread_id, interval=0.005, max_depth=40):
+        """
+        Samples one thread's stack from a background thread
+
+        Everything the loop runs while the profiler is active is sampled,
+        so concurrent work shows up next to the profiled command.
+
+        Args:
+            thread_id: thread to sample (the event loop's)
+            interval: seconds between samples
+            max_depth: innermost frames kept per sample
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.idle = 0
+        self.samples = 0
+        self.started = None
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.seconds = time.perf_counter() - self.started
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            if is_idle(frame):
+                self.idle += 1
+                continue
+            stack = []
+            while frame is not None and not is_loop_entry(frame) and len(stack) < self.max_depth:
+                stack.append(frame_name(frame.f_code))
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+
+    def folded(self):
+        """Collapsed stacks (outermost first), readable by flamegraph.pl and speedscope"""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, limit=10):
+        """Functions by self and inclusive samples, plus the hottest stacks"""
+        busy = self.samples - self.idle
+        if not busy:
+            return f"{self.samples} samples in {self.seconds:.2f}s, loop idle the whole time"
+
+        own, inclusive = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for name in set(stack):
+                inclusive[name] += count
+
+        def pct(n):
+            return f"{100 * n / busy:5.1f}%"
+
+        lines = [
+            f"{self.samples} samples in {self.seconds:.2f}s: "
+            f"{busy} busy, {self.idle} idle ({100 * self.idle / self.samples:.0f}% waiting on I/O)",
+            "",
+            "Self time:",
+        ]
+        lines += [f"{pct(n)} {name}" for name, n in own.most_common(limit)]
+        lines += ["", "Inclusive time:"]
+        lines += [f"{pct(n)} {name}" for name, n in inclusive.most_common(limit)]
+        lines += ["", "Hottest stacks (innermost 4 frames):"]
+        lines += [
+            f"{pct(n)} " + " > ".join(name.split(' ')[0] for name in stack[-4:])
+            for stack, n in self.stacks.most_common(min(limit, 5))
+        ]
+        return "\n".join(lines)
@@ -7,52 +7,96 @@ from google.oauth2.service_account import Credentials
 from datetime import datetime, timedelta, timezone
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from google import genai
-from linkedin_poster import LinkedInPoster
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from linkedin_poster import LinkedInPoster, DEFAULT_ACCOUNT
+from sheet_gateway import SheetGateway
+from write_buffer import RowWriteBuffer
+from sheet_cache import SheetMirror
+from classifier import MemoryClassifier
+from classify_cursor import ClassificationCursor
+from llm_cache import LLMCache
+from job_queue import JobQueue, NoRetry
+from posting_calendar import PostingCalendar
+from readiness import Readiness, ComponentUnavailable
+from sessions import SessionStore
+from context_builder import ContextBuilder
+from live_message import LiveMessage
+from metrics import Metrics, timer
+from loop_watchdog import LoopWatchdog, SamplingProfiler
+from log_config import (
+    setup_logging, parse_levels, set_level, current_levels, correlated, correlation_id, new_correlation_id
+)
 import asyncio
+import io
+import itertools
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
 
 intents = discord.Intents.default()
 intents.message_content = True
 intents.guilds = True
 bot = commands.Bot(command_prefix="/", intents=intents)
 
-print("Starting LinCon...")
+# JSON logs to stdout and logs/lincon.log through a background thread
+# LOG_LEVELS='linkedin_poster=DEBUG,metrics=DEBUG' raises single subsystems; /loglevel changes them live
+setup_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    path=os.getenv("LOG_FILE", "logs/lincon.log"),
+    console_format=os.getenv("LOG_FORMAT", "json"),
+    levels=parse_levels(os.getenv("LOG_LEVELS"))
+)
+log = logging.getLogger("lincon")
 
-# ---- GOOGLE CREDS LOAD ----
-raw_creds = os.getenv("GOOGLE_CREDS")
+log.info("Starting LinCon...")
+STARTED_AT = time.perf_counter()
 
-if not raw_creds:
-    print("GOOGLE_CREDS ENV VAR NOT FOUND")
+# ---- STARTUP ----
+# Clients are built in the background after the bot starts connecting; code that needs one
+# awaits it through the registry instead of the whole bot waiting at import time
+startup = Readiness()
 
-try:
-    creds_dict = json.loads(raw_creds)
-    print("Google creds JSON loaded")
-except Exception as e:
-    print("FAILED TO LOAD GOOGLE CREDS:", e)
-    raise e
+# Seconds a command waits for a component that is still warming up
+STARTUP_WAIT = 60
 
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets",
     "https://www.googleapis.com/auth/drive.file"
 ]
 
-try:
-    creds = Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
-    client = gspread.authorize(creds)
-    print("Google Sheets authorized")
-except Exception as e:
-    print("FAILED TO AUTHORIZE GOOGLE SHEETS:", e)
-    raise e
+SPREADSHEET_KEY = "15Wn6cP6Jom_-uIwLGLY_RlvwQZNn17-aS31Xbr5U0qo"
 
-try:
-    spreadsheet = client.open_by_key("15Wn6cP6Jom_-uIwLGLY_RlvwQZNn17-aS31Xbr5U0qo")
+creds = None
+drive_transfer = None
+asset_cache = None
+
+
+def load_google_creds():
+    """Parse GOOGLE_CREDS into service-account credentials"""
+    raw_creds = os.getenv("GOOGLE_CREDS")
+    
+    if not raw_creds:
+        raise RuntimeError("GOOGLE_CREDS ENV VAR NOT FOUND")
+    
+    return Credentials.from_service_account_info(json.loads(raw_creds), scopes=SCOPES)
+
+
+def open_worksheets():
+    """Authorize gspread and open LinCon_Brain and LinCon_Content (blocking)"""
+    client = gspread.authorize(creds)
+    # gspread waits forever by default; a hung request would hold a gateway thread and its worksheet lock
+    client.set_timeout(sheets.timeout)
+    spreadsheet = client.open_by_key(SPREADSHEET_KEY)
     brain_sheet = spreadsheet.sheet1  # LinCon_Brain
-    print("LinCon_Brain sheet opened successfully")
+    log.info("LinCon_Brain sheet opened successfully")
     
     # Get or create LinCon_Content sheet
     try:
         content_sheet = spreadsheet.worksheet("LinCon_Content")
-        print("LinCon_Content sheet found")
+        log.info("LinCon_Content sheet found")
     except gspread.exceptions.WorksheetNotFound:
         content_sheet = spreadsheet.add_worksheet(
             title="LinCon_Content",
@@ -66,47 +110,206 @@ try:
             'State', 'Design Intent', 'Required Assets', 'Asset Links', 
             'Visual Links', 'Scheduled Time', 'Posted Time', 'Posting Status', 'Error Log'
         ]], range_name='A1:T1')
-        print("LinCon_Content sheet created")
-        
-except Exception as e:
-    print("FAILED TO OPEN SHEET:", e)
-    raise e
+        log.info("LinCon_Content sheet created")
+    
+    return brain_sheet, content_sheet
 
-# ---- GEMINI SETUP ----
-try:
-    client_gemini = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-    print("Gemini configured")
-except Exception as e:
-    print("FAILED TO CONFIGURE GEMINI:", e)
-    raise e
 
-# ---- GOOGLE DRIVE SETUP ----
-try:
-    from googleapiclient.discovery import build
-    from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
-    import io
+async def start_google_creds():
+    global creds
+    creds = await asyncio.to_thread(load_google_creds)
+    log.info("Google creds loaded")
+    return creds
+
+
+async def start_sheets():
+    global brain_sheet, content_sheet
+    brain_sheet, content_sheet = await asyncio.to_thread(open_worksheets)
     
-    drive_service = build('drive', 'v3', credentials=creds)
-    print("Google Drive configured")
-except Exception as e:
-    print("FAILED TO CONFIGURE GOOGLE DRIVE:", e)
-    drive_service = None
+    # The mirrors and the write buffer were built before the worksheets existed
+    brain_cache.worksheet = brain_sheet
+    content_cache.worksheet = content_sheet
+    content_writes.worksheet = content_sheet
+    
+    # Prime both mirrors so the first command is answered from memory
+    await asyncio.gather(brain_cache.ensure_fresh(), content_cache.ensure_fresh())
+    return brain_sheet, content_sheet
+
+
+async def start_gemini():
+    global client_gemini
+    from google import genai  # heavy import, kept off the startup path
+    
+    client_gemini = await asyncio.to_thread(genai.Client, api_key=os.getenv("GEMINI_API_KEY"))
+    memory_classifier.client = client_gemini
+    return client_gemini
+
+
+async def start_drive():
+    """Build the Drive transfer engine and the local asset cache"""
+    global drive_transfer, asset_cache
+    from drive_transfer import DriveTransfer
+    from asset_cache import AssetCache
+    
+    # Slides transfer in parallel; 4 MiB chunks keep memory flat for large exports
+    drive_transfer = DriveTransfer(creds, workers=7, chunk_size=4 * 1024 * 1024, metrics=metrics)
+    
+    # Visuals are kept on disk by file ID + md5, so retries and reschedules skip the download
+    asset_cache = AssetCache(drive_transfer, "/tmp/lincon_assets", max_bytes=500 * 1024 * 1024)
+    return drive_transfer
+
+
+async def start_memory_index():
+    """Load the embedding index and embed any memories added since it was last saved"""
+    global memory_index
+    from memory_index import MemoryIndex, GeminiEmbedder, HashingEmbedder
+    
+    # MEMORY_EMBEDDINGS=hashing uses the local deterministic embedder instead of Gemini;
+    # min_score is where /draft topic matches stop being related, which differs per provider
+    if os.getenv("MEMORY_EMBEDDINGS") == "hashing":
+        embedder, min_score = HashingEmbedder(dim=256), 0.1
+    else:
+        embedder, min_score = GeminiEmbedder(client_gemini, dim=768, metrics=metrics), 0.55
+    
+    index = MemoryIndex(embedder, "memory_index", duplicate_threshold=0.92, min_score=min_score)
+    await asyncio.to_thread(index.load)
+    embedded = await index.sync({row_num: row[2] for row_num, row in brain_cache.data_rows()})
+    log.info("Memory index: %d memories (%d embedded now)", len(index), embedded)
+    
+    memory_index = index
+    return index
+
+
+startup.add('google_creds', start_google_creds)
+startup.add('sheets', start_sheets, after=['google_creds'])
+startup.add('gemini', start_gemini)
+startup.add('drive', start_drive, after=['google_creds'])
+startup.add('memory_index', start_memory_index, after=['sheets', 'gemini'])
+
+
+def needs(*components):
+    """Command check: wait for startup components, or explain why the command can't run yet"""
+    async def predicate(ctx):
+        if not isinstance(ctx.channel, discord.DMChannel):
+            return True  # the command ignores non-DM channels itself
+        try:
+            await startup.wait(*components, timeout=STARTUP_WAIT)
+        except ComponentUnavailable as e:
+            await ctx.send(f"⏳ Not ready: {e}")
+            return False
+        return True
+    return commands.check(predicate)
+
+
+# Latency histograms for every Sheets, Drive, Gemini and LinkedIn call; see /metrics
+metrics = Metrics()
+
+# Blocking calls on the event loop delay the gateway heartbeat; stalls are logged with the stack and command
+watchdog = LoopWatchdog(threshold=0.5, interval=0.1, metrics=metrics)
+
+# The loop keeps only weak references to tasks; this one runs for the life of the bot
+loop_lag_task = None
+
+
+def scheduled(name, func):
+    """Wrap a scheduler job so stalls are attributed to it and each run gets its own correlation ID"""
+    return watchdog.track(f"job:{name}")(correlated(name)(func))
+
+# All sheet reads and writes go through the gateway so Sheets latency never blocks the event loop
+sheets = SheetGateway(max_workers=4, timeout=30, metrics=metrics)
+
+# Worksheets are attached by start_sheets()
+brain_sheet = None
+content_sheet = None
+
+# State transitions touch columns L..T; writes to the same row are coalesced into one batch_update
+content_writes = RowWriteBuffer(sheets, None, first_column='L', last_column='T', debounce=0.5)
+
+# In-memory mirrors answer commands without re-downloading the sheets
+# Brain is indexed by Memory Type (D) and Used (F), Content by State (L)
+brain_cache = SheetMirror(
+    sheets, None, width=7,
+    index_columns={3: str.lower, 5: str.upper},
+    ttl=60
+)
+content_cache = SheetMirror(
+    sheets, None, width=20,
+    index_columns={11: str},
+    ttl=60,
+    writer=content_writes
+)
+
+# ---- GEMINI SETUP ----
+# The client is attached by start_gemini()
+client_gemini = None
+
+# Identical prompts (retries, unchanged memories) are answered from disk instead of Gemini
+llm_cache = LLMCache("llm_cache.sqlite", ttl=7 * 24 * 3600, max_entries=5000)
+
+# Nightly classification packs memories into JSON batches and runs several prompts at once
+memory_classifier = MemoryClassifier(None, batch_size=25, concurrency=4, cache=llm_cache, metrics=metrics)
+
+# How far LinCon_Brain has been classified; nightly runs read only the rows past it
+classification_cursor = ClassificationCursor("classify_cursor.json")
+classification_cursor.load()
+
+# Semantic index over LinCon_Brain column C; attached by start_memory_index()
+memory_index = None
+
+# /draft <topic> considers this many of the most similar unused memories
+DRAFT_TOPIC_CANDIDATES = 40
 
 # ---- LINKEDIN POSTER SETUP ----
 linkedin_poster = None
 
+# Optional extra accounts / company pages: LINKEDIN_ACCOUNTS='{"default": "linkedin_session.json", "acme": "acme_session.json"}'
+try:
+    LINKEDIN_ACCOUNTS = json.loads(os.getenv("LINKEDIN_ACCOUNTS", "null"))
+except Exception as e:
+    log.error("FAILED TO PARSE LINKEDIN_ACCOUNTS: %s", e)
+    LINKEDIN_ACCOUNTS = None
+
+
+# Known without launching the browser, for commands that only name an account
+LINKEDIN_ACCOUNT_NAMES = list(LINKEDIN_ACCOUNTS or [DEFAULT_ACCOUNT])
+
+# Chromium only runs around LinkedIn work: the first user launches it, the last one out closes it
+linkedin_users = 0
+linkedin_lock = asyncio.Lock()
+
+
+def new_linkedin_poster():
+    """One browser, one context per account, pages recycled after 20 jobs"""
+    return LinkedInPoster(accounts=LINKEDIN_ACCOUNTS, pages_per_account=2, max_page_uses=20, metrics=metrics)
+
 # ---- SCHEDULER SETUP ----
-scheduler = AsyncIOScheduler()
+# Recurring jobs are re-added on every start; publish jobs live in SQLite so they survive restarts
+scheduler = AsyncIOScheduler(jobstores={
+    'default': MemoryJobStore(),
+    'publish': SQLAlchemyJobStore(url='sqlite:///schedule.sqlite')
+})
+
+# Minutes before a publish at which the browser and session are warmed up
+PUBLISH_WARMUP_MINUTES = 5
+
+# Publish slots handed out by /post schedule (UTC)
+posting_calendar = PostingCalendar(times=["14:00"], weekdays=range(7))
+
+# ---- JOB QUEUE SETUP ----
+# Posting work is persisted so a crash or redeploy mid-post is retried on restart
+job_queue = JobQueue("jobs.sqlite", base_delay=30, max_delay=3600, metrics=metrics)
 
 # Your Discord User ID (REPLACE THIS)
 MY_USER_ID = "895300631680655420"
 
-# State tracking
-current_draft = None
-pending_approval = None
-pending_asset_request = None
-pending_visual_confirmation = None
-pending_post_confirmation = None
+# /draft prompts carry at most this many tokens of memories
+context_builder = ContextBuilder(budget=1500, half_life_days=3)
+
+# In-flight conversations, per user; untouched sessions expire after two days
+sessions = SessionStore(ttl=48 * 3600)
+
+# Drafts are numbered so several can wait for approval at once ("approve 3")
+draft_numbers = itertools.count(1)
 
 
 # ---- STATE DEFINITIONS ----
@@ -122,6 +325,27 @@ class PostState:
     FAILED = "FAILED"
 
 
+# LinCon_Content columns written by update_content_state (column L holds the state)
+CONTENT_COLUMNS = {
+    'design_intent': 'M',
+    'required_assets': 'N',
+    'asset_links': 'O',
+    'visual_links': 'P',
+    'scheduled_time': 'Q',
+    'posted_time': 'R',
+    'posting_status': 'S',
+    'error_log': 'T'
+}
+
+
+def parse_sheet_time(value):
+    """ISO timestamp from a sheet cell; values without an offset are read as UTC, which is what the bot writes"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
 async def send_daily_question():
     """Send daily question to user"""
     try:
@@ -138,117 +362,190 @@ async def send_daily_question():
         )
         
         await user.send(daily_question)
-        print(f"Daily question sent to user {MY_USER_ID}")
+        log.info("Daily question sent to user %s", MY_USER_ID)
     except Exception as e:
-        print(f"Failed to send daily question: {e}")
+        log.error("Failed to send daily question: %s", e)
+
+
+def brain_row(values):
+    """Pad a LinCon_Brain row read straight from the sheet to columns A..G"""
+    return (list(values[:7]) + [''] * 7)[:7]
+
 
+def is_unclassified(row):
+    """Memory Type (column D) is empty or 'raw'"""
+    return row[3].strip().lower() in ('', 'raw')
 
-async def classify_memories():
-    """Daily background job: classify unprocessed memories using Gemini"""
+
+async def find_unclassified(full=False):
+    """
+    Rows waiting for classification, and the new high-water mark
+    
+    Reads only the rows past the classification cursor, plus rows a previous run
+    left behind. The first run, `full=True`, and rows deleted above the cursor
+    fall back to reloading the whole sheet.
+    
+    Returns:
+        ({row_num: row}, (last_row_num, last_timestamp))
+    """
+    cursor = classification_cursor
+    if not full and cursor.row:
+        # Re-read the cursor row as an overlap check, like the mirror's tail refresh
+        tail = await sheets.get(brain_sheet, f'A{cursor.row}:G')
+        if cursor.matches(tail[0] if tail else None):
+            rows = {cursor.row + i: brain_row(values) for i, values in enumerate(tail[1:], start=1)}
+            pending = {row_num: row for row_num, row in rows.items() if is_unclassified(row)}
+            
+            # Rows reset by hand are picked up for free whenever the mirror happens to be loaded
+            if brain_cache.loaded:
+                for row_num in brain_cache.row_nums_where(3, '') | brain_cache.row_nums_where(3, 'raw'):
+                    if row_num <= cursor.row:
+                        pending.setdefault(row_num, brain_cache.row(row_num))
+            
+            # Rows left over from failed batches: from the mirror if it has them, else one small read each
+            leftover = {row_num: brain_cache.row(row_num) if brain_cache.loaded else None
+                        for row_num in cursor.dirty if row_num not in pending}
+            missing = [row_num for row_num, row in leftover.items() if row is None]
+            fetched = await asyncio.gather(*[
+                sheets.get(brain_sheet, f'A{row_num}:G{row_num}') for row_num in missing
+            ])
+            leftover.update({row_num: brain_row(values[0]) for row_num, values in zip(missing, fetched) if values})
+            pending.update({row_num: row for row_num, row in leftover.items() if row and is_unclassified(row)})
+            
+            if not rows:
+                return pending, (cursor.row, cursor.timestamp)
+            last_row = max(rows)
+            return pending, (last_row, rows[last_row][0])
+        
+        log.info("Rows above the classification cursor changed, scanning the whole sheet")
+    
+    await brain_cache.refresh(full=True)
+    pending = {
+        row_num: brain_cache.row(row_num)
+        for row_num in brain_cache.row_nums_where(3, '') | brain_cache.row_nums_where(3, 'raw')
+    }
+    last_row = len(brain_cache.rows)
+    return pending, (last_row, brain_cache.rows[-1][0] if brain_cache.rows else None)
+
+
+async def classify_memories(on_progress=None, fresh=False, full=False):
+    """
+    Daily background job: classify unprocessed memories using Gemini
+    
+    Only rows added since the last run are read, so the cost follows the day's new DMs
+    rather than the size of LinCon_Brain; full=True rescans the whole sheet.
+    """
     try:
-        print("Starting memory classification...")
+        log.info("Starting memory classification...")
         
-        # Get all rows from brain sheet
-        all_rows = brain_sheet.get_all_values()
+        await startup.wait('sheets', 'gemini', timeout=STARTUP_WAIT)
+        pending, (last_row, last_timestamp) = await find_unclassified(full=full)
         
-        if len(all_rows) <= 1:  # Only headers or empty
-            print("No rows to classify")
-            return
+        if not pending:
+            log.info("No unprocessed memories found")
+            classification_cursor.dirty.clear()
+            classification_cursor.advance(last_row, last_timestamp)
+            await asyncio.to_thread(classification_cursor.save)
+            return 0
         
-        # Find rows where Memory Type is empty (column D, index 3)
-        unprocessed = []
-        for idx, row in enumerate(all_rows[1:], start=2):  # Skip header, start at row 2
-            # Ensure row has enough columns
-            while len(row) < 7:
-                row.append('')
-            
-            # Check if Memory Type (column D) is empty or 'raw'
-            if not row[3] or row[3] == 'raw':
-                unprocessed.append({
-                    'row_num': idx,
-                    'timestamp': row[0],
-                    'source': row[1],
-                    'content': row[2],
-                    'current_row': row
-                })
-        
-        if not unprocessed:
-            print("No unprocessed memories found")
-            return
+        unprocessed = [
+            {
+                'row_num': row_num,
+                'timestamp': row[0],
+                'source': row[1],
+                'content': row[2],
+                'current_row': row
+            }
+            for row_num, row in sorted(pending.items())
+        ]
         
-        print(f"Found {len(unprocessed)} unprocessed memories")
+        log.info("Found %d unprocessed memories", len(unprocessed))
         
-        # Process each memory with Gemini
-        for memory in unprocessed:
-            try:
-                prompt = f"""Classify this user input into EXACTLY ONE category:
-
-Categories:
-- work_log: Specific work tasks, what they built, code they wrote, meetings attended
-- insight: Learning, realization, understanding something new
-- failure: Mistakes, bugs, things that didn't work, lessons from failure
-- idea: Future plans, feature ideas, thoughts to explore
-- misc: Everything else
-
-Input: "{memory['content']}"
-
-Rules:
-1. Return ONLY the category name (work_log, insight, failure, idea, or misc)
-2. Do NOT explain
-3. Do NOT rewrite the content
-4. Do NOT add emojis
-5. Pick the MOST specific category that fits
-
-Also determine:
-- Does this input have enough context to understand later? (YES/NO)
-- Context is missing if it references "this" "that" "the bug" without explaining what
-
-Response format (STRICT):
-CATEGORY: [category]
-CONTEXT: [YES or NO]"""
-
-                response = client_gemini.models.generate_content(
-                    model='gemini-2.5-flash',
-                    contents=prompt
-                )
-                result = response.text.strip()
-                
-                # Parse response
-                lines = result.split('\n')
-                category = None
-                context = None
-                
-                for line in lines:
-                    if line.startswith('CATEGORY:'):
-                        category = line.split(':', 1)[1].strip().lower()
-                    elif line.startswith('CONTEXT:'):
-                        context = line.split(':', 1)[1].strip().upper()
-                
-                # Validate category
-                valid_categories = ['work_log', 'insight', 'failure', 'idea', 'misc']
-                if category not in valid_categories:
-                    category = 'misc'
-                
-                # Validate context
-                if context not in ['YES', 'NO']:
-                    context = 'NO'
-                
-                # Update sheet (new API: values first, then range)
-                row_num = memory['row_num']
-                brain_sheet.update(values=[[category]], range_name=f'D{row_num}')
-                brain_sheet.update(values=[[context]], range_name=f'E{row_num}')
-                brain_sheet.update(values=[['NO']], range_name=f'F{row_num}')  # Not used for content yet
-                
-                print(f"Row {row_num} classified as: {category}, context: {context}")
-                
-            except Exception as e:
-                print(f"Failed to classify row {memory['row_num']}: {e}")
-                continue
+        results = await memory_classifier.classify(
+            unprocessed, on_progress=on_progress, bypass_cache=fresh
+        )
+        
+        # Write every result back in one batch (Used is reset to NO: not used for content yet)
+        await sheets.batch_update(brain_sheet, [
+            {'range': f'D{row_num}:F{row_num}', 'values': [[category, context, 'NO']]}
+            for row_num, (category, context) in sorted(results.items())
+        ])
+        for row_num, (category, context) in results.items():
+            brain_cache.set_cells(row_num, {3: category, 4: context, 5: 'NO'})
+        
+        # Rows from failed batches stay behind the cursor until a later run classifies them
+        classification_cursor.dirty = set(pending) - set(results)
+        classification_cursor.advance(last_row, last_timestamp)
+        await asyncio.to_thread(classification_cursor.save)
         
-        print("Memory classification complete")
+        log.info("Classified %d of %d memories", len(results), len(unprocessed))
+        return len(results)
         
     except Exception as e:
-        print(f"Failed in classify_memories: {e}")
+        log.exception("Failed in classify_memories: %s", e)
+        return 0
+
+
+async def generate_text(prompt, fresh=False, model='gemini-2.5-flash'):
+    """Generate text through the response cache; fresh=True skips the lookup but still stores the result"""
+    if not fresh:
+        cached = await asyncio.to_thread(llm_cache.get, model, prompt)
+        if cached is not None:
+            return cached
+    
+    await startup.wait('gemini', timeout=STARTUP_WAIT)
+    with timer(metrics, 'gemini.generate_content'):
+        response = await client_gemini.aio.models.generate_content(
+            model=model,
+            contents=prompt
+        )
+    result = response.text.strip()
+    await asyncio.to_thread(llm_cache.put, model, prompt, result)
+    return result
+
+
+async def stream_text(prompt, on_text, fresh=False, model='gemini-2.5-flash'):
+    """
+    Like generate_text, but calls on_text(text_so_far) as chunks arrive
+    
+    A cached response is delivered in one call.
+    """
+    if not fresh:
+        cached = await asyncio.to_thread(llm_cache.get, model, prompt)
+        if cached is not None:
+            await on_text(cached)
+            return cached
+    
+    await startup.wait('gemini', timeout=STARTUP_WAIT)
+    text = ""
+    started = time.perf_counter()
+    with timer(metrics, 'gemini.generate_content_stream'):
+        async for chunk in await client_gemini.aio.models.generate_content_stream(
+            model=model,
+            contents=prompt
+        ):
+            if chunk.text:
+                if not text:
+                    metrics.observe('gemini.first_chunk', time.perf_counter() - started)
+                text += chunk.text
+                await on_text(text)
+    
+    result = text.strip()
+    await asyncio.to_thread(llm_cache.put, model, prompt, result)
+    return result
+
+
+def parse_slides(text):
+    """{'slide_n': text} for every complete `SLIDE n: ...` line"""
+    slides = {}
+    for line in text.split('\n'):
+        line = line.strip().replace('**', '')
+        if line.startswith('SLIDE'):
+            parts = line.split(':', 1)
+            if len(parts) == 2:
+                slide_num = parts[0].strip().replace('SLIDE ', '')
+                slides[f'slide_{slide_num}'] = parts[1].strip()
+    return slides
 
 
 def generate_design_intent(slides_data):
@@ -319,11 +616,7 @@ Bad example:
 
 Analyze:"""
 
-        response = client_gemini.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt
-        )
-        result = response.text.strip()
+        result = await generate_text(prompt)
         
         needs_photo = False
         reason = ""
@@ -345,7 +638,7 @@ Analyze:"""
         }
         
     except Exception as e:
-        print(f"Asset analysis failed: {e}")
+        log.warning("Asset analysis failed: %s", e)
         return {
             'needs_photo': False,
             'reason': 'Analysis failed, using Canva only',
@@ -353,450 +646,434 @@ Analyze:"""
         }
 
 
-async def upload_to_drive(file_data, filename, mimetype):
-    """Upload file to Google Drive"""
-    if not drive_service:
-        return None
+async def upload_attachments_to_drive(attachments):
+    """Upload Discord attachments to Google Drive in parallel and return their view links"""
+    try:
+        await startup.wait('drive', timeout=STARTUP_WAIT)
+    except ComponentUnavailable as e:
+        log.warning("Drive unavailable: %s", e)
+        return []
+    
+    file_ids = await drive_transfer.upload_attachments(attachments)
+    return [
+        f"https://drive.google.com/file/d/{file_id}/view"
+        for file_id in file_ids if file_id
+    ]
+
+
+async def download_visuals(visual_links):
+    """
+    Fetch Drive visuals through the asset cache and return local paths in slide order
     
+    The files stay pinned in the cache; pass the paths to asset_cache.release() when done.
+    Raises if any slide can't be fetched, so a carousel never goes out with slides missing.
+    """
+    await startup.wait('drive', timeout=STARTUP_WAIT)
+    
+    file_ids = []
+    for link in visual_links:
+        try:
+            file_ids.append(link.split('/d/')[1].split('/')[0])
+        except Exception as e:
+            raise RuntimeError(f"Bad visual link {link}") from e
+    
+    paths = await asset_cache.fetch_many(file_ids)
+    fetched = [path for path in paths if path]
+    if len(fetched) < len(paths):
+        asset_cache.release(fetched)
+        raise RuntimeError(f"Only {len(fetched)}/{len(paths)} slides downloaded")
+    return fetched
+
+
+async def update_content_state(row_num, state, **kwargs):
+    """Queue a content state transition; all cells land in one batched write"""
     try:
-        file_metadata = {'name': filename}
-        media = MediaIoBaseUpload(
-            io.BytesIO(file_data),
-            mimetype=mimetype,
-            resumable=True
-        )
-        
-        file = drive_service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id'
-        ).execute()
+        cells = {'L': state}
+        for field, value in kwargs.items():
+            cells[CONTENT_COLUMNS[field]] = value
         
-        return file.get('id')
+        content_writes.write(row_num, cells)
+        content_cache.set_cells(row_num, {
+            ord(letter) - ord('A'): value for letter, value in cells.items()
+        })
+        log.info("Updated row %s to: %s", row_num, state)
     except Exception as e:
-        print(f"Drive upload failed: {e}")
-        return None
+        log.error("State update failed: %s", e)
 
 
-async def download_from_drive(file_id, local_path):
-    """Download file from Google Drive"""
-    if not drive_service:
-        return False
+async def init_linkedin_poster():
+    """Launch the browser; linkedin_poster stays None if it won't start"""
+    global linkedin_poster
     
     try:
-        request = drive_service.files().get_media(fileId=file_id)
-        fh = io.FileIO(local_path, 'wb')
-        downloader = MediaIoBaseDownload(fh, request)
-        
-        done = False
-        while not done:
-            status, done = downloader.next_chunk()
-        
-        fh.close()
-        return True
+        linkedin_poster = new_linkedin_poster()
+        await linkedin_poster.init_browser()
     except Exception as e:
-        print(f"Drive download failed: {e}")
-        return False
+        log.error("LinkedIn init failed: %s", e)
+        linkedin_poster = None
 
 
-def get_content_row_by_timestamp(timestamp):
-    """Get row number by timestamp"""
-    all_rows = content_sheet.get_all_values()
-    for idx, row in enumerate(all_rows[1:], start=2):
-        if row[0] == timestamp:
-            return idx
-    return None
+async def wait_for_linkedin():
+    """Return the poster, launching the browser if it isn't running (None if it won't start)"""
+    async with linkedin_lock:
+        if not linkedin_poster:
+            await init_linkedin_poster()
+    return linkedin_poster
 
 
-def update_content_state(row_num, state, **kwargs):
-    """Update content state"""
-    try:
-        content_sheet.update(values=[[state]], range_name=f'L{row_num}')
-        
-        if 'design_intent' in kwargs:
-            content_sheet.update(values=[[kwargs['design_intent']]], range_name=f'M{row_num}')
-        if 'required_assets' in kwargs:
-            content_sheet.update(values=[[kwargs['required_assets']]], range_name=f'N{row_num}')
-        if 'asset_links' in kwargs:
-            content_sheet.update(values=[[kwargs['asset_links']]], range_name=f'O{row_num}')
-        if 'visual_links' in kwargs:
-            content_sheet.update(values=[[kwargs['visual_links']]], range_name=f'P{row_num}')
-        if 'scheduled_time' in kwargs:
-            content_sheet.update(values=[[kwargs['scheduled_time']]], range_name=f'Q{row_num}')
-        if 'posted_time' in kwargs:
-            content_sheet.update(values=[[kwargs['posted_time']]], range_name=f'R{row_num}')
-        if 'posting_status' in kwargs:
-            content_sheet.update(values=[[kwargs['posting_status']]], range_name=f'S{row_num}')
-        if 'error_log' in kwargs:
-            content_sheet.update(values=[[kwargs['error_log']]], range_name=f'T{row_num}')
-        
-        print(f"Updated row {row_num} to: {state}")
-    except Exception as e:
-        print(f"State update failed: {e}")
+async def close_linkedin():
+    """Shut the browser down unless someone is still using it"""
+    global linkedin_poster
+    
+    async with linkedin_lock:
+        if linkedin_poster and linkedin_users == 0:
+            poster, linkedin_poster = linkedin_poster, None
+            try:
+                await poster.close()
+            except Exception as e:
+                log.warning("Closing the browser failed: %s", e)
 
 
-async def init_linkedin_poster():
-    """Initialize LinkedIn poster"""
-    global linkedin_poster
+@asynccontextmanager
+async def using_linkedin():
+    """The poster (or None) for the duration of the block; the browser closes after the last user"""
+    global linkedin_users
     
+    linkedin_users += 1
     try:
-        linkedin_poster = LinkedInPoster()
-        await linkedin_poster.init_browser()
-        
-        is_valid = await linkedin_poster.check_session()
+        yield await wait_for_linkedin()
+    finally:
+        linkedin_users -= 1
+        if linkedin_users == 0:
+            await close_linkedin()
+
+
+async def refresh_linkedin_session():
+    """Check every LinkedIn session, starting the browser just for the check"""
+    async with using_linkedin() as poster:
+        if not poster:
+            return
         
-        if not is_valid:
-            user = await bot.fetch_user(int(MY_USER_ID))
-            await user.send(
-                "⚠️ **LinkedIn Login Required**\n\n"
-                "Use `/linkedin login` when ready."
-            )
-        else:
-            print("LinkedIn session valid")
+        for account in poster.accounts:
+            if not await poster.check_session(account, force=True):
+                user = await bot.fetch_user(int(MY_USER_ID))
+                await user.send(
+                    f"⚠️ **LinkedIn session expired** ({account})\n\n"
+                    f"Use `/linkedin login {account}` to re-authenticate"
+                )
+
+
+async def dm_owner(text):
+    """Send a DM to the bot owner"""
+    user = await bot.fetch_user(int(MY_USER_ID))
+    await user.send(text)
+
+
+async def warm_up_publish(account):
+    """
+    Scheduled shortly before a publish: start the browser and make sure the session is live
+    
+    The browser is left running for the publish job, which closes it when done.
+    """
+    watchdog.label('job:warm_up_publish')
+    correlation_id.set(new_correlation_id('warm_up_publish'))
+    poster = await wait_for_linkedin()
+    
+    if poster and not await poster.check_session(account, force=True):
+        await dm_owner(
+            f"⚠️ **LinkedIn session expired** ({account})\n\n"
+            f"A post is due in {PUBLISH_WARMUP_MINUTES} minutes. "
+            f"Use `/linkedin login {account}`"
+        )
+
+
+async def enqueue_publish(payload):
+    """Scheduled at publish time: hand the post to the durable job queue"""
+    watchdog.label('job:enqueue_publish')
+    correlation_id.set(new_correlation_id('enqueue_publish'))
+    job_id, created = job_queue.enqueue(
+        'publish_carousel', payload, key=f"post:{payload['row_num']}"
+    )
+    if created:
+        await update_content_state(payload['row_num'], PostState.READY_TO_POST)
+    log.info("Publish job %s for row %s %s", job_id, payload['row_num'], 'queued' if created else 'already exists')
+
+
+def schedule_publish(payload):
+    """
+    Put an approved post on the bot's own timeline
+    
+    Adds a warm-up job and a publish job as DateTriggers in the persistent
+    jobstore. Job IDs are derived from the content row, so confirming the
+    same row again just moves its slot.
+    """
+    publish_at = datetime.fromisoformat(payload['scheduled_time'])
+    warmup_at = publish_at - timedelta(minutes=PUBLISH_WARMUP_MINUTES)
+    row_num = payload['row_num']
+    
+    if warmup_at > datetime.now(timezone.utc):
+        scheduler.add_job(
+            warm_up_publish,
+            DateTrigger(run_date=warmup_at),
+            args=[payload.get('account', DEFAULT_ACCOUNT)],
+            id=f"warmup:{row_num}",
+            jobstore='publish',
+            replace_existing=True,
+            misfire_grace_time=PUBLISH_WARMUP_MINUTES * 60
+        )
+    
+    # No misfire limit: a publish missed during downtime still goes out on restart
+    scheduler.add_job(
+        enqueue_publish,
+        DateTrigger(run_date=publish_at),
+        args=[payload],
+        id=f"publish:{row_num}",
+        jobstore='publish',
+        replace_existing=True,
+        misfire_grace_time=None,
+        coalesce=True
+    )
+
+
+async def publish_carousel_job(payload):
+    """Job handler: download visuals, publish on LinkedIn now, record the result"""
+    await startup.wait('sheets', timeout=STARTUP_WAIT)
+    
+    done = payload.get('checkpoints', {})
+    
+    if done.get('posted_time'):
+        # An earlier attempt published the post and died before finishing; never post twice
+        log.warning("Row %s was already posted at %s, only recording it", payload['row_num'], done['posted_time'])
+        posted_time = datetime.fromisoformat(done['posted_time'])
+    elif done.get('publish_clicked'):
+        # The process died between clicking Post and LinkedIn confirming it
+        raise NoRetry("Post was clicked but never confirmed")
+    else:
+        # The bot owns the timeline, so the post goes out immediately when its slot fires.
+        # The browser (started by the warm-up, or here) shuts down once this attempt is over;
+        # the slides stay pinned until it has uploaded them
+        async with using_linkedin() as poster:
+            if not poster:
+                raise RuntimeError("LinkedIn browser failed to start")
             
+            image_paths = await download_visuals(payload['visual_links'])
+            try:
+                result = await poster.post_carousel(
+                    caption=payload['caption'],
+                    image_paths=image_paths,
+                    account=payload.get('account', DEFAULT_ACCOUNT),
+                    on_publish=lambda: job_queue.checkpoint(publish_clicked=datetime.now(timezone.utc).isoformat())
+                )
+            finally:
+                asset_cache.release(image_paths)
+        
+        if not result['success']:
+            if result['published']:
+                # The post may be live; a retry could publish it twice
+                raise NoRetry(f"Post was clicked but not confirmed: {result['error']}")
+            raise RuntimeError(result['error'])
+        
+        posted_time = datetime.now(timezone.utc)
+        done = {'posted_time': posted_time.isoformat(), 'post_url': result['post_url']}
+        job_queue.checkpoint(**done)
+    
+    # The post is live: from here on failures are logged, never retried
+    try:
+        await update_content_state(
+            payload['row_num'],
+            PostState.POSTED,
+            posted_time=posted_time.isoformat(),
+            posting_status="SUCCESS"
+        )
     except Exception as e:
-        print(f"LinkedIn init failed: {e}")
-        linkedin_poster = None
+        log.error("Row %s posted but its state was not recorded: %s", payload['row_num'], e)
+    
+    try:
+        await dm_owner(
+            f"✅ **Posted**\n\n"
+            f"Time: {posted_time.strftime('%Y-%m-%d %H:%M UTC')}\n"
+            f"{done.get('post_url') or 'Check your LinkedIn feed.'}"
+        )
+    except Exception as e:
+        log.error("Posted notification failed: %s", e)
+    return PostState.POSTED
 
 
-async def refresh_linkedin_session():
-    """Check LinkedIn session"""
-    global linkedin_poster
+async def on_job_dead(job, error):
+    """A job ran out of retries: mark its row FAILED and tell the owner"""
+    payload = json.loads(job['payload'])
     
-    if linkedin_poster and not await linkedin_poster.check_session():
-        user = await bot.fetch_user(int(MY_USER_ID))
-        await user.send(
-            "⚠️ **LinkedIn session expired**\n\n"
-            "Use `/linkedin login` to re-authenticate"
+    if 'row_num' in payload:
+        await update_content_state(
+            payload['row_num'],
+            PostState.FAILED,
+            posting_status="FAILED",
+            error_log=error
+        )
+    
+    if payload.get('checkpoints', {}).get('publish_clicked'):
+        await dm_owner(
+            f"⚠️ **Needs review**: row {payload.get('row_num')} may already be live\n\n"
+            f"Error: {error}\n"
+            f"Check your LinkedIn feed; only if the post is missing, `/jobs retry {job['id']}`"
         )
+        return
+    
+    await dm_owner(
+        f"❌ **Failed** after {job['attempts']} attempts\n\n"
+        f"Error: {error}\n"
+        f"Try `/linkedin login`, then `/jobs retry {job['id']}`"
+    )
+
+
+job_queue.register('publish_carousel', watchdog.track('job:publish_carousel')(publish_carousel_job))
+job_queue.on_dead = on_job_dead
 
 
 # ---- DISCORD EVENTS ----
+@bot.before_invoke
+async def label_command(ctx):
+    watchdog.label(f"/{ctx.command.qualified_name}")
+    correlation_id.set(new_correlation_id(ctx.command.qualified_name))
+
+
+@bot.after_invoke
+async def unlabel_command(ctx):
+    watchdog.label(None)
+
+
+@bot.event
+async def setup_hook():
+    # Runs while the gateway connection is being made; warm-up continues in the background
+    global loop_lag_task
+    startup.start()
+    watchdog.start()
+    loop_lag_task = asyncio.ensure_future(metrics.watch_loop_lag())
+    
+    # METRICS_PORT=9108 exposes the same numbers to a local Prometheus scraper
+    if os.getenv("METRICS_PORT"):
+        try:
+            await metrics.serve(port=int(os.getenv("METRICS_PORT")))
+        except OSError as e:
+            # A taken port must not keep the bot offline; /metrics still works in Discord
+            log.error("Metrics endpoint not started: %s", e)
+
+
 @bot.event
 async def on_ready():
-    print(f"LinCon online as {bot.user}")
+    log.info("LinCon online as %s (%.2fs after start)", bot.user, time.perf_counter() - STARTED_AT)
     
-    await init_linkedin_poster()
+    job_queue.start(workers=2)
     
     if not scheduler.running:
         scheduler.add_job(
-            send_daily_question,
+            scheduled('daily_question', send_daily_question),
             CronTrigger(hour=20, minute=0),
             id='daily_question',
             replace_existing=True
         )
         
         scheduler.add_job(
-            classify_memories,
+            scheduled('classify_memories', classify_memories),
             CronTrigger(hour=23, minute=0),
             id='classify_memories',
             replace_existing=True
         )
         
         scheduler.add_job(
-            refresh_linkedin_session,
+            sessions.sweep,
+            CronTrigger(minute=0),
+            id='session_sweep',
+            replace_existing=True
+        )
+        
+        scheduler.add_job(
+            scheduled('linkedin_check', refresh_linkedin_session),
             CronTrigger(hour=6, minute=0),
             id='linkedin_check',
             replace_existing=True
         )
         
         scheduler.start()
-        print("Scheduler started")
+        log.info("Scheduler started")
 
 
 @bot.event
 async def on_message(message):
-    global current_draft, pending_approval, pending_asset_request
-    global pending_visual_confirmation, pending_post_confirmation
-    
     if message.author == bot.user:
         return
 
     if isinstance(message.channel, discord.DMChannel):
         content_lower = message.content.lower().strip()
+        correlation_id.set(new_correlation_id("dm"))
         
         if message.content.startswith('/'):
             await bot.process_commands(message)
             return
         
-        # Handle CONFIRM/RESCHEDULE/CANCEL
-        if pending_post_confirmation and content_lower in ['confirm', 'reschedule', 'cancel']:
-            if content_lower == 'confirm':
-                row_num = pending_post_confirmation['row_num']
-                scheduled_time_str = pending_post_confirmation['scheduled_time']
-                content_item = pending_post_confirmation['content']
-                
-                await message.channel.send("🔄 **Scheduling to LinkedIn...**")
-                
-                visual_links = content_item.get('visual_links', '').split(',')
-                visual_links = [link.strip() for link in visual_links if link.strip()]
-                
-                if not visual_links:
-                    await message.channel.send("❌ No visuals found")
-                    pending_post_confirmation = None
-                    return
-                
-                image_paths = []
-                for link in visual_links:
-                    try:
-                        file_id = link.split('/d/')[1].split('/')[0]
-                        local_path = f"/tmp/{file_id}.png"
-                        
-                        if await download_from_drive(file_id, local_path):
-                            image_paths.append(local_path)
-                    except Exception as e:
-                        print(f"File download failed: {e}")
-                
-                if not image_paths:
-                    await message.channel.send("❌ Download failed")
-                    pending_post_confirmation = None
-                    return
-                
-                scheduled_time = datetime.fromisoformat(scheduled_time_str)
-                result = await linkedin_poster.post_carousel(
-                    caption=content_item['content'],
-                    image_paths=image_paths,
-                    scheduled_time=scheduled_time
-                )
-                
-                if result['success']:
-                    update_content_state(
-                        row_num,
-                        PostState.SCHEDULED,
-                        scheduled_time=scheduled_time_str,
-                        posting_status="SUCCESS"
-                    )
-                    
-                    await message.channel.send(
-                        f"✅ **Scheduled**\n\n"
-                        f"Time: {scheduled_time.strftime('%Y-%m-%d %H:%M UTC')}\n"
-                        f"Check LinkedIn drafts."
-                    )
-                else:
-                    update_content_state(
-                        row_num,
-                        PostState.FAILED,
-                        posting_status="FAILED",
-                        error_log=result['error']
-                    )
-                    
-                    await message.channel.send(
-                        f"❌ **Failed**\n\n"
-                        f"Error: {result['error']}\n"
-                        f"Try `/linkedin login`"
-                    )
-                
-                pending_post_confirmation = None
-                
-            elif content_lower == 'cancel':
-                row_num = pending_post_confirmation['row_num']
-                update_content_state(row_num, PostState.FAILED, error_log="Cancelled")
-                await message.channel.send("❌ **Cancelled**")
-                pending_post_confirmation = None
-            
-            return
+        # A bare keyword (optionally followed by a draft or row number) answers an open session
+        words = content_lower.split()
+        event = words[0] if 0 < len(words) <= 2 else ''
+        ref = words[1].lstrip('#') if len(words) == 2 else None
         
-        # Handle DONE
-        if pending_visual_confirmation and content_lower == 'done':
-            if message.attachments:
-                asset_links = []
-                
-                for attachment in message.attachments:
-                    file_data = await attachment.read()
-                    file_id = await upload_to_drive(
-                        file_data,
-                        attachment.filename,
-                        attachment.content_type or 'image/png'
-                    )
-                    if file_id:
-                        asset_links.append(f"https://drive.google.com/file/d/{file_id}/view")
-                
-                row_num = pending_visual_confirmation['row_num']
-                update_content_state(
-                    row_num,
-                    PostState.VISUALS_READY,
-                    visual_links=', '.join(asset_links)
-                )
-                
-                await message.channel.send(
-                    "✅ **Visuals stored**\n\n"
-                    "Use `/post preview` to review."
-                )
-                
-                pending_visual_confirmation = None
-            else:
-                await message.channel.send("⚠️ **No images found**")
-            
-            return
+        if not sessions.accepts(event) and message.attachments:
+            event, ref = 'attachments', None
         
-        # Handle SKIP or asset upload
-        if pending_asset_request:
-            if content_lower == 'skip':
-                row_num = pending_asset_request['row_num']
-                update_content_state(row_num, PostState.ASSETS_ATTACHED, required_assets="SKIPPED")
-                
-                await message.channel.send("✅ **Proceeding without assets**")
-                
-                await create_visuals(message.channel, pending_asset_request)
-                pending_asset_request = None
-                
-            elif message.attachments:
-                asset_links = []
-                
-                for attachment in message.attachments:
-                    file_data = await attachment.read()
-                    file_id = await upload_to_drive(
-                        file_data,
-                        attachment.filename,
-                        attachment.content_type or 'image/png'
-                    )
-                    if file_id:
-                        asset_links.append(f"https://drive.google.com/file/d/{file_id}/view")
-                
-                row_num = pending_asset_request['row_num']
-                update_content_state(
-                    row_num,
-                    PostState.ASSETS_ATTACHED,
-                    asset_links=', '.join(asset_links)
-                )
-                
-                await message.channel.send(f"✅ **{len(asset_links)} file(s) saved**")
-                
-                await create_visuals(message.channel, pending_asset_request)
-                pending_asset_request = None
-            
+        # Every reply flow reads or writes the sheets. Gemini is waited for only where it is called
+        # (generate_text, e.g. asset analysis on approve), so memories, reject, revise, confirm
+        # and done all work while Gemini is down
+        session_reply = sessions.accepts(event) and sessions.find(message.author.id, event, ref) is not None
+        try:
+            await startup.wait('sheets', timeout=STARTUP_WAIT)
+        except ComponentUnavailable as e:
+            await message.channel.send(f"⏳ Not ready: {e}")
             return
         
-        # Handle approve/revise/reject
-        if pending_approval and content_lower in ['approve', 'revise', 'reject']:
-            if content_lower == 'approve':
-                for row_num in pending_approval['source_rows']:
-                    brain_sheet.update(values=[['YES']], range_name=f'F{row_num}')
-                
-                content_row = [
-                    datetime.now(timezone.utc).isoformat(),
-                    pending_approval['type'],
-                    pending_approval['content'],
-                    pending_approval.get('slide_2', ''),
-                    pending_approval.get('slide_3', ''),
-                    pending_approval.get('slide_4', ''),
-                    pending_approval.get('slide_5', ''),
-                    pending_approval.get('slide_6', ''),
-                    pending_approval.get('slide_7', ''),
-                    'APPROVED',
-                    ','.join(map(str, pending_approval['source_rows'])),
-                    PostState.CONTENT_READY,
-                    '', '', '', '', '', '', '', ''
-                ]
-                content_sheet.append_row(content_row)
-                
-                await message.channel.send("✅ **Approved**\n\nState: CONTENT_READY")
-                
-                if pending_approval['type'] == 'carousel':
-                    timestamp = content_row[0]
-                    await asyncio.sleep(2)
-                    
-                    row_num = get_content_row_by_timestamp(timestamp)
-                    
-                    if row_num:
-                        slides = [
-                            pending_approval['content'],
-                            pending_approval.get('slide_2', ''),
-                            pending_approval.get('slide_3', ''),
-                            pending_approval.get('slide_4', ''),
-                            pending_approval.get('slide_5', ''),
-                            pending_approval.get('slide_6', ''),
-                            pending_approval.get('slide_7', '')
-                        ]
-                        slides = [s for s in slides if s]
-                        
-                        dio = generate_design_intent(slides)
-                        update_content_state(row_num, PostState.CONTENT_READY, design_intent=dio)
-                        
-                        memories_list = []
-                        for mem_row in pending_approval['source_rows']:
-                            row_data = brain_sheet.row_values(mem_row)
-                            if len(row_data) > 2:
-                                memories_list.append(row_data[2])
-                        
-                        memories_text = "\n".join(memories_list)
-                        
-                        asset_analysis = await analyze_asset_needs(slides, memories_text)
-                        
-                        if asset_analysis['needs_photo']:
-                            update_content_state(
-                                row_num,
-                                PostState.ASSETS_REQUIRED,
-                                required_assets=asset_analysis['reason']
-                            )
-                            
-                            await message.channel.send(
-                                f"📸 **Real Photo Needed**\n\n"
-                                f"**Why:** {asset_analysis['reason']}\n\n"
-                                f"**What to photograph:**\n"
-                                f"{asset_analysis['photo_description']}\n\n"
-                                f"Upload photo or reply SKIP."
-                            )
-                            
-                            pending_asset_request = {
-                                'row_num': row_num,
-                                'slides': slides,
-                                'dio': dio
-                            }
-                        else:
-                            await create_visuals(message.channel, {
-                                'row_num': row_num,
-                                'slides': slides,
-                                'dio': dio
-                            })
-                
-                pending_approval = None
-                current_draft = None
-                
-            elif content_lower == 'reject':
-                await message.channel.send("❌ **Rejected**")
-                pending_approval = None
-                current_draft = None
-                
-            elif content_lower == 'revise':
-                await message.channel.send(
-                    "✏️ **Revision mode**\n\n"
-                    "Use `/draft text` or `/draft carousel`"
-                )
-                pending_approval = None
-            
+        watchdog.label(f"dm:{event}" if session_reply else "dm:memory")
+        
+        if session_reply and await sessions.dispatch(message.author.id, event, message, ref=ref):
             return
         
         # Store as memory
-        print("DM received:", message.content)
+        log.info("DM received: %s", message.content)
 
         try:
-            brain_sheet.append_row([
+            row_num = await brain_cache.append([
                 datetime.now(timezone.utc).isoformat(),
                 "Discord DM",
                 message.content,
                 "", "", "NO", ""
             ])
-            print("Row added")
-            
-            await message.channel.send("✅ Saved")
-            
+            log.info("Row %s added", row_num)
         except Exception as e:
-            print(f"FAILED: {e}")
+            log.exception("Storing memory failed: %s", e)
             await message.channel.send("⚠️ Failed")
+            return
+        
+        # The memory is saved; indexing it is best-effort and the next index sync catches up
+        duplicates = []
+        if memory_index:
+            try:
+                duplicates, vector = await memory_index.near_duplicates(message.content)
+                await memory_index.add(row_num, message.content, vector=vector)
+            except Exception as e:
+                log.warning("Indexing row %s failed: %s", row_num, e)
+        
+        if duplicates:
+            similar = ", ".join(f"row {dup_row}" for dup_row, _ in duplicates)
+            await message.channel.send(f"✅ Saved (very similar to {similar})")
+        else:
+            await message.channel.send("✅ Saved")
 
     await bot.process_commands(message)
 
 
 async def create_visuals(channel, context):
-    """Send Canva instructions"""
-    global pending_visual_confirmation
-    
+    """Send Canva instructions; the row's session then waits in ASSETS_ATTACHED for the exported slides"""
     row_num = context['row_num']
-    slides = context['slides']
     dio = context['dio']
     
-    update_content_state(row_num, PostState.ASSETS_ATTACHED)
+    await update_content_state(row_num, PostState.ASSETS_ATTACHED)
     
     await channel.send(
         f"🎨 **Canva Instructions**\n\n"
@@ -807,64 +1084,298 @@ async def create_visuals(channel, context):
         f"4. Upload here\n"
         f"5. Reply DONE"
     )
+
+
+# ---- CONVERSATION FLOWS ----
+# Each reply a flow waits for is a (state, event) transition; handlers return the next state
+# or None when the flow is done. Drafts are keyed 'draft:<number>', content 'row:<sheet row>'.
+
+@sessions.on(PostState.IDEA_CAPTURED, 'approve')
+async def approve_draft(session, message):
+    draft_data = session.data
     
-    pending_visual_confirmation = {
-        'row_num': row_num,
-        'slides': slides
-    }
+    await sheets.batch_update(brain_sheet, [
+        {'range': f'F{row_num}', 'values': [['YES']]}
+        for row_num in draft_data['source_rows']
+    ])
+    for row_num in draft_data['source_rows']:
+        brain_cache.set_cells(row_num, {5: 'YES'})
+    
+    content_row = [
+        datetime.now(timezone.utc).isoformat(),
+        draft_data['type'],
+        draft_data['content'],
+        draft_data.get('slide_2', ''),
+        draft_data.get('slide_3', ''),
+        draft_data.get('slide_4', ''),
+        draft_data.get('slide_5', ''),
+        draft_data.get('slide_6', ''),
+        draft_data.get('slide_7', ''),
+        'APPROVED',
+        ','.join(map(str, draft_data['source_rows'])),
+        PostState.CONTENT_READY,
+        '', '', '', '', '', '', '', ''
+    ]
+    row_num = await content_cache.append(content_row)
+    
+    await message.channel.send(f"✅ **Approved** (row {row_num})\n\nState: CONTENT_READY")
+    
+    if draft_data['type'] == 'carousel':
+        slides = [
+            draft_data['content'],
+            draft_data.get('slide_2', ''),
+            draft_data.get('slide_3', ''),
+            draft_data.get('slide_4', ''),
+            draft_data.get('slide_5', ''),
+            draft_data.get('slide_6', ''),
+            draft_data.get('slide_7', '')
+        ]
+        slides = [s for s in slides if s]
+        
+        dio = generate_design_intent(slides)
+        await update_content_state(row_num, PostState.CONTENT_READY, design_intent=dio)
+        
+        await brain_cache.ensure_fresh()
+        memories_list = []
+        for mem_row in draft_data['source_rows']:
+            row_data = brain_cache.row(mem_row)
+            if row_data:
+                memories_list.append(row_data[2])
+        
+        memories_text = "\n".join(memories_list)
+        
+        asset_analysis = await analyze_asset_needs(slides, memories_text)
+        
+        if asset_analysis['needs_photo']:
+            await update_content_state(
+                row_num,
+                PostState.ASSETS_REQUIRED,
+                required_assets=asset_analysis['reason']
+            )
+            
+            await message.channel.send(
+                f"📸 **Real Photo Needed** (row {row_num})\n\n"
+                f"**Why:** {asset_analysis['reason']}\n\n"
+                f"**What to photograph:**\n"
+                f"{asset_analysis['photo_description']}\n\n"
+                f"Upload photo or reply SKIP."
+            )
+            
+            sessions.open(session.user_id, f"row:{row_num}", PostState.ASSETS_REQUIRED, {
+                'row_num': row_num,
+                'slides': slides,
+                'dio': dio
+            })
+        else:
+            visuals = {'row_num': row_num, 'slides': slides, 'dio': dio}
+            await create_visuals(message.channel, visuals)
+            sessions.open(session.user_id, f"row:{row_num}", PostState.ASSETS_ATTACHED, visuals)
+    
+    return None
+
+
+@sessions.on(PostState.IDEA_CAPTURED, 'reject')
+async def reject_draft(session, message):
+    # Forget the rejected output so the next /draft asks the model again
+    await asyncio.to_thread(llm_cache.delete, 'gemini-2.5-flash', session.data['prompt'])
+    await message.channel.send("❌ **Rejected**")
+    return None
+
+
+@sessions.on(PostState.IDEA_CAPTURED, 'revise')
+async def revise_draft(session, message):
+    await asyncio.to_thread(llm_cache.delete, 'gemini-2.5-flash', session.data['prompt'])
+    await message.channel.send(
+        "✏️ **Revision mode**\n\n"
+        "Use `/draft text` or `/draft carousel`"
+    )
+    return None
+
+
+@sessions.on(PostState.ASSETS_REQUIRED, 'skip')
+async def skip_assets(session, message):
+    row_num = session.data['row_num']
+    await update_content_state(row_num, PostState.ASSETS_ATTACHED, required_assets="SKIPPED")
+    
+    await message.channel.send("✅ **Proceeding without assets**")
+    
+    await create_visuals(message.channel, session.data)
+    return PostState.ASSETS_ATTACHED
+
+
+@sessions.on(PostState.ASSETS_REQUIRED, 'attachments')
+async def attach_assets(session, message):
+    asset_links = await upload_attachments_to_drive(message.attachments)
+    
+    row_num = session.data['row_num']
+    await update_content_state(
+        row_num,
+        PostState.ASSETS_ATTACHED,
+        asset_links=', '.join(asset_links)
+    )
+    
+    await message.channel.send(f"✅ **{len(asset_links)} file(s) saved**")
+    
+    await create_visuals(message.channel, session.data)
+    return PostState.ASSETS_ATTACHED
+
+
+@sessions.on(PostState.ASSETS_ATTACHED, 'done')
+async def store_visuals(session, message):
+    if not message.attachments:
+        await message.channel.send("⚠️ **No images found**")
+        return session.state
+    
+    asset_links = await upload_attachments_to_drive(message.attachments)
+    
+    await update_content_state(
+        session.data['row_num'],
+        PostState.VISUALS_READY,
+        visual_links=', '.join(asset_links)
+    )
+    
+    await message.channel.send(
+        "✅ **Visuals stored**\n\n"
+        "Use `/post preview` to review."
+    )
+    return None
+
+
+@sessions.on(PostState.VISUALS_READY, 'confirm')
+async def confirm_schedule(session, message):
+    account = session.data.get('account', DEFAULT_ACCOUNT)
+    scheduled = []
+    
+    for entry in session.data['items']:
+        content_item = entry['content']
+        visual_links = content_item.get('visual_links', '').split(',')
+        visual_links = [link.strip() for link in visual_links if link.strip()]
+        
+        if not visual_links:
+            continue
+        
+        # The bot publishes at the slot itself; the job queue does the work when it fires
+        schedule_publish({
+            'row_num': entry['row_num'],
+            'scheduled_time': entry['scheduled_time'],
+            'caption': content_item['content'],
+            'visual_links': visual_links,
+            'account': account
+        })
+        
+        await update_content_state(
+            entry['row_num'],
+            PostState.SCHEDULED,
+            scheduled_time=entry['scheduled_time']
+        )
+        scheduled.append(entry)
+    
+    # Every transition goes out in a single batch_update
+    await content_writes.flush()
+    
+    if not scheduled:
+        await message.channel.send("❌ No visuals found")
+    else:
+        times = "\n".join([
+            f"• Row {entry['row_num']}: "
+            f"{datetime.fromisoformat(entry['scheduled_time']).strftime('%Y-%m-%d %H:%M UTC')}"
+            for entry in scheduled
+        ])
+        await message.channel.send(
+            f"✅ **Scheduled {len(scheduled)}**\n\n"
+            f"{times}\n\n"
+            f"You'll get a DM as each one is posted."
+        )
+    return None
+
+
+@sessions.on(PostState.VISUALS_READY, 'cancel')
+async def cancel_schedule(session, message):
+    for entry in session.data['items']:
+        await update_content_state(entry['row_num'], PostState.FAILED, error_log="Cancelled")
+    await content_writes.flush()
+    await message.channel.send("❌ **Cancelled**")
+    return None
 
 
 # ---- COMMANDS ----
 
 @bot.command(name='draft')
-async def draft(ctx, post_type: str = None):
-    """Generate draft"""
-    global current_draft, pending_approval
-    
+@needs('sheets', 'gemini')
+async def draft(ctx, post_type: str = None, *args):
+    """Generate draft, optionally about a topic (add `fresh` to skip the response cache)"""
     if not isinstance(ctx.channel, discord.DMChannel):
         return
     
     if post_type not in ['text', 'carousel']:
-        await ctx.send("Usage: `/draft text` or `/draft carousel`")
+        await ctx.send(
+            "Usage: `/draft text [topic]` or `/draft carousel [topic]` "
+            "(add `fresh` to regenerate)"
+        )
         return
     
-    await ctx.send(f"🔄 Generating {post_type}...")
+    fresh = 'fresh' in args
+    topic = " ".join(arg for arg in args if arg != 'fresh')
+    
+    live = await LiveMessage.send(ctx, f"🔄 Generating {post_type}...")
     
     try:
-        all_rows = brain_sheet.get_all_values()
+        await brain_cache.ensure_fresh()
         cutoff = datetime.now(timezone.utc) - timedelta(days=7)
         
+        unused_rows = brain_cache.row_nums_where(5, 'NO')
+        candidate_rows = set()
+        for memory_type in ['insight', 'failure', 'idea']:
+            candidate_rows |= brain_cache.row_nums_where(3, memory_type) & unused_rows
+        
+        # With a topic, search all unused memories by meaning instead of the last 7 days
+        relevance = None
+        if topic and memory_index:
+            await memory_index.sync({row_num: row[2] for row_num, row in brain_cache.data_rows()})
+            hits = await memory_index.search(topic, k=DRAFT_TOPIC_CANDIDATES, rows=candidate_rows)
+            relevance = dict(hits)
+            candidate_rows = set(relevance)
+        
         eligible_memories = []
-        for idx, row in enumerate(all_rows[1:], start=2):
-            if len(row) < 7:
+        for idx in sorted(candidate_rows):
+            row = brain_cache.row(idx)
+            memory_type = row[3].lower()
+            try:
+                timestamp = parse_sheet_time(row[0])
+                if relevance is not None or timestamp >= cutoff:
+                    eligible_memories.append({
+                        'row_num': idx,
+                        'type': memory_type,
+                        'content': row[2],
+                        'timestamp': timestamp,
+                        'relevance': relevance.get(idx) if relevance else None
+                    })
+            except:
                 continue
-            
-            memory_type = row[3].lower() if len(row) > 3 else ''
-            used = row[5].upper() if len(row) > 5 else 'NO'
-            
-            if memory_type in ['insight', 'failure', 'idea'] and used == 'NO':
-                try:
-                    timestamp = datetime.fromisoformat(row[0])
-                    if timestamp >= cutoff:
-                        eligible_memories.append({
-                            'row_num': idx,
-                            'type': memory_type,
-                            'content': row[2]
-                        })
-                except:
-                    continue
         
         if not eligible_memories:
-            await ctx.send("❌ No unused content from last 7 days")
+            await live.finish("❌ No unused content" + (f" about {topic}" if topic else " from last 7 days"))
             return
         
-        memories_text = "\n\n".join([
-            f"[{m['type'].upper()}] {m['content']}"
-            for m in eligible_memories
-        ])
+        # Only the best memories that fit the token budget go into the prompt
+        context = context_builder.build(eligible_memories, topic=topic or None)
+        memories_text = context['text']
+        source_rows = [m['row_num'] for m in context['selected']]
+        
+        topic_line = f" about {topic}" if topic else ""
+        
+        context_info = (
+            f"🧠 Context: {len(context['selected'])} memories, "
+            f"{context['tokens']}/{context['budget']} tokens"
+            + (f" ({len(context['dropped'])} dropped)" if context['dropped'] else "")
+        )
+        
+        # The preview is edited in place as Gemini streams, about once a second
+        draft_number = next(draft_numbers)
+        reply_hint = f"Reply: `approve` / `revise` / `reject` (add `{draft_number}` if several are open)"
         
         if post_type == 'text':
-            prompt = f"""Generate ONE LinkedIn text post:
+            prompt = f"""Generate ONE LinkedIn text post{topic_line}:
 
 {memories_text}
 
@@ -882,27 +1393,26 @@ RULES:
 
 Write:"""
 
-            response = client_gemini.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=prompt
-            )
-            draft_content = response.text.strip()
+            async def on_text(text):
+                await live.update(f"📄 **DRAFT #{draft_number}** ✍️\n\n───\n{text}▌\n───\n\n{context_info}")
+            
+            draft_content = await stream_text(prompt, on_text, fresh=fresh)
             
-            current_draft = {
+            sessions.open(ctx.author.id, f"draft:{draft_number}", PostState.IDEA_CAPTURED, {
                 'type': 'text',
+                'prompt': prompt,
                 'content': draft_content,
-                'source_rows': [m['row_num'] for m in eligible_memories]
-            }
-            pending_approval = current_draft
+                'source_rows': source_rows
+            })
             
-            await ctx.send(
-                f"📄 **DRAFT**\n\n"
+            await live.finish(
+                f"📄 **DRAFT #{draft_number}**\n\n"
                 f"───\n{draft_content}\n───\n\n"
-                f"Reply: `approve` / `revise` / `reject`"
+                f"{context_info}\n{reply_hint}"
             )
         
         elif post_type == 'carousel':
-            prompt = f"""Generate carousel (7 slides):
+            prompt = f"""Generate carousel (7 slides){topic_line}:
 
 {memories_text}
 
@@ -925,22 +1435,33 @@ SLIDE 7: [Insight]
 
 Write:"""
 
-            response = client_gemini.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=prompt
-            )
-            result = response.text.strip()
-            
             slides = {}
-            for line in result.split('\n'):
-                if line.startswith('SLIDE'):
-                    parts = line.split(':', 1)
-                    if len(parts) == 2:
-                        slide_num = parts[0].strip().replace('SLIDE ', '')
-                        slides[f'slide_{slide_num}'] = parts[1].strip()
+            parsed_upto = 0
+            
+            def carousel_preview():
+                return "\n".join([
+                    f"**Slide {i}:** {slides.get(f'slide_{i}', 'N/A')}"
+                    for i in range(1, 8)
+                ])
+            
+            async def on_text(text):
+                # Only complete lines are parsed, each one once
+                nonlocal parsed_upto
+                complete = text.rfind('\n') + 1
+                if complete > parsed_upto:
+                    slides.update(parse_slides(text[parsed_upto:complete]))
+                    parsed_upto = complete
+                    await live.update(
+                        f"🎨 **CAROUSEL #{draft_number}** ✍️ {len(slides)}/7\n\n"
+                        f"───\n{carousel_preview()}\n───\n\n{context_info}"
+                    )
             
-            current_draft = {
+            result = await stream_text(prompt, on_text, fresh=fresh)
+            slides.update(parse_slides(result[parsed_upto:]))
+            
+            sessions.open(ctx.author.id, f"draft:{draft_number}", PostState.IDEA_CAPTURED, {
                 'type': 'carousel',
+                'prompt': prompt,
                 'content': slides.get('slide_1', ''),
                 'slide_2': slides.get('slide_2', ''),
                 'slide_3': slides.get('slide_3', ''),
@@ -948,24 +1469,18 @@ Write:"""
                 'slide_5': slides.get('slide_5', ''),
                 'slide_6': slides.get('slide_6', ''),
                 'slide_7': slides.get('slide_7', ''),
-                'source_rows': [m['row_num'] for m in eligible_memories]
-            }
-            pending_approval = current_draft
+                'source_rows': source_rows
+            })
             
-            preview = "\n".join([
-                f"**Slide {i}:** {slides.get(f'slide_{i}', 'N/A')}"
-                for i in range(1, 8)
-            ])
-            
-            await ctx.send(
-                f"🎨 **CAROUSEL**\n\n"
-                f"───\n{preview}\n───\n\n"
-                f"Reply: `approve` / `revise` / `reject`"
+            await live.finish(
+                f"🎨 **CAROUSEL #{draft_number}**\n\n"
+                f"───\n{carousel_preview()}\n───\n\n"
+                f"{context_info}\n{reply_hint}"
             )
     
     except Exception as e:
-        print(f"Draft failed: {e}")
-        await ctx.send(f"⚠️ Failed: {e}")
+        log.exception("Draft failed: %s", e)
+        await live.finish(f"⚠️ Failed: {e}")
 
 
 @bot.command(name='status')
@@ -974,50 +1489,43 @@ async def status(ctx):
     if not isinstance(ctx.channel, discord.DMChannel):
         return
     
+    startup_info = "\n".join([
+        f"• {name}: {state}" + (f" ({seconds:.1f}s)" if seconds is not None else "")
+        + (f" — {error}" if error else "")
+        for name, (state, seconds, error) in startup.report().items()
+    ])
+    
+    if not startup.is_ready('sheets'):
+        await ctx.send(f"📊 **Status**\n\n**Startup:**\n{startup_info}")
+        return
+    
     try:
-        all_rows = brain_sheet.get_all_values()
+        await asyncio.gather(brain_cache.ensure_fresh(), content_cache.ensure_fresh())
+        
+        type_counts = brain_cache.count_by(3)
+        unused_rows = brain_cache.row_nums_where(5, 'NO')
         stats = {
-            'total': len(all_rows) - 1,
-            'unclassified': 0,
-            'work_log': 0,
-            'insight': 0,
-            'failure': 0,
-            'idea': 0,
-            'used': 0,
-            'unused': 0
+            'total': len(brain_cache.rows) - 1,
+            'unclassified': type_counts.get('', 0) + type_counts.get('raw', 0),
+            'work_log': type_counts.get('work_log', 0),
+            'insight': type_counts.get('insight', 0),
+            'failure': type_counts.get('failure', 0),
+            'idea': type_counts.get('idea', 0),
+            'used': len(brain_cache.row_nums_where(5, 'YES')),
+            'unused': sum(
+                len(brain_cache.row_nums_where(3, t) & unused_rows)
+                for t in ['insight', 'failure', 'idea']
+            )
         }
         
-        for row in all_rows[1:]:
-            if len(row) < 7:
-                continue
-            
-            memory_type = row[3].lower() if row[3] else ''
-            used = row[5].upper() if len(row) > 5 else 'NO'
-            
-            if not memory_type or memory_type == 'raw':
-                stats['unclassified'] += 1
-            else:
-                stats[memory_type] = stats.get(memory_type, 0) + 1
-            
-            if used == 'YES':
-                stats['used'] += 1
-            
-            if memory_type in ['insight', 'failure', 'idea'] and used == 'NO':
-                stats['unused'] += 1
-        
-        content_rows = content_sheet.get_all_values()
-        state_counts = {}
-        
-        for row in content_rows[1:]:
-            if len(row) > 11:
-                state = row[11]
-                state_counts[state] = state_counts.get(state, 0) + 1
+        state_counts = content_cache.count_by(11)
         
         state_info = "\n".join([
             f"• {state}: {count}" for state, count in state_counts.items()
         ]) if state_counts else "• None"
         
-        linkedin_status = "✅ Connected" if linkedin_poster else "❌ Not initialized"
+        linkedin_status = "✅ Browser running" if linkedin_poster else "💤 Browser starts for each post"
+        cache_stats = await asyncio.to_thread(llm_cache.stats)
         
         await ctx.send(
             f"📊 **Status**\n\n"
@@ -1027,7 +1535,12 @@ async def status(ctx):
             f"• Ideas: {stats['idea']}\n"
             f"• Unused: {stats['unused']}\n\n"
             f"**States:**\n{state_info}\n\n"
-            f"**LinkedIn:** {linkedin_status}"
+            f"**LinkedIn:** {linkedin_status}\n"
+            f"**Sheet writes:** {content_writes.cells_queued} cells in "
+            f"{content_writes.api_calls} calls ({content_writes.calls_saved} saved)\n"
+            f"**LLM cache:** {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['entries']} stored)\n\n"
+            f"**Startup:**\n{startup_info}"
         )
         
     except Exception as e:
@@ -1035,40 +1548,88 @@ async def status(ctx):
 
 
 @bot.command(name='classify')
-async def manual_classify(ctx):
-    """Classify memories"""
+@needs('sheets', 'gemini')
+async def manual_classify(ctx, *options):
+    """Classify new memories (`fresh` skips the response cache, `full` rescans the whole sheet)"""
     if not isinstance(ctx.channel, discord.DMChannel):
         return
     
-    await ctx.send("🔄 Classifying...")
-    await classify_memories()
-    await ctx.send("✅ Done")
+    progress = await LiveMessage.send(ctx, "🔄 Classifying...")
+    
+    async def on_progress(processed, total):
+        # Discord rate-limits edits, so only refresh about once a second
+        if processed < total:
+            await progress.update(f"🔄 Classifying... {processed}/{total}")
+        else:
+            await progress.finish(f"🔄 Classifying... {processed}/{total}")
+    
+    classified = await classify_memories(
+        on_progress=on_progress, fresh='fresh' in options, full='full' in options
+    )
+    await ctx.send(f"✅ Done ({classified} classified)")
+
+
+def scheduled_slots():
+    """Scheduled Time of every SCHEDULED content row, as datetimes"""
+    taken = []
+    for _, row in content_cache.rows_where(11, PostState.SCHEDULED):
+        try:
+            taken.append(parse_sheet_time(row[16]))
+        except ValueError:
+            continue
+    return taken
 
 
 @bot.command(name='post')
-async def post_command(ctx, action: str = None):
+@needs('sheets')
+async def post_command(ctx, action: str = None, *args):
     """Post management"""
-    global pending_post_confirmation
-    
     if not isinstance(ctx.channel, discord.DMChannel):
         return
     
-    if action not in ['preview', 'schedule']:
-        await ctx.send("Usage: `/post preview` or `/post schedule`")
+    if action not in ['preview', 'schedule', 'list']:
+        await ctx.send(
+            "Usage:\n"
+            "• `/post list`\n"
+            "• `/post preview`\n"
+            "• `/post schedule [all] [account]`"
+        )
         return
     
+    schedule_all = 'all' in args
+    account = next((arg for arg in args if arg != 'all'), DEFAULT_ACCOUNT)
+    
     try:
-        all_rows = content_sheet.get_all_values()
+        await content_cache.ensure_fresh()
         ready_content = []
         
-        for idx, row in enumerate(all_rows[1:], start=2):
-            if len(row) > 11 and row[11] == PostState.VISUALS_READY:
-                ready_content.append({
-                    'row_num': idx,
-                    'type': row[1],
-                    'content': row[2],
-                    'visual_links': row[15] if len(row) > 15 else ''
-                })
+        for idx, row in content_cache.rows_where(11, PostState.VISUALS_READY):
+            ready_content.append({
+                'row_num': idx,
+                'type': row[1],
+                'content': row[2],
+                'visual_links': row[15]
+            })
+        
+        if action == 'list':
+            ready_info = "\n".join([
+                f"• Row {item['row_num']} ({item['type']}): {item['content'][:60]}"
+                for item in ready_content[:20]
+            ]) if ready_content else "• None"
+            if len(ready_content) > 20:
+                ready_info += f"\n• …and {len(ready_content) - 20} more"
+            
+            upcoming = sorted(t for t in scheduled_slots() if t > datetime.now(timezone.utc))
+            upcoming_info = "\n".join([
+                f"• {t.strftime('%Y-%m-%d %H:%M UTC')}" for t in upcoming[:10]
+            ]) if upcoming else "• None"
+            
+            await ctx.send(
+                f"🗂️ **Ready to schedule ({len(ready_content)})**\n{ready_info}\n\n"
+                f"**Upcoming slots:**\n{upcoming_info}\n\n"
+                f"Use `/post schedule all`"
+            )
+            return
         
         if not ready_content:
             await ctx.send("❌ No content ready")
@@ -1086,31 +1647,47 @@ async def post_command(ctx, action: str = None):
             )
         
         elif action == 'schedule':
-            if not linkedin_poster:
-                await ctx.send("❌ LinkedIn not initialized\n\nUse `/linkedin login`")
+            # The session itself is checked by the warm-up before each publish
+            if account not in LINKEDIN_ACCOUNT_NAMES:
+                await ctx.send(f"❌ Unknown account `{account}`")
                 return
             
-            if not item['visual_links']:
+            targets = [i for i in ready_content if i['visual_links']] if schedule_all else [item]
+            
+            if not targets or not targets[0]['visual_links']:
                 await ctx.send("❌ No visuals")
                 return
             
-            scheduled_time = (datetime.now(timezone.utc) + timedelta(days=1)).replace(
-                hour=14, minute=0, second=0, microsecond=0
-            ).isoformat()
+            # Give each item the next free slot on the posting calendar
+            slots = posting_calendar.next_free_slots(len(targets), taken=scheduled_slots())
             
-            pending_post_confirmation = {
-                'row_num': item['row_num'],
-                'scheduled_time': scheduled_time,
-                'content': item
-            }
+            # One confirmation per user; a new /post schedule replaces the previous one
+            sessions.open(ctx.author.id, 'post', PostState.VISUALS_READY, replace=True, data={
+                'items': [
+                    {
+                        'row_num': target['row_num'],
+                        'scheduled_time': slot.isoformat(),
+                        'content': target
+                    }
+                    for target, slot in zip(targets, slots)
+                ],
+                'account': account
+            })
             
-            visual_count = len([v for v in item['visual_links'].split(',') if v.strip()])
+            plan = "\n".join([
+                f"• Row {target['row_num']} ({target['type']}, "
+                f"{len([v for v in target['visual_links'].split(',') if v.strip()])} slides): "
+                f"{slot.strftime('%Y-%m-%d %H:%M UTC')}"
+                for target, slot in zip(targets[:20], slots)
+            ])
+            if len(targets) > 20:
+                plan += f"\n• …and {len(targets) - 20} more"
             
             await ctx.send(
                 f"📅 **Final Approval**\n\n"
-                f"**Type:** {item['type']}\n"
-                f"**Time:** {datetime.fromisoformat(scheduled_time).strftime('%Y-%m-%d %H:%M UTC')}\n"
-                f"**Slides:** {visual_count}\n\n"
+                f"**Account:** {account}\n"
+                f"**Posts:** {len(targets)}\n"
+                f"{plan}\n\n"
                 f"Reply:\n"
                 f"• `CONFIRM`\n"
                 f"• `CANCEL`"
@@ -1120,11 +1697,132 @@ async def post_command(ctx, action: str = None):
         await ctx.send(f"⚠️ Failed: {e}")
 
 
+@bot.command(name='jobs')
+async def jobs_command(ctx, action: str = None, job_id: int = None):
+    """Job queue status and dead-letter retries"""
+    if not isinstance(ctx.channel, discord.DMChannel):
+        return
+    
+    if action == 'retry':
+        if job_id is None:
+            await ctx.send("Usage: `/jobs retry <id>`")
+        elif job_queue.retry(job_id):
+            await ctx.send(f"🔁 Job {job_id} queued again")
+        else:
+            await ctx.send(f"❌ Job {job_id} is not in the dead-letter list")
+        return
+    
+    counts = job_queue.counts()
+    count_info = "\n".join([
+        f"• {state}: {count}" for state, count in counts.items()
+    ]) if counts else "• None"
+    
+    dead = job_queue.dead_letters(limit=10)
+    dead_info = "\n".join([
+        f"• #{job['id']} {job['key']}: {job['last_error']}" for job in dead
+    ]) if dead else "• None"
+    
+    await ctx.send(
+        f"🧾 **Jobs**\n\n"
+        f"{count_info}\n\n"
+        f"**Dead letters:**\n{dead_info}\n\n"
+        f"Use `/jobs retry <id>`"
+    )
+
+
+@bot.command(name='metrics')
+async def metrics_command(ctx, limit: int = 12):
+    """Slowest operations by total time, with error / quota counts and event loop lag"""
+    if not isinstance(ctx.channel, discord.DMChannel):
+        return
+    
+    def fmt(seconds):
+        return "-" if seconds is None else f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.1f}s"
+    
+    rows = [row for row in metrics.summary() if row[0] != 'event_loop.lag'][:limit]
+    lines = [
+        f"{op:<30} {count:>5} {errors:>3}/{quota:<3} {fmt(p50):>7} {fmt(p95):>7} {fmt(longest):>7} {fmt(total):>7}"
+        for op, count, errors, quota, p50, p95, longest, total in rows
+    ]
+    table = "\n".join(
+        [f"{'op':<30} {'calls':>5} {'err/429':<7} {'p50':>7} {'p95':>7} {'max':>7} {'total':>7}"] + lines
+    ) if lines else "No calls recorded yet"
+    
+    lag = metrics.histograms.get('event_loop.lag')
+    lag_info = (
+        f"p50 {fmt(lag.quantile(0.5))}, p95 {fmt(lag.quantile(0.95))}, max {fmt(lag.max)}"
+        if lag else "not measured yet"
+    )
+    blocked = linkedin_poster.blocked_requests if linkedin_poster else 0
+    stall_info = "\n".join(
+        f"• {stall['seconds']:.2f}s in {stall['activity']}" for stall in list(watchdog.stalls)[-3:]
+    ) or "• None"
+    uptime = (time.time() - metrics.started_at) / 3600
+    jobs_info = ", ".join(
+        f"{metrics.counters.get(f'jobs.{outcome}', 0)} {outcome.replace('_', '-')}"
+        for outcome in ('finished', 'retried', 'dead_lettered')
+    )
+    
+    await ctx.send(
+        f"⏱️ **Metrics** ({uptime:.1f}h)\n"
+        f"```\n{table[:1500]}\n```\n"
+        f"**Event loop lag:** {lag_info}\n"
+        f"**LinkedIn requests blocked:** {blocked}\n"
+        f"**Jobs:** {jobs_info}\n"
+        f"**Recent stalls:**\n{stall_info}"
+    )
+
+
+@bot.command(name='profile')
+async def profile_command(ctx, command_name: str = None, *, args: str = ""):
+    """Run one command under the sampling profiler, e.g. `/profile draft insight`"""
+    if not isinstance(ctx.channel, discord.DMChannel):
+        return
+    
+    if bot.get_command(command_name or '') is None or command_name == 'profile':
+        await ctx.send("Usage: `/profile <command> [args...]`")
+        return
+    
+    # Re-parse the message as the profiled command so its checks and converters run as usual
+    original = ctx.message.content
+    ctx.message.content = f"{ctx.prefix}{command_name} {args}".strip()
+    try:
+        inner = await bot.get_context(ctx.message)
+    finally:
+        ctx.message.content = original
+    
+    with SamplingProfiler(threading.get_ident(), interval=0.005) as profiler:
+        await bot.invoke(inner)
+    
+    # The .folded attachment opens in speedscope or flamegraph.pl
+    await ctx.send(
+        f"🔥 **Profile of /{command_name}**\n```\n{profiler.summary()[:1800]}\n```",
+        file=discord.File(io.BytesIO(profiler.folded().encode()), filename=f"profile_{command_name}.folded")
+    )
+
+
+@bot.command(name='loglevel')
+async def loglevel_command(ctx, subsystem: str = None, level: str = None):
+    """Show log levels, or change one subsystem's level: /loglevel linkedin_poster debug"""
+    if not isinstance(ctx.channel, discord.DMChannel):
+        return
+    
+    if subsystem and level:
+        if not set_level(subsystem, level):
+            await ctx.send("Levels: debug, info, warning, error, critical")
+            return
+        log.info("Log level of %s set to %s", subsystem, level.upper())
+    
+    levels = "\n".join(f"• {name}: {name_level}" for name, name_level in current_levels().items())
+    await ctx.send(
+        f"📝 **Log levels**\n\n{levels}\n\n"
+        f"Use `/loglevel <subsystem> <level>` (e.g. `lincon`, `linkedin_poster`, `metrics`, `discord`)"
+    )
+
+
 @bot.command(name='linkedin')
-async def linkedin_command(ctx, action: str = None):
+async def linkedin_command(ctx, action: str = None, account: str = DEFAULT_ACCOUNT):
     """LinkedIn management"""
-    global linkedin_poster
-    
     if not isinstance(ctx.channel, discord.DMChannel):
         return
     
@@ -1151,11 +1849,11 @@ async def linkedin_command(ctx, action: str = None):
             
             await ctx.send("🔄 Logging in...")
             
-            if not linkedin_poster:
-                linkedin_poster = LinkedInPoster()
-                await linkedin_poster.init_browser()
-            
-            await linkedin_poster.login(email, password)
+            async with using_linkedin() as poster:
+                if not poster:
+                    await ctx.send("❌ Browser failed to start")
+                    return
+                await poster.login(email, password, account=account)
             await ctx.send("✅ **Logged in**")
             
         except asyncio.TimeoutError:
@@ -1164,23 +1862,29 @@ async def linkedin_command(ctx, action: str = None):
             await ctx.send(f"❌ Failed: {e}")
     
     elif action == 'status':
-        if not linkedin_poster:
-            await ctx.send("❌ Not initialized")
+        if account not in LINKEDIN_ACCOUNT_NAMES:
+            await ctx.send(f"❌ Unknown account `{account}`")
             return
         
-        is_valid = await linkedin_poster.check_session()
+        async with using_linkedin() as poster:
+            if not poster:
+                await ctx.send("❌ Browser failed to start")
+                return
+            is_valid = await poster.check_session(account)
         
         if is_valid:
-            await ctx.send("✅ **Session valid**")
+            await ctx.send(f"✅ **Session valid** ({account})")
         else:
-            await ctx.send("❌ **Session expired**\n\nUse `/linkedin login`")
+            await ctx.send(f"❌ **Session expired** ({account})\n\nUse `/linkedin login {account}`")
     
     else:
         await ctx.send(
             "Usage:\n"
-            "• `/linkedin login`\n"
-            "• `/linkedin status`"
+            "• `/linkedin login [account]`\n"
+            "• `/linkedin status [account]`"
         )
 
 
-bot.run(os.getenv("DISCORD_TOKEN"))
+if __name__ == "__main__":
+    # discord.py logs through the root logger set up above instead of its own handler
+    bot.run(os.getenv("DISCORD_TOKEN"), log_handler=None)
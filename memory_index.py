@@ -0,0 +1,282 @@
+"""
+On-disk embedding index over LinCon_Brain memories (column C)
+Vectors live in a NumPy file next to a JSON manifest; rows are embedded once and updated incrementally
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+
+import numpy as np
+
+from metrics import timer
+
+log = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def normalize(vectors):
+    """L2-normalize rows so a dot product is cosine similarity"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# ---- EMBEDDING PROVIDERS ----
+# A provider has a `name` (stored in the manifest, so switching providers rebuilds the
+# index), a `dim`, and `async embed(texts) -> float32 array of shape (len(texts), dim)`
+
+class HashingEmbedder:
+    """Deterministic local stand-in: signed feature hashing of words and word pairs"""
+
+    def __init__(self, dim=256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _embed_one(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = WORD_PATTERN.findall(text.lower())
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return vector
+
+    async def embed(self, texts):
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([self._embed_one(text) for text in texts])
+
+
+class GeminiEmbedder:
+    """Gemini embedding model, called in batches"""
+
+    def __init__(self, client, model='gemini-embedding-001', dim=768, batch_size=100, metrics=None):
+        self.client = client
+        self.model = model
+        self.dim = dim
+        self.batch_size = batch_size
+        self.metrics = metrics
+        self.name = f"{model}-{dim}"
+
+    async def embed(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            with timer(self.metrics, 'gemini.embed_content'):
+                response = await self.client.aio.models.embed_content(
+                    model=self.model,
+                    contents=texts[start:start + self.batch_size],
+                    config={'output_dimensionality': self.dim}
+                )
+            vectors.extend(embedding.values for embedding in response.embeddings)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+
+
+# ---- INDEX ----
+
+class MemoryIndex:
+    def __init__(self, embedder, path="memory_index", duplicate_threshold=0.92, min_score=None, save_delay=30):
+        """
+        Args:
+            embedder: embedding provider (see above)
+            path: file prefix; writes {path}.npy and {path}.json
+            duplicate_threshold: cosine similarity at which a new memory counts as a near-duplicate
+            min_score: search results below this similarity are unrelated and left out (None keeps all)
+            save_delay: seconds add() waits before writing the index, so a burst of DMs is saved once;
+                additions lost in a crash are re-embedded by the next sync()
+        """
+        self.embedder = embedder
+        self.path = path
+        self.duplicate_threshold = duplicate_threshold
+        self.min_score = min_score
+        self.save_delay = save_delay
+        self.vectors = np.zeros((0, embedder.dim), dtype=np.float32)
+        self.row_nums = []
+        self.hashes = []
+        self.positions = {}   # row_num -> position in vectors
+        self.unsaved = 0
+        self._lock = asyncio.Lock()
+        self._save_timer = None
+        self._save_task = None
+
+    def __len__(self):
+        return len(self.row_nums)
+
+    # ---- PERSISTENCE ----
+
+    def load(self):
+        """Load the index from disk; a missing file or another provider's index starts empty"""
+        try:
+            with open(f"{self.path}.json") as fh:
+                manifest = json.load(fh)
+            vectors = np.load(f"{self.path}.npy")
+        except (OSError, ValueError) as e:
+            log.warning("Memory index not loaded (%s), starting empty", e)
+            return False
+
+        if manifest.get('provider') != self.embedder.name or len(manifest['rows']) != len(vectors):
+            log.info("Memory index was built with another provider, rebuilding")
+            return False
+
+        self.vectors = vectors.astype(np.float32)
+        self.row_nums = manifest['rows']
+        self.hashes = manifest['hashes']
+        self.positions = {row_num: i for i, row_num in enumerate(self.row_nums)}
+        return True
+
+    def _save(self, vectors, row_nums, hashes):
+        # Write side files and swap them in, so a crash never leaves a half-written index
+        with open(f"{self.path}.tmp.npy", 'wb') as fh:
+            np.save(fh, vectors)
+        with open(f"{self.path}.tmp.json", 'w') as fh:
+            json.dump({'provider': self.embedder.name, 'rows': row_nums, 'hashes': hashes}, fh)
+        os.replace(f"{self.path}.tmp.npy", f"{self.path}.npy")
+        os.replace(f"{self.path}.tmp.json", f"{self.path}.json")
+
+    async def save(self):
+        self.unsaved = 0
+        await asyncio.to_thread(self._save, self.vectors.copy(), list(self.row_nums), list(self.hashes))
+
+    def _save_soon(self):
+        if self._save_timer is None:
+            self._save_timer = asyncio.get_running_loop().call_later(self.save_delay, self._save_due)
+
+    def _save_due(self):
+        self._save_timer = None
+        self._save_task = asyncio.ensure_future(self._flush_logged())
+
+    async def _flush_logged(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            log.error("Saving the memory index failed: %s", e)
+
+    async def flush(self):
+        """Write additions still waiting for the delayed save"""
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+        async with self._lock:
+            if self.unsaved:
+                await self.save()
+
+    # ---- UPDATES ----
+
+    async def _upsert(self, items, vectors=None):
+        """Embed and store [(row_num, text)]; existing rows are overwritten in place"""
+        if not items:
+            return
+        if vectors is None:
+            vectors = normalize(await self.embedder.embed([text for _, text in items]))
+
+        new_vectors = []
+        for (row_num, text), vector in zip(items, vectors):
+            position = self.positions.get(row_num)
+            if position is None:
+                self.positions[row_num] = len(self.row_nums)
+                self.row_nums.append(row_num)
+                self.hashes.append(content_hash(text))
+                new_vectors.append(vector)
+            else:
+                self.vectors[position] = vector
+                self.hashes[position] = content_hash(text)
+
+        if new_vectors:
+            self.vectors = np.vstack([self.vectors, np.stack(new_vectors)])
+
+    async def add(self, row_num, text, vector=None):
+        """Index one memory (a DM that was just appended); vector skips re-embedding it"""
+        async with self._lock:
+            await self._upsert([(row_num, text)], None if vector is None else [vector])
+            self.unsaved += 1
+        self._save_soon()
+
+    async def sync(self, rows):
+        """
+        Bring the index in line with the sheet
+
+        Args:
+            rows: {row_num: memory text}
+
+        Returns:
+            number of rows embedded
+        """
+        async with self._lock:
+            stale = [
+                (row_num, text) for row_num, text in rows.items()
+                if text and (row_num not in self.positions
+                             or self.hashes[self.positions[row_num]] != content_hash(text))
+            ]
+            removed = [row_num for row_num in self.row_nums if row_num not in rows]
+
+            if removed:
+                keep = [i for i, row_num in enumerate(self.row_nums) if row_num in rows]
+                self.vectors = self.vectors[keep]
+                self.row_nums = [self.row_nums[i] for i in keep]
+                self.hashes = [self.hashes[i] for i in keep]
+                self.positions = {row_num: i for i, row_num in enumerate(self.row_nums)}
+
+            await self._upsert(stale)
+            if stale or removed or self.unsaved:
+                await self.save()
+            return len(stale)
+
+    # ---- QUERIES ----
+
+    async def embed(self, text):
+        """Normalized embedding of one text, as stored in the index"""
+        return normalize(await self.embedder.embed([text]))[0]
+
+    async def search(self, text, k=10, rows=None, vector=None, min_score=None):
+        """
+        Most similar memories
+
+        Args:
+            rows: optional set of row numbers to restrict the search to
+            vector: text's embedding from embed(), if the caller already has it
+            min_score: overrides the index's min_score
+
+        Returns:
+            [(row_num, cosine similarity)], best first
+        """
+        if not self.row_nums:
+            return []
+
+        query = await self.embed(text) if vector is None else vector
+        scores = self.vectors @ query
+
+        if rows is not None:
+            mask = np.fromiter((row_num in rows for row_num in self.row_nums), dtype=bool,
+                               count=len(self.row_nums))
+            scores = np.where(mask, scores, -np.inf)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        floor = self.min_score if min_score is None else min_score
+        return [
+            (self.row_nums[i], float(scores[i]))
+            for i in top if np.isfinite(scores[i]) and (floor is None or scores[i] >= floor)
+        ]
+
+    async def near_duplicates(self, text, k=3):
+        """
+        Indexed memories at or above duplicate_threshold similarity to text
+
+        Returns:
+            ([(row_num, score)], vector): pass vector to add() to index text without embedding it again
+        """
+        vector = await self.embed(text)
+        duplicates = [
+            (row_num, score)
+            for row_num, score in await self.search(text, k=k, vector=vector, min_score=self.duplicate_threshold)
+        ]
+        return duplicates, vector
@@ -0,0 +1,165 @@
+"""
+Latency histograms and counters for every external call
+Exposed through the /metrics DM command and, optionally, a local Prometheus text endpoint
+"""
+
+import asyncio
+import logging
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+log = logging.getLogger(__name__)
+
+# Upper bounds in seconds, Prometheus style
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, math.inf)
+
+QUOTA_MARKERS = ('429', 'RESOURCE_EXHAUSTED', 'Quota exceeded', 'rateLimitExceeded')
+
+
+def is_quota_error(error):
+    """True for rate-limit / quota responses from Google APIs and Gemini"""
+    if getattr(error, 'code', None) == 429 or getattr(getattr(error, 'resp', None), 'status', None) == 429:
+        return True
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 429:
+        return True
+    text = str(error)
+    return any(marker in text for marker in QUOTA_MARKERS)
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.quota_hits = 0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (None when empty)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.buckets):
+            seen += n
+            if seen >= target:
+                return self.max if math.isinf(bound) else min(bound, self.max)
+        return self.max
+
+
+class Metrics:
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()   # Sheets and Drive calls finish on worker threads
+
+    def observe(self, op, seconds, error=None):
+        with self._lock:
+            histogram = self.histograms.get(op)
+            if histogram is None:
+                histogram = self.histograms[op] = Histogram()
+            histogram.observe(seconds)
+            if error is not None:
+                histogram.errors += 1
+                if is_quota_error(error):
+                    histogram.quota_hits += 1
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def timer(self, op):
+        """Time a block; an exception is counted as an error (and a quota hit if it is one)"""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            elapsed = time.perf_counter() - started
+            self.observe(op, elapsed, error=e)
+            log.debug("%s failed after %.3fs: %s", op, elapsed, e, extra={'op': op, 'seconds': round(elapsed, 3)})
+            raise
+        elapsed = time.perf_counter() - started
+        self.observe(op, elapsed)
+        # Off by default; /loglevel metrics debug traces every external call under its correlation ID
+        log.debug("%s took %.3fs", op, elapsed, extra={'op': op, 'seconds': round(elapsed, 3)})
+
+    # ---- EVENT LOOP ----
+
+    async def watch_loop_lag(self, interval=0.5):
+        """Record how late the loop wakes a sleeping task; runs until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            self.observe('event_loop.lag', max(loop.time() - expected, 0.0))
+
+    # ---- OUTPUT ----
+
+    def summary(self):
+        """[(op, count, errors, quota_hits, p50, p95, max, total)] sorted by total time"""
+        with self._lock:
+            rows = [
+                (op, h.count, h.errors, h.quota_hits, h.quantile(0.5), h.quantile(0.95), h.max, h.sum)
+                for op, h in self.histograms.items()
+            ]
+        return sorted(rows, key=lambda row: row[7], reverse=True)
+
+    def render_prometheus(self):
+        """Prometheus text exposition format"""
+        lines = [
+            "# TYPE lincon_call_seconds histogram",
+            "# TYPE lincon_call_errors_total counter",
+            "# TYPE lincon_call_quota_hits_total counter",
+        ]
+        with self._lock:
+            for op, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS, h.buckets):
+                    cumulative += n
+                    le = '+Inf' if math.isinf(bound) else repr(bound)
+                    lines.append(f'lincon_call_seconds_bucket{{op="{op}",le="{le}"}} {cumulative}')
+                lines.append(f'lincon_call_seconds_sum{{op="{op}"}} {h.sum:.6f}')
+                lines.append(f'lincon_call_seconds_count{{op="{op}"}} {h.count}')
+                lines.append(f'lincon_call_errors_total{{op="{op}"}} {h.errors}')
+                lines.append(f'lincon_call_quota_hits_total{{op="{op}"}} {h.quota_hits}')
+            for name, value in sorted(self.counters.items()):
+                name = re.sub(r'[^a-zA-Z0-9_]', '_', name)
+                lines.append(f'# TYPE lincon_{name}_total counter')
+                lines.append(f'lincon_{name}_total {value}')
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host="127.0.0.1", port=9108):
+        """Expose /metrics over HTTP for a local Prometheus scraper"""
+        from aiohttp import web
+
+        async def handle(request):
+            return web.Response(text=self.render_prometheus(), content_type='text/plain')
+
+        app = web.Application()
+        app.router.add_get('/metrics', handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        log.info("Metrics endpoint on http://%s:%s/metrics", host, port)
+        return runner
+
+
+def timer(metrics, op):
+    """metrics.timer(op), or a no-op when no registry was passed in"""
+    return metrics.timer(op) if metrics else nullcontext()
@@ -0,0 +1,49 @@
+"""
+Posting calendar
+Hands out publish slots on a fixed weekly schedule, skipping slots that are already taken
+"""
+
+from datetime import datetime, timedelta, timezone
+
+
+class PostingCalendar:
+    def __init__(self, times=("14:00",), weekdays=(0, 1, 2, 3, 4), min_lead=timedelta(hours=1)):
+        """
+        Args:
+            times: posting times of day in UTC, "HH:MM"
+            weekdays: days slots are offered on (Monday=0)
+            min_lead: earliest a slot may be from now
+        """
+        self.times = sorted(tuple(int(part) for part in t.split(':')) for t in times)
+        self.weekdays = set(weekdays)
+        self.min_lead = min_lead
+
+    def _slots_from(self, start):
+        """Every slot at or after start, in order"""
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        while True:
+            if day.weekday() in self.weekdays:
+                for hour, minute in self.times:
+                    slot = day.replace(hour=hour, minute=minute)
+                    if slot >= start:
+                        yield slot
+            day += timedelta(days=1)
+
+    def next_free_slots(self, count, taken=(), now=None):
+        """
+        Return the next `count` free slots
+
+        Args:
+            taken: datetimes already booked (e.g. Scheduled Time of SCHEDULED rows)
+        """
+        if count <= 0 or not self.weekdays or not self.times:
+            return []
+
+        now = now or datetime.now(timezone.utc)
+        booked = {t.replace(second=0, microsecond=0) for t in taken}
+        slots = []
+        for slot in self._slots_from(now + self.min_lead):
+            if slot not in booked:
+                slots.append(slot)
+                if len(slots) == count:
+                    return slots
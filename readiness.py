@@ -0,0 +1,104 @@
+"""
+Startup readiness registry
+Heavy clients initialize concurrently in the background; callers await only the components they need
+"""
+
+import asyncio
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+
+class ComponentUnavailable(RuntimeError):
+    """A component failed to start, or did not become ready in time"""
+
+
+class Readiness:
+    def __init__(self):
+        self.components = {}
+        self.tasks = {}
+        self.timings = {}
+        self.errors = {}
+
+    def add(self, name, init, after=()):
+        """
+        Register a component
+
+        Args:
+            name: component name used by wait()
+            init: coroutine function that builds the component and returns it
+            after: components that must be ready before init runs
+        """
+        self.components[name] = (init, tuple(after))
+
+    def start(self):
+        """Launch every registered component; returns immediately"""
+        for name in self.components:
+            if name not in self.tasks:
+                self.tasks[name] = asyncio.ensure_future(self._start_one(name))
+                # Failures are reported through wait(); mark them retrieved so asyncio stays quiet
+                self.tasks[name].add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _start_one(self, name):
+        init, after = self.components[name]
+        if after:
+            try:
+                await self.wait(*after)
+            except ComponentUnavailable as e:
+                self.errors[name] = str(e)
+                raise
+
+        started = time.perf_counter()
+        try:
+            result = await init()
+        except Exception as e:
+            self.errors[name] = str(e) or e.__class__.__name__
+            self.timings[name] = time.perf_counter() - started
+            log.error("Startup: %s FAILED after %.2fs: %s", name, self.timings[name], e)
+            raise ComponentUnavailable(f"{name} failed to start: {self.errors[name]}") from e
+
+        self.timings[name] = time.perf_counter() - started
+        log.info("Startup: %s ready in %.2fs", name, self.timings[name],
+                 extra={'component': name, 'seconds': round(self.timings[name], 3)})
+        return result
+
+    async def wait(self, *names, timeout=None):
+        """
+        Wait until the named components are ready
+
+        Raises:
+            ComponentUnavailable: a component failed, is unknown, or timed out
+        """
+        tasks = []
+        for name in names:
+            if name not in self.tasks:
+                raise ComponentUnavailable(f"{name} has not been started")
+            tasks.append(self.tasks[name])
+
+        try:
+            # shield: a caller giving up must not cancel the shared startup task
+            return await asyncio.wait_for(asyncio.shield(asyncio.gather(*tasks)), timeout)
+        except asyncio.TimeoutError:
+            pending = [name for name, task in zip(names, tasks) if not task.done()]
+            raise ComponentUnavailable(f"still starting: {', '.join(pending)}")
+
+    def is_ready(self, name):
+        task = self.tasks.get(name)
+        return bool(task and task.done() and not task.cancelled() and task.exception() is None)
+
+    def report(self):
+        """{name: (state, seconds or None, error or None)} for /status"""
+        report = {}
+        for name in self.components:
+            task = self.tasks.get(name)
+            if task is None:
+                state = "not started"
+            elif not task.done():
+                state = "starting"
+            elif name in self.errors:
+                state = "failed"
+            else:
+                state = "ready"
+            report[name] = (state, self.timings.get(name), self.errors.get(name))
+        return report
@@ -0,0 +1,166 @@
+"""
+Per-user conversation sessions
+Each in-flight flow (a draft awaiting approval, a content row awaiting assets, a batch awaiting
+CONFIRM) is its own session, keyed by user and reference, and moves through an explicit
+(state, event) -> handler transition table
+"""
+
+import time
+
+
+class SessionConflict(RuntimeError):
+    """A live session already holds this user and ref"""
+
+
+class Session:
+    def __init__(self, user_id, ref, state, data=None):
+        self.user_id = user_id
+        self.ref = str(ref)
+        self.state = state
+        self.data = data or {}
+        self.updated_at = time.time()
+
+    @property
+    def key(self):
+        return (self.user_id, self.ref)
+
+    @property
+    def label(self):
+        """What the user types to pick this session: the ref without its namespace ('draft:3' -> '3')"""
+        return self.ref.rpartition(':')[2]
+
+
+class SessionStore:
+    def __init__(self, ttl=48 * 3600):
+        """
+        Args:
+            ttl: seconds a session may sit untouched before it expires
+        """
+        self.ttl = ttl
+        self.handlers = {}    # (state, event) -> handler
+        self.sessions = {}    # (user_id, ref) -> Session
+        self._events = {}     # state -> events it accepts
+        self._event_names = set()
+        self._waiting = {}    # (user_id, event) -> {ref: Session}, oldest first
+
+    def on(self, state, event):
+        """
+        Decorator adding a transition
+
+        The handler is called as handler(session, message) and returns the session's
+        next state, or None when the flow is finished.
+        """
+        def decorator(handler):
+            self.handlers[(state, event)] = handler
+            self._events.setdefault(state, []).append(event)
+            self._event_names.add(event)
+            return handler
+        return decorator
+
+    def accepts(self, event):
+        """True if any state has a transition for this event"""
+        return event in self._event_names
+
+    # ---- INDEX ----
+
+    def _index(self, session):
+        for event in self._events.get(session.state, ()):
+            self._waiting.setdefault((session.user_id, event), {})[session.ref] = session
+
+    def _unindex(self, session):
+        for event in self._events.get(session.state, ()):
+            waiting = self._waiting.get((session.user_id, event))
+            if waiting and waiting.get(session.ref) is session:
+                del waiting[session.ref]
+
+    # ---- LIFECYCLE ----
+
+    def open(self, user_id, ref, state, data=None, replace=False):
+        """
+        Start a session
+
+        Refs are namespaced by flow ('draft:3', 'row:3') so numbers from different counters
+        never collide. A live session with the same user and ref is kept and SessionConflict
+        raised, unless replace is True.
+        """
+        existing = self.sessions.get((user_id, str(ref)))
+        if existing and not replace and not self._expired(existing):
+            raise SessionConflict(f"Session {ref} is already open for user {user_id}")
+        if existing:
+            self._unindex(existing)
+
+        session = Session(user_id, ref, state, data)
+        self.sessions[session.key] = session
+        self._index(session)
+        return session
+
+    def close(self, session):
+        self._unindex(session)
+        if self.sessions.get(session.key) is session:
+            del self.sessions[session.key]
+
+    def _expired(self, session):
+        return time.time() - session.updated_at > self.ttl
+
+    def sweep(self):
+        """Drop expired sessions; returns how many were removed"""
+        stale = [session for session in self.sessions.values() if self._expired(session)]
+        for session in stale:
+            self.close(session)
+        return len(stale)
+
+    def for_user(self, user_id):
+        return [
+            session for session in self.sessions.values()
+            if session.user_id == user_id and not self._expired(session)
+        ]
+
+    # ---- DISPATCH ----
+
+    def find(self, user_id, event, ref=None):
+        """
+        Session of this user waiting for event
+
+        With a ref (full, or the bare number the user typed), only that session;
+        otherwise the most recently opened one.
+        """
+        waiting = self._waiting.get((user_id, event))
+        if not waiting:
+            return None
+
+        if ref is None:
+            session = next(reversed(waiting.values()))
+        else:
+            matches = [session for session in waiting.values() if str(ref) in (session.ref, session.label)]
+            session = matches[-1] if matches else None
+        if session and self._expired(session):
+            self.close(session)
+            return self.find(user_id, event, ref)
+        return session
+
+    async def dispatch(self, user_id, event, message, ref=None):
+        """
+        Run the transition for an incoming message
+
+        Returns:
+            True if a session handled the message
+        """
+        session = self.find(user_id, event, ref)
+        if session is None:
+            return False
+
+        # Off the index while the handler runs, so a repeated reply can't apply twice
+        self._unindex(session)
+        try:
+            next_state = await self.handlers[(session.state, event)](session, message)
+        except Exception:
+            self._index(session)
+            raise
+
+        if next_state is None:
+            self.close(session)
+        elif self.sessions.get(session.key) is session:
+            session.state = next_state
+            session.updated_at = time.time()
+            self._index(session)
+        return True
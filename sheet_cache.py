@@ -0,0 +1,164 @@
+"""
+In-process mirror of a worksheet with write-through updates and column indexes
+Lets commands answer from memory instead of downloading the whole sheet every time
+"""
+
+import asyncio
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+
+class SheetMirror:
+    def __init__(self, gateway, worksheet, width, index_columns=None, ttl=60,
+                 full_refresh_every=900, writer=None):
+        """
+        Args:
+            gateway: SheetGateway used for all reads and writes
+            worksheet: gspread worksheet being mirrored
+            width: number of columns to keep per row (rows are padded to this)
+            index_columns: {column_index: normalizer} for columns to index by value;
+                the normalizer (e.g. str.lower) is applied to the cell before indexing
+            ttl: seconds before the next read checks the sheet for new rows
+            full_refresh_every: seconds between full reloads that pick up edits made by hand
+            writer: optional RowWriteBuffer flushed before a full reload so pending
+                writes are not overwritten by stale sheet data
+        """
+        self.gateway = gateway
+        self.worksheet = worksheet
+        self.width = width
+        self.index_columns = index_columns or {}
+        self.ttl = ttl
+        self.full_refresh_every = full_refresh_every
+        self.writer = writer
+
+        self.rows = []
+        self.indexes = {col: {} for col in self.index_columns}
+        self.loaded = False
+        self.checked_at = 0
+        self.full_loaded_at = 0
+        self._refresh_lock = asyncio.Lock()
+
+    # ---- LOADING ----
+
+    def _pad(self, row):
+        row = list(row[:self.width])
+        while len(row) < self.width:
+            row.append('')
+        return row
+
+    def _index_row(self, row_num, row):
+        for col, normalize in self.index_columns.items():
+            self.indexes[col].setdefault(normalize(row[col]), set()).add(row_num)
+
+    def _unindex_row(self, row_num, row):
+        for col, normalize in self.index_columns.items():
+            self.indexes[col].get(normalize(row[col]), set()).discard(row_num)
+
+    def _load(self, all_rows):
+        self.rows = [self._pad(row) for row in all_rows]
+        self.indexes = {col: {} for col in self.index_columns}
+        for row_num, row in enumerate(self.rows[1:], start=2):
+            self._index_row(row_num, row)
+        self.loaded = True
+
+    async def _full_refresh(self):
+        if self.writer:
+            await self.writer.flush()
+        self._load(await self.gateway.get_all(self.worksheet))
+        self.full_loaded_at = self.checked_at = time.monotonic()
+
+    async def _tail_refresh(self):
+        """
+        Fetch only rows past the end of the mirror
+
+        The last mirrored row is re-read as an overlap check: if it no longer
+        matches, rows were edited or deleted by hand and the mirror reloads in full.
+        """
+        last_row = len(self.rows)
+        last_col = chr(ord('A') + self.width - 1)
+        tail = await self.gateway.get(self.worksheet, f'A{last_row}:{last_col}')
+
+        if not tail or self._pad(tail[0]) != self.rows[-1]:
+            log.info("External edit detected in %s, reloading", self.worksheet.title)
+            await self._full_refresh()
+            return
+
+        for row in tail[1:]:
+            row = self._pad(row)
+            self.rows.append(row)
+            self._index_row(len(self.rows), row)
+        self.checked_at = time.monotonic()
+
+    async def refresh(self, full=False):
+        """Bring the mirror up to date with the sheet"""
+        async with self._refresh_lock:
+            if full or not self.loaded or len(self.rows) < 2:
+                await self._full_refresh()
+            else:
+                await self._tail_refresh()
+
+    async def ensure_fresh(self):
+        """Refresh only if the TTL has run out"""
+        now = time.monotonic()
+        if not self.loaded or now - self.full_loaded_at > self.full_refresh_every:
+            await self.refresh(full=True)
+        elif now - self.checked_at > self.ttl:
+            await self.refresh()
+
+    # ---- QUERIES ----
+
+    def row(self, row_num):
+        """Return a row by 1-based sheet row number"""
+        if 2 <= row_num <= len(self.rows):
+            return self.rows[row_num - 1]
+        return None
+
+    def data_rows(self):
+        """Yield (row_num, row) for every row below the header"""
+        for row_num, row in enumerate(self.rows[1:], start=2):
+            yield row_num, row
+
+    def row_nums_where(self, col, value):
+        """Row numbers whose indexed column matches value (after normalization)"""
+        return set(self.indexes[col].get(value, ()))
+
+    def rows_where(self, col, value):
+        """(row_num, row) pairs whose indexed column matches value, in sheet order"""
+        return [(n, self.rows[n - 1]) for n in sorted(self.row_nums_where(col, value))]
+
+    def count_by(self, col):
+        """{value: row count} for an indexed column"""
+        return {value: len(nums) for value, nums in self.indexes[col].items() if nums}
+
+    # ---- WRITE-THROUGH ----
+
+    def set_cells(self, row_num, cells):
+        """
+        Apply writes that were sent to the sheet to the local copy
+
+        Args:
+            cells: {column_index: value}
+        """
+        row = self.row(row_num)
+        if row is None:
+            return
+        self._unindex_row(row_num, row)
+        for col, value in cells.items():
+            if col < self.width:
+                row[col] = value
+        self._index_row(row_num, row)
+
+    async def append(self, row):
+        """Append a row to the sheet, mirror it, and return its row number"""
+        row_num = await self.gateway.append(self.worksheet, row)
+        if self.loaded:
+            if row_num == len(self.rows) + 1:
+                row = self._pad(row)
+                self.rows.append(row)
+                self._index_row(row_num, row)
+            else:
+                # Rows were added outside the bot; pull the gap in
+                await self.refresh()
+        return row_num
@@ -0,0 +1,109 @@
+"""
+Async gateway for Google Sheets calls
+Runs blocking gspread calls on a bounded thread pool so the Discord event loop never waits on Sheets
+"""
+
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import timer
+
+
+def row_from_range(a1_range):
+    """Extract the first row number from an A1 range like 'LinCon_Content'!A12:T12"""
+    match = re.search(r'![A-Z]+(\d+)', a1_range) or re.search(r'^[A-Z]+(\d+)', a1_range)
+    if not match:
+        raise ValueError(f"No row number in range {a1_range!r}")
+    return int(match.group(1))
+
+
+class SheetGateway:
+    def __init__(self, max_workers=4, timeout=30, metrics=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sheets")
+        self.timeout = timeout
+        self.metrics = metrics
+        self._locks = {}
+
+    def _lock_for(self, worksheet):
+        """One lock per worksheet keeps calls against the same tab in submission order"""
+        key = getattr(worksheet, 'id', id(worksheet))
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    async def run(self, worksheet, func, *args, timeout=None, **kwargs):
+        """
+        Run a blocking worksheet call off the event loop
+
+        The worksheet lock is held until the call really finishes in its thread,
+        not just until the caller stops waiting, so a timed out or cancelled call
+        can never be overtaken by the next one on the same worksheet. The timeout
+        covers waiting for that lock as well as the call itself.
+        """
+        # Timed from the caller's side, so queueing behind the worksheet lock counts too
+        with timer(self.metrics, f"sheets.{getattr(func, '__name__', 'call')}"):
+            return await self._run(worksheet, func, *args, timeout=timeout, **kwargs)
+
+    async def _run(self, worksheet, func, *args, timeout=None, **kwargs):
+        loop = asyncio.get_running_loop()
+        lock = self._lock_for(worksheet)
+
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(lock.release)
+            except RuntimeError:
+                # Event loop already closed during shutdown
+                pass
+
+        async with asyncio.timeout(timeout or self.timeout):
+            await lock.acquire()
+            try:
+                job = self.executor.submit(func, *args, **kwargs)
+            except Exception:
+                lock.release()
+                raise
+            job.add_done_callback(release)
+
+            try:
+                return await asyncio.shield(asyncio.wrap_future(job))
+            except asyncio.CancelledError:
+                # Timed out or cancelled: drop the call if it never left the queue;
+                # a running call is left to finish
+                job.cancel()
+                raise
+
+    async def get_all(self, worksheet, timeout=None):
+        """Fetch every row of a worksheet"""
+        return await self.run(worksheet, worksheet.get_all_values, timeout=timeout)
+
+    async def get(self, worksheet, range_name, timeout=None):
+        """Fetch a single A1 range"""
+        return await self.run(worksheet, worksheet.get, range_name, timeout=timeout)
+
+    async def append(self, worksheet, row, timeout=None):
+        """Append a row and return the row number Sheets assigned to it"""
+        response = await self.run(worksheet, worksheet.append_row, row, timeout=timeout)
+        return row_from_range(response['updates']['updatedRange'])
+
+    async def update(self, worksheet, values, range_name, timeout=None):
+        """Write a block of values to one range"""
+        return await self.run(
+            worksheet, worksheet.update,
+            values=values, range_name=range_name, timeout=timeout
+        )
+
+    async def batch_update(self, worksheet, data, timeout=None):
+        """
+        Write several ranges in a single API call
+
+        Args:
+            data: list of {'range': 'D2', 'values': [[...]]} dicts
+        """
+        if not data:
+            return None
+        return await self.run(worksheet, worksheet.batch_update, data, timeout=timeout)
+
+    def close(self):
+        """Stop accepting work and let queued calls drain"""
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta, timezone
+
+from context_builder import ContextBuilder, estimate_tokens
+
+NOW = datetime(2026, 10, 17, tzinfo=timezone.utc)
+
+
+def memory(row_num, content, days_old=0, memory_type='insight', relevance=None):
+    return {'row_num': row_num, 'type': memory_type, 'content': content,
+            'timestamp': NOW - timedelta(days=days_old), 'relevance': relevance}
+
+
+def test_best_memories_fill_the_budget_oldest_first():
+    builder = ContextBuilder(budget=30)
+    memories = [memory(1, "a" * 40, days_old=1), memory(2, "b" * 40), memory(3, "c" * 40, days_old=9)]
+
+    context = builder.build(memories, now=NOW)
+
+    assert [m['row_num'] for m in context['selected']] == [1, 2]
+    assert [m['row_num'] for m in context['dropped']] == [3]
+    assert context['tokens'] <= context['budget']
+
+
+def test_redundant_memories_are_dropped():
+    builder = ContextBuilder(budget=500)
+    memories = [memory(1, "cut scope before the release"), memory(2, "cut scope before the release date")]
+
+    assert len(builder.build(memories, now=NOW)['selected']) == 1
+
+
+def test_oversized_top_memory_is_truncated_rather_than_dropped():
+    builder = ContextBuilder(budget=20)
+
+    context = builder.build([memory(1, "x" * 400)], now=NOW)
+
+    assert [m['row_num'] for m in context['selected']] == [1]
+    assert context['dropped'] == []
+    assert estimate_tokens(context['text']) + 1 <= builder.budget
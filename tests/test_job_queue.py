@@ -0,0 +1,91 @@
+import asyncio
+
+from job_queue import DEAD, JobQueue, NoRetry
+from metrics import Metrics
+
+
+def run_queue(queue, until, timeout=5):
+    """Run two workers until until() holds"""
+    async def main():
+        queue.start(workers=2)
+        try:
+            async with asyncio.timeout(timeout):
+                while not until():
+                    await asyncio.sleep(0.01)
+        finally:
+            for worker in queue.workers:
+                worker.cancel()
+    asyncio.run(main())
+
+
+def make_queue():
+    return JobQueue(":memory:", base_delay=0, poll_interval=0.01, metrics=Metrics())
+
+
+def test_retry_sees_checkpoints_of_failed_attempt():
+    queue = make_queue()
+    payloads = []
+
+    async def handler(payload):
+        payloads.append(payload)
+        if not payload.get('checkpoints', {}).get('posted'):
+            queue.checkpoint(posted=True)
+            raise RuntimeError("bookkeeping failed")
+        return "POSTED"
+
+    queue.register('post', handler)
+    job_id, _ = queue.enqueue('post', {'row_num': 3}, key='post:3')
+    run_queue(queue, lambda: queue.get(job_id)['state'] == "POSTED")
+
+    assert [p.get('checkpoints') for p in payloads] == [None, {'posted': True}]
+    assert queue.get(job_id)['attempts'] == 2
+    assert queue.metrics.counters == {'jobs.retried': 1, 'jobs.finished': 1}
+
+
+def test_no_retry_dead_letters_at_once():
+    queue = make_queue()
+    dead = []
+
+    async def handler(payload):
+        queue.checkpoint(clicked=True)
+        raise NoRetry("clicked but not confirmed")
+
+    async def on_dead(job, error):
+        dead.append(error)
+
+    queue.register('post', handler)
+    queue.on_dead = on_dead
+    job_id, _ = queue.enqueue('post', {}, key='post:1', max_attempts=5)
+    run_queue(queue, lambda: dead)
+
+    job = queue.get(job_id)
+    assert (job['state'], job['attempts'], dead) == (DEAD, 1, ["clicked but not confirmed"])
+    assert queue.metrics.counters == {'jobs.dead_lettered': 1}
+
+    # A manual retry starts over without the earlier attempt's checkpoints
+    assert queue.retry(job_id)
+    assert 'checkpoints' not in queue.get(job_id)['payload']
+
+
+def test_enqueue_is_idempotent_per_key():
+    queue = make_queue()
+    first, created = queue.enqueue('post', {'row_num': 3}, key='post:3')
+    again, created_again = queue.enqueue('post', {'row_num': 3, 'caption': 'changed'}, key='post:3')
+
+    assert created and not created_again
+    assert first == again
+    assert queue.counts() == {"READY_TO_POST": 1}
+
+
+def test_dead_letter_with_same_key_is_queued_again():
+    queue = make_queue()
+
+    async def handler(payload):
+        raise RuntimeError("LinkedIn down")
+
+    queue.register('post', handler)
+    job_id, _ = queue.enqueue('post', {}, key='post:3', max_attempts=2)
+    run_queue(queue, lambda: queue.get(job_id)['state'] == DEAD)
+
+    assert queue.enqueue('post', {}, key='post:3') == (job_id, True)
+    assert queue.get(job_id)['attempts'] == 0
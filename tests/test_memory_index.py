@@ -0,0 +1,48 @@
+import asyncio
+
+from memory_index import HashingEmbedder, MemoryIndex
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self, dim=64):
+        super().__init__(dim)
+        self.calls = 0
+
+    async def embed(self, texts):
+        self.calls += 1
+        return await super().embed(texts)
+
+
+def test_search_leaves_out_unrelated_memories(tmp_path):
+    async def main():
+        index = MemoryIndex(HashingEmbedder(64), str(tmp_path / 'index'), min_score=0.3)
+        await index.sync({2: "shipping the release late taught me to cut scope", 3: "bought a new bike"})
+        return await index.search("cut scope before the release")
+
+    assert [row_num for row_num, _ in asyncio.run(main())] == [2]
+
+
+def test_added_memories_are_embedded_once_and_saved_together(tmp_path):
+    path = str(tmp_path / 'index')
+    embedder = CountingEmbedder()
+
+    async def main():
+        index = MemoryIndex(embedder, path, save_delay=60)
+        await index.sync({2: "hello world"})
+        embedder.calls = 0
+        for row_num, text in ((3, "hello world"), (4, "something else")):
+            _, vector = await index.near_duplicates(text)
+            await index.add(row_num, text, vector=vector)
+        saved_rows = MemoryIndex(embedder, path)
+        saved_rows.load()
+        before_flush = list(saved_rows.row_nums)
+        await index.flush()
+        return before_flush
+
+    before_flush = asyncio.run(main())
+    assert embedder.calls == 2
+    assert before_flush == [2]
+
+    reloaded = MemoryIndex(embedder, path)
+    assert reloaded.load()
+    assert reloaded.row_nums == [2, 3, 4]
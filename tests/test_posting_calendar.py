@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta, timezone
+
+from posting_calendar import PostingCalendar
+
+MONDAY = datetime(2026, 10, 12, 9, 0, tzinfo=timezone.utc)
+
+
+def test_slots_skip_taken_times_and_other_weekdays():
+    calendar = PostingCalendar(times=["14:00"], weekdays=(0, 2))
+    taken = [datetime(2026, 10, 12, 14, 0, 30, tzinfo=timezone.utc)]
+
+    slots = calendar.next_free_slots(2, taken=taken, now=MONDAY)
+
+    assert slots == [
+        datetime(2026, 10, 14, 14, 0, tzinfo=timezone.utc),
+        datetime(2026, 10, 19, 14, 0, tzinfo=timezone.utc),
+    ]
+
+
+def test_slots_respect_the_minimum_lead():
+    calendar = PostingCalendar(times=["09:30", "14:00"], weekdays=range(7), min_lead=timedelta(hours=1))
+
+    assert calendar.next_free_slots(1, now=MONDAY) == [datetime(2026, 10, 12, 14, 0, tzinfo=timezone.utc)]
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from sessions import SessionConflict, SessionStore
+
+
+def make_store():
+    store = SessionStore()
+    handled = []
+
+    @store.on('IDEA_CAPTURED', 'approve')
+    async def approve(session, message):
+        handled.append(('approve', session.ref))
+        return None
+
+    @store.on('ASSETS_ATTACHED', 'done')
+    async def done(session, message):
+        handled.append(('done', session.ref))
+        return None
+
+    return store, handled
+
+
+def test_flows_with_equal_numbers_stay_open_together():
+    store, handled = make_store()
+    store.open(1, 'draft:3', 'IDEA_CAPTURED')
+    store.open(1, 'row:3', 'ASSETS_ATTACHED')
+
+    assert asyncio.run(store.dispatch(1, 'approve', None, ref='3'))
+    assert store.find(1, 'done', '3').ref == 'row:3'
+    assert asyncio.run(store.dispatch(1, 'done', None, ref='3'))
+    assert handled == [('approve', 'draft:3'), ('done', 'row:3')]
+
+
+def test_open_refuses_a_live_key():
+    store, _ = make_store()
+    first = store.open(1, 'draft:1', 'IDEA_CAPTURED')
+
+    with pytest.raises(SessionConflict):
+        store.open(1, 'draft:1', 'IDEA_CAPTURED')
+    assert store.find(1, 'approve') is first
+
+    second = store.open(1, 'draft:1', 'IDEA_CAPTURED', replace=True)
+    assert store.find(1, 'approve') is second
+
+
+def test_handler_state_keeps_the_session_indexed():
+    store = SessionStore()
+
+    @store.on('ASSETS_REQUIRED', 'skip')
+    async def skip(session, message):
+        return 'ASSETS_ATTACHED'
+
+    @store.on('ASSETS_ATTACHED', 'done')
+    async def done(session, message):
+        return None
+
+    store.open(1, 'row:7', 'ASSETS_REQUIRED')
+    assert asyncio.run(store.dispatch(1, 'skip', None))
+    assert store.find(1, 'skip') is None
+    assert store.find(1, 'done', '7').state == 'ASSETS_ATTACHED'
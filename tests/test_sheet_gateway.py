@@ -0,0 +1,59 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from sheet_gateway import SheetGateway, row_from_range
+
+
+class Worksheet:
+    id = 1
+
+
+def test_timeout_covers_waiting_behind_a_hung_call():
+    gateway = SheetGateway(max_workers=2, timeout=5)
+    hung = threading.Event()
+
+    async def main():
+        first = asyncio.ensure_future(gateway.run(Worksheet(), hung.wait, timeout=0.2))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            # The outer guard only stops a regression from hanging the suite
+            async with asyncio.timeout(2):
+                await gateway.run(Worksheet(), lambda: 'late', timeout=0.3)
+        waited = time.monotonic() - started
+        with pytest.raises(TimeoutError):
+            await first
+        hung.set()
+        # The worksheet is usable again once the hung call really returns
+        assert await gateway.run(Worksheet(), lambda: 'ok', timeout=1) == 'ok'
+        return waited
+
+    try:
+        assert asyncio.run(main()) < 1
+    finally:
+        hung.set()
+        gateway.close()
+
+
+def test_calls_on_one_worksheet_run_in_order():
+    gateway = SheetGateway(max_workers=4)
+    order = []
+
+    def call(n):
+        time.sleep(0.02 * (3 - n))
+        order.append(n)
+
+    async def main():
+        await asyncio.gather(*(gateway.run(Worksheet(), call, n) for n in range(3)))
+
+    asyncio.run(main())
+    gateway.close()
+    assert order == [0, 1, 2]
+
+
+def test_row_from_range():
+    assert row_from_range("'LinCon_Content'!A12:T12") == 12
+    assert row_from_range("D7") == 7
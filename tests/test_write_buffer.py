@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from write_buffer import RowWriteBuffer
+
+
+class Gateway:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = []
+
+    async def batch_update(self, worksheet, data):
+        self.calls.append(data)
+        await asyncio.sleep(0)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("sheets unavailable")
+
+
+def test_rejected_write_leaves_nothing_queued():
+    gateway = Gateway()
+
+    async def main():
+        buffer = RowWriteBuffer(gateway, None, first_column='L', last_column='T', debounce=10)
+        with pytest.raises(ValueError):
+            buffer.write(5, {'L': 'POSTED', 'A': 'out of range'})
+        assert buffer.pending == {}
+        assert buffer.cells_queued == 0
+
+        buffer.write(6, {'L': 'SCHEDULED', 'Q': '2026-01-01', 'M': 'dio'})
+        await buffer.flush()
+        return buffer
+
+    buffer = asyncio.run(main())
+    assert gateway.calls == [[
+        {'range': 'L6:M6', 'values': [['SCHEDULED', 'dio']]},
+        {'range': 'Q6', 'values': [['2026-01-01']]},
+    ]]
+    assert buffer.pending == {}
+
+
+def test_failed_flush_retries_on_its_own():
+    gateway = Gateway(failures=2)
+
+    async def main():
+        buffer = RowWriteBuffer(gateway, None, debounce=0.01)
+        buffer.write(3, {'L': 'POSTED'})
+        async with asyncio.timeout(2):
+            while buffer.pending or len(gateway.calls) < 3:
+                await asyncio.sleep(0.01)
+        return buffer
+
+    buffer = asyncio.run(main())
+    assert len(gateway.calls) == 3
+    assert buffer.api_calls == 1
+
+
+def test_writes_queued_during_a_failed_flush_win():
+    gateway = Gateway(failures=1)
+
+    async def main():
+        buffer = RowWriteBuffer(gateway, None, debounce=10)
+        buffer.write(3, {'L': 'SCHEDULED', 'S': 'PENDING'})
+        flushing = asyncio.ensure_future(buffer.flush())
+        await asyncio.sleep(0)
+        buffer.write(3, {'L': 'POSTED'})
+        with pytest.raises(ConnectionError):
+            await flushing
+        return buffer
+
+    buffer = asyncio.run(main())
+    assert buffer.pending == {3: {11: 'POSTED', 18: 'PENDING'}}
@@ -0,0 +1,135 @@
+"""
+Write-coalescing buffer for Google Sheets
+Collects cell writes per row and sends them as a single batch_update
+"""
+
+import asyncio
+import logging
+
+log = logging.getLogger(__name__)
+
+
+def column_index(letter):
+    """Convert a column letter (A..Z) to a 0-based index"""
+    return ord(letter.upper()) - ord('A')
+
+
+def column_letter(index):
+    """Convert a 0-based index to a column letter (A..Z)"""
+    return chr(ord('A') + index)
+
+
+class RowWriteBuffer:
+    def __init__(self, gateway, worksheet, first_column='L', last_column='T', debounce=0.5,
+                 max_retry_delay=60):
+        self.gateway = gateway
+        self.worksheet = worksheet
+        self.first = column_index(first_column)
+        self.last = column_index(last_column)
+        self.debounce = debounce
+        self.max_retry_delay = max_retry_delay
+        self.pending = {}
+        self.cells_queued = 0
+        self.api_calls = 0
+        self._timer = None
+        self._task = None
+        self._failures = 0
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def calls_saved(self):
+        """API calls avoided compared to one update per cell"""
+        return self.cells_queued - self.api_calls
+
+    def write(self, row_num, cells):
+        """
+        Queue cell writes for one row
+
+        Args:
+            row_num: 1-based sheet row
+            cells: {column_letter: value}, columns must fall inside the buffer's range
+        """
+        # Check every column first, so a rejected write leaves nothing behind
+        indexed = {}
+        for letter, value in cells.items():
+            idx = column_index(letter)
+            if not self.first <= idx <= self.last:
+                raise ValueError(f"Column {letter} outside buffered range")
+            indexed[idx] = value
+        if not indexed:
+            return
+
+        self.pending.setdefault(row_num, {}).update(indexed)
+        self.cells_queued += len(indexed)
+
+        # Fixed window from the first queued write, so a busy row cannot postpone its flush forever
+        self._arm(self.debounce)
+
+    def _arm(self, delay):
+        if self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(delay, self._flush_soon)
+
+    def _flush_soon(self):
+        self._timer = None
+        self._task = asyncio.ensure_future(self._flush_logged())
+
+    async def _flush_logged(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            log.error("Buffered sheet write failed: %s", e)
+
+    def _build_ranges(self, pending):
+        """Turn {row: {col: value}} into contiguous A1 ranges, one per run of columns"""
+        data = []
+        for row_num in sorted(pending):
+            cols = sorted(pending[row_num])
+            if not cols:
+                continue
+            start = prev = cols[0]
+            values = [pending[row_num][start]]
+            for col in cols[1:]:
+                if col == prev + 1:
+                    values.append(pending[row_num][col])
+                else:
+                    data.append(self._range(row_num, start, prev, values))
+                    start = col
+                    values = [pending[row_num][col]]
+                prev = col
+            data.append(self._range(row_num, start, prev, values))
+        return data
+
+    def _range(self, row_num, start, end, values):
+        if start == end:
+            name = f'{column_letter(start)}{row_num}'
+        else:
+            name = f'{column_letter(start)}{row_num}:{column_letter(end)}{row_num}'
+        return {'range': name, 'values': [values]}
+
+    async def flush(self):
+        """Send everything queued so far in one batch_update"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        async with self._flush_lock:
+            if not self.pending:
+                return
+            pending, self.pending = self.pending, {}
+
+            try:
+                await self.gateway.batch_update(self.worksheet, self._build_ranges(pending))
+            except BaseException:
+                # Put failed writes back without clobbering anything queued since
+                for row_num, cols in pending.items():
+                    merged = dict(cols)
+                    merged.update(self.pending.get(row_num, {}))
+                    self.pending[row_num] = merged
+                # Retry on our own with backoff instead of waiting for the next unrelated write
+                self._failures += 1
+                self._arm(min(self.debounce * 2 ** self._failures, self.max_retry_delay))
+                raise
+
+            self._failures = 0
+            self.api_calls += 1